@@ -2,6 +2,15 @@ from flask import Flask
 from flask_cors import CORS
 import os
 
+# CORS origins allowed to call /api/* (also used by app/asgi.py)
+ALLOWED_ORIGINS = [
+    'http://localhost:3001',
+    'http://localhost:3000',
+    'https://career-guider-amber.vercel.app',  # ✅ Your Vercel frontend
+    'https://*.vercel.app',
+    'https://career-guider-api.onrender.com'  # ✅ ADD THIS - Your Render backend
+]
+
 def create_app():
     app = Flask(__name__)
     
@@ -9,23 +18,19 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     
     # CORS Configuration - Allow frontend to access backend
-    allowed_origins = [
-        'http://localhost:3001',
-        'http://localhost:3000',
-        'https://career-guider-amber.vercel.app',  # ✅ Your Vercel frontend
-        'https://*.vercel.app',
-        'https://career-guider-api.onrender.com'  # ✅ ADD THIS - Your Render backend
-    ]
-    
     CORS(app,
          resources={r"/api/*": {
-             "origins": allowed_origins,
+             "origins": ALLOWED_ORIGINS,
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
              "allow_headers": ["Content-Type", "Authorization"],
              "supports_credentials": True,
              "expose_headers": ["Content-Type", "Authorization"]
          }})
     
+    # Request latency/status metrics and GET /metrics
+    from app import metrics
+    metrics.init_app(app)
+    
     # Import and register routes
     from app.routes.api import bp as api_bp
     from app.routes.quiz_routes import quiz_bp  # ← YOU ALREADY HAVE THIS
@@ -33,6 +38,24 @@ def create_app():
     app.register_blueprint(api_bp)
     app.register_blueprint(quiz_bp, url_prefix='/api')  # ← ADD THIS LINE!
     
+    # Start the password hashing workers before any background threads
+    from app.services.password_pool import get_password_pool
+    get_password_pool().start()
+    
+    # Structured logging through a background queue, one access line per request
+    from app import log
+    log.init_app(app)
+    
+    # Optional write-behind answer buffer: replay its log now, not on first save
+    from app.db.write_behind import get_write_behind
+    get_write_behind()
+    
+    # Warm connections, payloads and compiled structures in the background; see /ready
+    from app.warmup import get_warmup
+    warmup = get_warmup()
+    if warmup:
+        warmup.start()
+    
     # Health check route
     @app.route('/')
     def index():
@@ -42,4 +65,12 @@ def create_app():
     def health():
         return {'status': 'healthy'}, 200
     
+    @app.route('/ready')
+    def ready():
+        """Readiness: 200 once every warmup component is warm, else 503"""
+        report = warmup.report() if warmup else {'ready': True, 'components': {}}
+        # Informational: 'saturated' is a login burst, 'stuck' a wedged hashing worker
+        report['password_pool'] = get_password_pool().state()
+        return report, 200 if report['ready'] else 503
+    
     return app
@@ -0,0 +1,296 @@
+"""
+ASGI serving mode
+
+The quiz hot paths (answer saves, session reads, live leaning, history,
+completion and dashboard stats) run as async views on one event loop, awaiting Supabase
+through app/db/async_client.py, so a request waiting on the database no
+longer holds a worker thread. Every other route is served by the regular
+Flask app, mounted behind the async ones.
+
+    python run.py --asgi
+    uvicorn app.asgi:create_asgi_app --factory --port 5050
+"""
+import asyncio
+import contextlib
+import logging
+import re
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route, request_response
+
+from app import ALLOWED_ORIGINS, create_app, log, metrics
+from app.db.async_client import close_async_supabase, get_async_supabase
+from app.db.history import parse_history_args, stream_history_async
+from app.db.session_store import (
+    VersionConflict, dump_answers, load_answers, load_live_scores, merge_session_answers_async
+)
+from app.db.user_stats import get_user_quiz_stats_async
+from app.db.write_behind import flush_session, get_write_behind
+from app.services.stream_analyzer import get_analyzer
+
+logger = logging.getLogger(__name__)
+
+
+def _error(e, status=500):
+    return JSONResponse({'success': False, 'error': str(e)}, status_code=status)
+
+
+async def save_answer(request):
+    """Async /quiz/save-answer (same contract as quiz_routes.save_answer)"""
+    try:
+        data = await request.json()
+
+        session_id = data.get('session_id')
+        question_id = str(data.get('question_id', ''))
+        answer = data.get('answer', '')
+        question_index = int(data.get('question_index', 0))
+        first_two_answers = data.get('first_two_answers', {})
+        log.bind(session_id=session_id, question_index=question_index)
+
+        supabase = get_async_supabase()
+        analyzer = get_analyzer()
+
+        # Q2 (index 1) - create the session
+        if question_index == 1 and not session_id:
+            first_two_answers[question_id] = answer
+            response = await supabase.table('quiz_sessions').insert({
+                'user_id': str(data.get('user_id')),
+                'mode': str(data.get('mode')),
+                'class_level': str(data.get('class_level')),
+                'current_question': 2,
+                'is_completed': False,
+                'answers': dump_answers(first_two_answers),
+                'live_scores': analyzer.contributions(first_two_answers),
+                'score': 0
+            }).execute()
+            log.bind(session_id=response.data[0]['id'], created=True)
+            return JSONResponse({
+                'success': True,
+                'session_id': response.data[0]['id'],
+                'is_saved': True
+            })
+
+        # Q3+ - merge the answer into the session
+        if session_id and question_index >= 2:
+            scores = analyzer.contributions({question_id: answer})
+            buffer = get_write_behind()
+            if buffer:
+                buffer.append(session_id, {question_id: answer}, question_index + 1, scores=scores)
+                log.bind(buffered=True)
+                return JSONResponse({'success': True, 'is_saved': True, 'buffered': True})
+
+            try:
+                version = await merge_session_answers_async(
+                    supabase,
+                    session_id,
+                    {question_id: answer},
+                    current_question=question_index + 1,
+                    expected_version=data.get('version'),
+                    scores=scores
+                )
+            except VersionConflict as e:
+                return JSONResponse({
+                    'success': False,
+                    'error': 'Session was updated concurrently',
+                    'version': e.current_version
+                }, status_code=409)
+
+            if version is None:
+                return _error('Session not found', 404)
+            return JSONResponse({'success': True, 'is_saved': True, 'version': version})
+
+        # Q1 - just acknowledge
+        return JSONResponse({'success': True, 'is_saved': False})
+    except Exception as e:
+        logger.exception('Save answer failed')
+        return _error(e)
+
+
+async def save_progress(request):
+    """Async /quiz/save-progress: the session update and the answers row are written concurrently"""
+    try:
+        data = await request.json()
+        session_id = data.get('session_id')
+        current_question = data.get('current_question')
+        answer = data.get('answer')
+        question_id = data.get('question_id')
+
+        answer_data = {
+            'session_id': session_id,
+            'user_id': data.get('user_id'),
+            'question_id': question_id,
+            'answer': answer
+        }
+
+        # Not buffered by write-behind: this route appends to a list of answers,
+        # while the buffer merges {question_id: answer} objects
+        supabase = get_async_supabase()
+
+        async def update_session():
+            session_response = await supabase.table('quiz_sessions')\
+                .select('answers')\
+                .eq('id', session_id)\
+                .execute()
+            current_answers = session_response.data[0].get('answers', [])
+            current_answers.append({
+                'question_id': question_id,
+                'answer': answer,
+                'timestamp': datetime.now().isoformat()
+            })
+            await supabase.table('quiz_sessions').update({
+                'current_question': current_question,
+                'answers': current_answers
+            }).eq('id', session_id).execute()
+
+        await asyncio.gather(update_session(), supabase.table('answers').insert(answer_data).execute())
+
+        return JSONResponse({'success': True, 'message': 'Progress saved'})
+    except Exception as e:
+        return _error(e)
+
+
+async def get_session(request):
+    """Async /quiz/get-session/<session_id>"""
+    try:
+        session_id = request.path_params['session_id']
+        # Include saves still in the write-behind buffer
+        await asyncio.to_thread(flush_session, session_id)
+        supabase = get_async_supabase()
+        response = await supabase.table('quiz_sessions')\
+            .select('*')\
+            .eq('id', session_id)\
+            .execute()
+
+        if not response.data:
+            return _error('Session not found', 404)
+        session = response.data[0]
+        session['answers'] = load_answers(session.get('answers'))
+        return JSONResponse({'success': True, 'session': session})
+    except Exception as e:
+        logger.exception('Get session failed')
+        return _error(e)
+
+
+async def get_leaning(request):
+    """Async /quiz/leaning/<session_id>"""
+    try:
+        session_id = request.path_params['session_id']
+        await asyncio.to_thread(flush_session, session_id)
+        supabase = get_async_supabase()
+        response = await supabase.table('quiz_sessions')\
+            .select('answers, live_scores')\
+            .eq('id', session_id)\
+            .execute()
+
+        if not response.data:
+            return _error('Session not found', 404)
+        session = response.data[0]
+        analyzer = get_analyzer()
+        scores = analyzer.current_scores(load_answers(session.get('answers')),
+                                         load_live_scores(session.get('live_scores')))
+        return JSONResponse({'success': True, 'session_id': session_id, 'leaning': analyzer.leaning(scores)})
+    except Exception as e:
+        logger.exception('Get leaning failed')
+        return _error(e)
+
+
+async def get_history(request):
+    """Async /quiz/history (?limit=&cursor=&include=answers), streamed"""
+    try:
+        user_id = request.query_params.get('user_id')
+        try:
+            limit, after, include_answers = parse_history_args(request.query_params)
+        except ValueError as e:
+            return _error(e, 400)
+
+        supabase = get_async_supabase()
+        body = await stream_history_async(supabase, user_id, limit, after, include_answers)
+        return StreamingResponse(body, media_type='application/json')
+    except Exception as e:
+        return _error(e)
+
+
+async def complete_quiz(request):
+    """Async /quiz/complete"""
+    try:
+        data = await request.json()
+        session_id = data.get('session_id')
+
+        # Buffered answers must land before the session is marked complete
+        await asyncio.to_thread(flush_session, session_id)
+
+        supabase = get_async_supabase()
+        response = await supabase.table('quiz_sessions').update({
+            'is_completed': True,
+            'completed_at': datetime.now().isoformat(),
+            'score': data.get('score', 0)
+        }).eq('id', session_id).execute()
+
+        recommendation = None
+        if response.data:
+            session = response.data[0]
+            recommendation = get_analyzer().recommend(load_answers(session.get('answers')),
+                                                      load_live_scores(session.get('live_scores')))
+
+        return JSONResponse({'success': True, 'message': 'Quiz completed!', 'recommendation': recommendation})
+    except Exception as e:
+        return _error(e)
+
+
+async def dashboard_stats(request):
+    """Async /dashboard/stats"""
+    try:
+        supabase = get_async_supabase()
+        stats = await get_user_quiz_stats_async(supabase, request.query_params.get('user_id'))
+        return JSONResponse({'success': True, 'stats': stats})
+    except Exception as e:
+        return _error(e)
+
+
+def _cors(endpoint):
+    """Wrap an async view with the same CORS policy Flask-CORS applies to /api/*"""
+    exact = [o for o in ALLOWED_ORIGINS if '*' not in o]
+    wildcard = [re.escape(o).replace(r'\*', '.*') for o in ALLOWED_ORIGINS if '*' in o]
+    return CORSMiddleware(
+        request_response(endpoint),
+        allow_origins=exact,
+        allow_origin_regex='|'.join(wildcard) or None,
+        allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+        allow_headers=['Content-Type', 'Authorization'],
+        allow_credentials=True,
+        expose_headers=['Content-Type', 'Authorization']
+    )
+
+
+ASYNC_ROUTES = [
+    ('/api/quiz/save-answer', save_answer, ['POST']),
+    ('/api/quiz/save-progress', save_progress, ['POST']),
+    ('/api/quiz/get-session/{session_id}', get_session, ['GET']),
+    ('/api/quiz/leaning/{session_id}', get_leaning, ['GET']),
+    ('/api/quiz/history', get_history, ['GET']),
+    ('/api/quiz/complete', complete_quiz, ['POST']),
+    ('/api/dashboard/stats', dashboard_stats, ['GET'])
+]
+
+
+def create_asgi_app(flask_app=None, wsgi_threads=10):
+    """ASGI app: async quiz routes in front of the Flask app"""
+    flask_app = flask_app or create_app()
+    routes = []
+    for path, view, methods in ASYNC_ROUTES:
+        # Labelled like the Flask rule, e.g. /api/quiz/get-session/<session_id>
+        rule = path.replace('{', '<').replace('}', '>')
+        endpoint = metrics.ASGIRouteMetrics(log.ASGIRouteLogging(_cors(view), rule), rule)
+        routes.append(Route(path, endpoint, methods=methods + ['OPTIONS']))
+    routes.append(Mount('/', app=WSGIMiddleware(flask_app, workers=wsgi_threads)))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await close_async_supabase()
+
+    return Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,118 @@
+"""
+Async Supabase access for the ASGI app (app/asgi.py)
+
+Table and RPC calls go through postgrest's AsyncPostgrestClient on one
+pooled httpx.AsyncClient per event loop, so concurrent requests share
+keep-alive connections without a thread each. With DB_BACKEND=sqlite the
+local stand-in is wrapped instead: its emulated latency is awaited, and the
+SQLite work itself runs on a worker thread.
+"""
+import asyncio
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import AsyncClient
+
+from app.db.local_backend import get_local_client
+from app.metrics import mark_request_async, record_response_async, track_db
+from app.db.supabase_client import (
+    DB_BACKEND, SUPABASE_URL, SUPABASE_ANON_KEY, POOL_MAX_CONNECTIONS,
+    POOL_MAX_KEEPALIVE, POOL_KEEPALIVE_EXPIRY, POOL_TIMEOUT
+)
+
+
+class PooledAsyncPostgrest(AsyncPostgrestClient):
+    """AsyncPostgrestClient on a keep-alive pool sized like the sync one"""
+
+    def create_session(self, base_url, headers, timeout):
+        limits = httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+        )
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=1),
+            event_hooks={'request': [mark_request_async], 'response': [record_response_async]}
+        )
+
+
+class AsyncLocalClient:
+    """Async facade over the SQLite stand-in"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def table(self, table_name):
+        return AsyncLocalQuery(self.client, self.client.table(table_name))
+
+    def from_(self, table_name):
+        return self.table(table_name)
+
+    def rpc(self, fn, params):
+        return AsyncLocalQuery(self.client, self.client.rpc(fn, params))
+
+    async def aclose(self):
+        pass
+
+
+class AsyncLocalQuery:
+    """Forwards builder calls to a local query; execute() is awaitable"""
+
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._query else result
+        return chained
+
+    async def execute(self):
+        with track_db(*self._query.target()) as call:
+            await asyncio.sleep(self._client.random_delay())
+            result = await asyncio.to_thread(self._query.run)
+            await asyncio.sleep(self._client.random_delay())
+            call.rows = len(result.data) if isinstance(result.data, list) else 0
+        return result
+
+
+_clients = {}
+
+
+def get_async_supabase():
+    """Async client for the running event loop (created on first use)"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        if DB_BACKEND == 'sqlite':
+            client = AsyncLocalClient(get_local_client())
+        else:
+            if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+                raise ValueError("Supabase credentials not found! Set SUPABASE_URL and SUPABASE_ANON_KEY")
+            client = PooledAsyncPostgrest(
+                f"{SUPABASE_URL}/rest/v1",
+                headers={
+                    **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                    'apiKey': SUPABASE_ANON_KEY,
+                    'Authorization': f'Bearer {SUPABASE_ANON_KEY}'
+                },
+                timeout=POOL_TIMEOUT
+            )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_supabase():
+    """Close the running loop's client (ASGI shutdown)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,15 @@
+"""
+postgrest's APIError, resolved on first use
+
+Importing postgrest pulls in httpx, pydantic and both of its clients, so
+modules that only need to raise or catch APIError reach it through here:
+`errors.APIError` in an except clause is looked up only when an exception
+is actually being handled.
+"""
+
+
+def __getattr__(name):
+    if name == 'APIError':
+        from postgrest.exceptions import APIError
+        return APIError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
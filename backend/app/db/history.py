@@ -0,0 +1,206 @@
+"""
+Keyset-paginated quiz history
+
+Sessions are listed newest first, ordered by (created_at, id). A page ends
+with an opaque `next_cursor` encoding the last row's (created_at, id); the
+next page continues strictly after it, so pages stay stable while new
+sessions are created. The `answers` column is only selected on request.
+
+Paging is opt-in: a request with neither `limit` nor `cursor` gets the whole
+history as before (still fetched HISTORY_FETCH_SIZE rows at a time), with
+`next_cursor` null.
+"""
+import base64
+import json
+import logging
+import math
+import os
+
+from app.db.session_store import load_answers
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = 'id, mode, class_level, score, total_questions, current_question, is_completed, created_at, completed_at'
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 200))
+# Rows per database round trip while a page is streamed out
+HISTORY_FETCH_SIZE = int(os.getenv('HISTORY_FETCH_SIZE', 25))
+
+
+def encode_cursor(created_at, session_id) -> str:
+    raw = json.dumps([created_at, session_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor; ValueError if it wasn't made by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, session_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(session_id, str):
+        raise ValueError('Invalid cursor')
+    return created_at, session_id
+
+
+def parse_history_args(args):
+    """(limit, after, include_answers) from ?limit=&cursor=&include= ; ValueError on bad input
+
+    limit is None (the whole history) when neither limit nor cursor is given.
+    """
+    include = {part.strip() for part in args.get('include', '').split(',')}
+    if args.get('limit') is None and not args.get('cursor'):
+        return None, None, 'answers' in include
+
+    try:
+        limit = int(args.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    return min(limit, HISTORY_MAX_PAGE_SIZE), after, 'answers' in include
+
+
+def keyset_query(query, after, descending=True):
+    """Order by (created_at, id) and continue strictly after `after`"""
+    op, direction = ('lt', 'desc') if descending else ('gt', 'asc')
+    keyset = None
+    if after:
+        created_at, row_id = after
+        keyset = f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{row_id}")'
+
+    if hasattr(query, 'or_'):
+        # Builders with or_() and composable order() (the local stand-in)
+        if keyset:
+            query = query.or_(keyset)
+        return query.order('created_at', desc=descending).order('id', desc=descending)
+
+    # postgrest-py 0.10 has no or_() and sends one `order` param per order() call
+    if keyset:
+        query.params = query.params.add('or', f'({keyset})')
+    query.params = query.params.add('order', f'created_at.{direction},id.{direction}')
+    return query
+
+
+def _history_query(supabase, user_id, columns, size, after):
+    query = supabase.table('quiz_sessions')\
+        .select(columns)\
+        .eq('user_id', user_id)
+    return keyset_query(query, after).limit(size)
+
+
+def _batch_size(remaining):
+    """(rows wanted, rows to request) for the next round trip"""
+    size = min(HISTORY_FETCH_SIZE, remaining)
+    # One extra row on the last round trip tells us whether another page exists
+    return size, size + (1 if size == remaining else 0)
+
+
+def _row_json(row, include_answers):
+    if include_answers:
+        row['answers'] = load_answers(row.get('answers'))
+    return json.dumps(row)
+
+
+def _closing_chunk(last, more, remaining):
+    has_next = last is not None and more and remaining <= 0
+    next_cursor = encode_cursor(last['created_at'], last['id']) if has_next else None
+    return '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+
+
+def stream_history(supabase, user_id, limit=HISTORY_PAGE_SIZE, after=None, include_answers=False):
+    """JSON body chunks for one history page: {"success", "history", "next_cursor"}.
+
+    limit=None streams every remaining row (no next_cursor).
+
+    The first batch is fetched before this returns, so query errors reach the
+    caller; later batches are fetched while earlier rows are being sent.
+    """
+    columns = HISTORY_COLUMNS + (', answers' if include_answers else '')
+    limit = math.inf if limit is None else limit
+
+    def fetch(position, remaining):
+        size, requested = _batch_size(remaining)
+        rows = _history_query(supabase, user_id, columns, requested, position).execute().data
+        return rows[:size], len(rows) == requested
+
+    first_batch = fetch(after, limit)
+
+    def generate():
+        batch, more = first_batch
+        remaining = limit
+        last = None
+        separator = ''
+        yield '{"success": true, "history": ['
+        try:
+            while batch:
+                for row in batch:
+                    yield separator + _row_json(row, include_answers)
+                    separator = ', '
+                last = batch[-1]
+                remaining -= len(batch)
+                if not more or remaining <= 0:
+                    break
+                batch, more = fetch((last['created_at'], last['id']), remaining)
+        except Exception:
+            # Headers are already sent; the truncated body makes the client fail loudly
+            logger.exception('History stream failed')
+            return
+
+        yield _closing_chunk(last, more, remaining)
+
+    return generate()
+
+
+async def stream_history_async(supabase, user_id, limit=HISTORY_PAGE_SIZE, after=None, include_answers=False):
+    """stream_history() for async clients; returns an async iterator of body chunks"""
+    import asyncio  # only the ASGI app needs it; keeps it off the WSGI import path
+
+    columns = HISTORY_COLUMNS + (', answers' if include_answers else '')
+    limit = math.inf if limit is None else limit
+
+    async def fetch(position, remaining):
+        size, requested = _batch_size(remaining)
+        rows = (await _history_query(supabase, user_id, columns, requested, position).execute()).data
+        return rows[:size], len(rows) == requested
+
+    first_batch = await fetch(after, limit)
+
+    async def generate():
+        batch, more = first_batch
+        remaining = limit
+        last = None
+        separator = ''
+        next_fetch = None
+        yield '{"success": true, "history": ['
+        try:
+            while batch:
+                # Start the next round trip before sending this batch
+                next_fetch = None
+                if more and remaining - len(batch) > 0:
+                    last = batch[-1]
+                    next_fetch = asyncio.ensure_future(
+                        fetch((last['created_at'], last['id']), remaining - len(batch))
+                    )
+                for row in batch:
+                    yield separator + _row_json(row, include_answers)
+                    separator = ', '
+                last = batch[-1]
+                remaining -= len(batch)
+                if next_fetch is None:
+                    break
+                batch, more = await next_fetch
+        except Exception:
+            logger.exception('History stream failed')
+            return
+        finally:
+            if next_fetch is not None and not next_fetch.done():
+                next_fetch.cancel()
+
+        yield _closing_chunk(last, more, remaining)
+
+    return generate()
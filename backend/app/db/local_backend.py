@@ -0,0 +1,634 @@
+"""
+Local SQLite stand-in for the Supabase client
+
+Implements the subset of the supabase-py query builder the routes use
+(table().select().eq().order().insert().update().execute() with `.data`
+results, plus rpc()), backed by SQLite tables shaped like the hosted
+`users`, `quiz_sessions` and `answers` tables. Select it with
+DB_BACKEND=sqlite; LOCAL_DB_PATH picks the database file (default: an
+in-memory database shared by the whole process).
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.db import errors
+from app.metrics import track_db
+
+LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', ':memory:')
+# Optional random delay per call (0..N ms) to emulate a remote database
+LOCAL_DB_LATENCY_MS = float(os.getenv('LOCAL_DB_LATENCY_MS', 0))
+
+# Column -> type ('text', 'int', 'real', 'bool', 'json') per table
+TABLES = {
+    'users': {
+        'id': 'text', 'username': 'text', 'email': 'text', 'password_hash': 'text',
+        'auth_provider': 'text', 'google_id': 'text', 'fullname': 'text', 'phone': 'text',
+        'date_of_birth': 'text', 'gender': 'text', 'school_college': 'text', 'city': 'text',
+        'state': 'text', 'profile_completed': 'bool', 'created_at': 'text'
+    },
+    'quiz_sessions': {
+        'id': 'text', 'user_id': 'text', 'mode': 'text', 'class_level': 'text',
+        'total_questions': 'int', 'current_question': 'int', 'is_completed': 'bool',
+        'answers': 'json', 'score': 'real', 'version': 'int', 'created_at': 'text',
+        'completed_at': 'text', 'live_scores': 'json'
+    },
+    'answers': {
+        'id': 'text', 'session_id': 'text', 'user_id': 'text', 'question_id': 'text',
+        'answer': 'text', 'created_at': 'text'
+    },
+    'user_quiz_stats': {
+        'user_id': 'text', 'total_quizzes': 'int', 'completed_quizzes': 'int',
+        'score_sum': 'real', 'updated_at': 'text'
+    }
+}
+
+SCHEMA = """
+create table if not exists users (
+    id text primary key,
+    username text,
+    email text unique,
+    password_hash text,
+    auth_provider text,
+    google_id text,
+    fullname text,
+    phone text,
+    date_of_birth text,
+    gender text,
+    school_college text,
+    city text,
+    state text,
+    profile_completed integer default 0,
+    created_at text
+);
+
+create table if not exists quiz_sessions (
+    id text primary key,
+    user_id text,
+    mode text,
+    class_level text,
+    total_questions integer default 14,
+    current_question integer default 0,
+    is_completed integer default 0,
+    answers text,
+    score real default 0,
+    version integer not null default 0,
+    created_at text,
+    completed_at text,
+    live_scores text not null default '{}'
+);
+create index if not exists quiz_sessions_user_created on quiz_sessions (user_id, created_at, id);
+
+create table if not exists answers (
+    id text primary key,
+    session_id text,
+    user_id text,
+    question_id text,
+    answer text,
+    created_at text
+);
+create index if not exists answers_session on answers (session_id);
+
+-- Mirrors migrations/002_user_quiz_stats.sql
+create table if not exists user_quiz_stats (
+    user_id text primary key,
+    total_quizzes integer not null default 0,
+    completed_quizzes integer not null default 0,
+    score_sum real not null default 0,
+    updated_at text
+);
+
+create trigger if not exists quiz_sessions_stats_insert
+after insert on quiz_sessions when new.user_id is not null
+begin
+    insert into user_quiz_stats (user_id, total_quizzes, completed_quizzes, score_sum, updated_at)
+    values (new.user_id, 1, case when new.is_completed then 1 else 0 end,
+            case when new.is_completed then coalesce(new.score, 0) else 0 end, datetime('now'))
+    on conflict (user_id) do update
+       set total_quizzes = total_quizzes + excluded.total_quizzes,
+           completed_quizzes = completed_quizzes + excluded.completed_quizzes,
+           score_sum = score_sum + excluded.score_sum,
+           updated_at = excluded.updated_at;
+end;
+
+create trigger if not exists quiz_sessions_stats_update
+after update of user_id, is_completed, score on quiz_sessions
+begin
+    update user_quiz_stats
+       set total_quizzes = total_quizzes - 1,
+           completed_quizzes = completed_quizzes - case when old.is_completed then 1 else 0 end,
+           score_sum = score_sum - case when old.is_completed then coalesce(old.score, 0) else 0 end,
+           updated_at = datetime('now')
+     where user_id = old.user_id;
+    insert into user_quiz_stats (user_id, total_quizzes, completed_quizzes, score_sum, updated_at)
+    select new.user_id, 1, case when new.is_completed then 1 else 0 end,
+           case when new.is_completed then coalesce(new.score, 0) else 0 end, datetime('now')
+     where new.user_id is not null
+    on conflict (user_id) do update
+       set total_quizzes = total_quizzes + excluded.total_quizzes,
+           completed_quizzes = completed_quizzes + excluded.completed_quizzes,
+           score_sum = score_sum + excluded.score_sum,
+           updated_at = excluded.updated_at;
+end;
+
+create trigger if not exists quiz_sessions_stats_delete
+after delete on quiz_sessions when old.user_id is not null
+begin
+    update user_quiz_stats
+       set total_quizzes = total_quizzes - 1,
+           completed_quizzes = completed_quizzes - case when old.is_completed then 1 else 0 end,
+           score_sum = score_sum - case when old.is_completed then coalesce(old.score, 0) else 0 end,
+           updated_at = datetime('now')
+     where user_id = old.user_id;
+end;
+"""
+
+_OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+# Primary key per table when it isn't `id`
+PRIMARY_KEYS = {'user_quiz_stats': 'user_id'}
+
+
+def _now():
+    # Fixed width so text comparison of created_at matches time order
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _to_db(kind, value):
+    if value is None:
+        return None
+    if kind == 'bool':
+        return int(bool(value))
+    if kind == 'json' and not isinstance(value, str):
+        return json.dumps(value)
+    return value
+
+
+def _from_db(kind, value):
+    if kind == 'bool' and value is not None:
+        return bool(value)
+    return value
+
+
+class LocalClient:
+    """SQLite-backed replacement for supabase.Client"""
+
+    def __init__(self, path=LOCAL_DB_PATH, latency_ms=LOCAL_DB_LATENCY_MS):
+        self.path = path
+        self.latency = latency_ms / 1000.0
+        # One connection serialized by a lock: SQLite allows a single writer anyway
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        with self.lock:
+            if path != ':memory:':
+                self.conn.execute('pragma journal_mode=wal')
+            self.conn.executescript(SCHEMA)
+        self.functions = {
+            'merge_session_answers': _rpc_merge_session_answers,
+            'reconcile_user_quiz_stats': _rpc_reconcile_user_quiz_stats
+        }
+        self.auth = LocalAuth(self)
+
+    def random_delay(self) -> float:
+        """Seconds of emulated network latency for one leg of a call"""
+        return random.uniform(0, self.latency) if self.latency else 0.0
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.random_delay())
+
+    def table(self, table_name):
+        if table_name not in TABLES:
+            raise errors.APIError({'code': '42P01', 'message': f'relation "{table_name}" does not exist'})
+        return LocalQuery(self, table_name)
+
+    def from_(self, table_name):
+        return self.table(table_name)
+
+    def rpc(self, fn, params):
+        return LocalRpc(self, fn, params)
+
+    def transaction(self):
+        """Context manager running its block in an immediate (write-locked) transaction"""
+        return _Transaction(self)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class _Transaction:
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        self.client.lock.acquire()
+        self.client.conn.execute('begin immediate')
+        return self.client.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.client.conn.execute('rollback' if exc_type else 'commit')
+        finally:
+            self.client.lock.release()
+
+
+class LocalQuery:
+    """Chainable query mirroring postgrest's request builders"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.columns = TABLES[table]
+        self.op = 'select'
+        self.select_columns = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.ordering = []
+        self.row_limit = None
+        self.count_mode = None
+
+    # Operations
+
+    def select(self, *columns, count=None):
+        self.op = 'select'
+        names = ','.join(columns) if columns else '*'
+        self.select_columns = None if names.strip() == '*' else [c.strip() for c in names.split(',') if c.strip()]
+        self.count_mode = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self.op, self.payload = 'insert', json
+        return self
+
+    def upsert(self, json, on_conflict='', **kwargs):
+        self.op, self.payload = 'upsert', json
+        self.on_conflict = on_conflict or PRIMARY_KEYS.get(self.table, 'id')
+        return self
+
+    def update(self, json, **kwargs):
+        self.op, self.payload = 'update', json
+        return self
+
+    def delete(self, **kwargs):
+        self.op = 'delete'
+        return self
+
+    # Filters and modifiers
+
+    def _check(self, column):
+        if column not in self.columns:
+            raise errors.APIError({'code': '42703', 'message': f'column {self.table}.{column} does not exist'})
+
+    def _filter(self, column, op, value):
+        self._check(column)
+        self.filters.append((f'"{column}" {op} ?', [_to_db(self.columns[column], value)]))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, '=', value)
+
+    def neq(self, column, value):
+        return self._filter(column, '!=', value)
+
+    def gt(self, column, value):
+        return self._filter(column, '>', value)
+
+    def gte(self, column, value):
+        return self._filter(column, '>=', value)
+
+    def lt(self, column, value):
+        return self._filter(column, '<', value)
+
+    def lte(self, column, value):
+        return self._filter(column, '<=', value)
+
+    def in_(self, column, values):
+        self._check(column)
+        values = [_to_db(self.columns[column], v) for v in values]
+        self.filters.append((f'"{column}" in ({",".join("?" * len(values))})', values))
+        return self
+
+    def is_(self, column, value):
+        self._check(column)
+        if value is None or str(value).lower() == 'null':
+            self.filters.append((f'"{column}" is null', []))
+        else:
+            self.filters.append((f'"{column}" = ?', [int(str(value).lower() == 'true')]))
+        return self
+
+    def or_(self, filters):
+        """PostgREST logic tree, e.g. 'created_at.lt."t",and(created_at.eq."t",id.lt."x")'"""
+        self.filters.append(self._logic(filters, 'or'))
+        return self
+
+    def _logic(self, expr, joiner):
+        clauses, params = [], []
+        for term in _split_terms(expr):
+            group = re.fullmatch(r'(and|or)\((.*)\)', term, re.S)
+            if group:
+                sql, values = self._logic(group.group(2), group.group(1))
+            else:
+                column, op, value = term.split('.', 2)
+                self._check(column)
+                if len(value) >= 2 and value[0] == value[-1] == '"':
+                    value = value[1:-1]
+                if op == 'is' and value == 'null':
+                    sql, values = f'"{column}" is null', []
+                elif op == 'is':
+                    sql, values = f'"{column}" = ?', [int(value == 'true')]
+                elif op in _OPERATORS:
+                    kind = self.columns[column]
+                    if kind == 'bool':
+                        value = value == 'true'
+                    elif kind in ('int', 'real'):
+                        value = float(value) if kind == 'real' else int(value)
+                    sql, values = f'"{column}" {_OPERATORS[op]} ?', [_to_db(kind, value)]
+                else:
+                    raise errors.APIError({'code': 'PGRST100', 'message': f'Unsupported operator "{op}"'})
+            clauses.append(sql)
+            params.extend(values)
+        return '(' + f' {joiner} '.join(clauses) + ')', params
+
+    def order(self, column, *, desc=False, nullsfirst=False, foreign_table=None):
+        self._check(column)
+        self.ordering.append(f'"{column}" {"desc" if desc else "asc"}')
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        self.row_limit = int(size)
+        return self
+
+    # Execution
+
+    def _where(self):
+        if not self.filters:
+            return '', []
+        params = []
+        for _, p in self.filters:
+            params.extend(p)
+        return ' where ' + ' and '.join(sql for sql, _ in self.filters), params
+
+    def _decode(self, row):
+        names = self.select_columns or list(self.columns)
+        return {name: _from_db(self.columns[name], row[name]) for name in names}
+
+    def _prepare(self, record):
+        for column in record:
+            if column not in self.columns:
+                raise errors.APIError({
+                    'code': 'PGRST204',
+                    'message': f"Could not find the '{column}' column of '{self.table}' in the schema cache"
+                })
+        row = {c: _to_db(self.columns[c], v) for c, v in record.items()}
+        if 'id' in self.columns and not row.get('id'):
+            row['id'] = str(uuid.uuid4())
+        if 'created_at' in self.columns and not row.get('created_at'):
+            row['created_at'] = _now()
+        return row
+
+    def _select_rowids(self, conn, rowids):
+        marks = ','.join('?' * len(rowids))
+        cursor = conn.execute(f'select rowid, * from {self.table} where rowid in ({marks})', rowids)
+        by_rowid = {r['rowid']: r for r in cursor.fetchall()}
+        return [self._decode(by_rowid[i]) for i in rowids if i in by_rowid]
+
+    def execute(self):
+        with track_db(*self.target()) as call:
+            self.client.delay()
+            result = self.run()
+            self.client.delay()
+            call.rows = len(result.data or [])
+        return result
+
+    def target(self):
+        """(table, operation) labels for metrics"""
+        return self.table, self.op
+
+    def run(self):
+        """Execute without the emulated latency"""
+        client = self.client
+        for column in self.select_columns or []:
+            self._check(column)
+        try:
+            with client.transaction() as conn:
+                count = None
+                if self.op == 'select':
+                    where, params = self._where()
+                    sql = f'select * from {self.table}{where}'
+                    if self.ordering:
+                        sql += ' order by ' + ', '.join(self.ordering)
+                    if self.row_limit is not None:
+                        sql += f' limit {self.row_limit}'
+                    data = [self._decode(r) for r in conn.execute(sql, params).fetchall()]
+                    if self.count_mode:
+                        count = conn.execute(f'select count(*) from {self.table}{where}', params).fetchone()[0]
+
+                elif self.op in ('insert', 'upsert'):
+                    records = self.payload if isinstance(self.payload, list) else [self.payload]
+                    rowids = []
+                    for record in records:
+                        row = self._prepare(record)
+                        cols = ', '.join(f'"{c}"' for c in row)
+                        sql = f'insert into {self.table} ({cols}) values ({",".join("?" * len(row))})'
+                        if self.op == 'upsert':
+                            updates = ', '.join(f'"{c}" = excluded."{c}"' for c in record if c != self.on_conflict)
+                            sql += f' on conflict ("{self.on_conflict}") do ' + (f'update set {updates}' if updates else 'nothing')
+                        cursor = conn.execute(sql, list(row.values()))
+                        if self.op == 'upsert':
+                            cursor = conn.execute(
+                                f'select rowid from {self.table} where "{self.on_conflict}" = ?', [row[self.on_conflict]]
+                            )
+                            rowids.append(cursor.fetchone()[0])
+                        else:
+                            rowids.append(cursor.lastrowid)
+                    data = self._select_rowids(conn, rowids)
+
+                elif self.op == 'update':
+                    where, params = self._where()
+                    rowids = [r[0] for r in conn.execute(f'select rowid from {self.table}{where}', params).fetchall()]
+                    if rowids:
+                        values = self._prepare_update(self.payload)
+                        sets = ', '.join(f'"{c}" = ?' for c in values)
+                        marks = ','.join('?' * len(rowids))
+                        conn.execute(f'update {self.table} set {sets} where rowid in ({marks})', list(values.values()) + rowids)
+                    data = self._select_rowids(conn, rowids) if rowids else []
+
+                else:  # delete
+                    where, params = self._where()
+                    data = [self._decode(r) for r in conn.execute(f'select * from {self.table}{where}', params).fetchall()]
+                    conn.execute(f'delete from {self.table}{where}', params)
+        except sqlite3.IntegrityError as e:
+            raise errors.APIError({'code': '23505', 'message': str(e)})
+        return SimpleNamespace(data=data, count=count)
+
+    def _prepare_update(self, values):
+        for column in values:
+            if column not in self.columns:
+                raise errors.APIError({
+                    'code': 'PGRST204',
+                    'message': f"Could not find the '{column}' column of '{self.table}' in the schema cache"
+                })
+        return {c: _to_db(self.columns[c], v) for c, v in values.items()}
+
+
+def _split_terms(expr):
+    """Split a logic tree on top-level commas (outside parentheses and quotes)"""
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(expr):
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            terms.append(expr[start:i].strip())
+            start = i + 1
+    terms.append(expr[start:].strip())
+    return [t for t in terms if t]
+
+
+class LocalRpc:
+    def __init__(self, client, fn, params):
+        self.client = client
+        self.fn = fn
+        self.params = params or {}
+
+    def execute(self):
+        with track_db(*self.target()) as call:
+            self.client.delay()
+            result = self.run()
+            self.client.delay()
+            call.rows = len(result.data) if isinstance(result.data, list) else 0
+        return result
+
+    def target(self):
+        """(table, operation) labels for metrics"""
+        return self.fn, 'rpc'
+
+    def run(self):
+        function = self.client.functions.get(self.fn)
+        if function is None:
+            raise errors.APIError({'code': 'PGRST202', 'message': f'Could not find the function public.{self.fn}'})
+        with self.client.transaction() as conn:
+            data = function(conn, **self.params)
+        return SimpleNamespace(data=data, count=None)
+
+
+def _rpc_merge_session_answers(conn, p_session_id, p_patch, p_current_question=None, p_expected_version=None,
+                               p_scores=None):
+    """Same contract as migrations/003_live_scores.sql"""
+    row = conn.execute(
+        'select answers, live_scores, current_question, version from quiz_sessions where id = ?', [p_session_id]
+    ).fetchone()
+    if row is None:
+        return []
+    if p_expected_version is not None and row['version'] != p_expected_version:
+        return [{'new_version': row['version'], 'conflict': True}]
+
+    answers = json.loads(row['answers']) if row['answers'] else {}
+    if not isinstance(answers, dict):
+        answers = {}
+    answers.update(p_patch or {})
+    live_scores = json.loads(row['live_scores']) if row['live_scores'] else {}
+    live_scores.update(p_scores or {})
+    version = row['version'] + 1
+    conn.execute(
+        'update quiz_sessions set answers = ?, live_scores = ?, current_question = ?, version = ? where id = ?',
+        [json.dumps(answers), json.dumps(live_scores), max(row['current_question'] or 0, p_current_question or 0),
+         version, p_session_id]
+    )
+    return [{'new_version': version, 'conflict': False}]
+
+
+def _rpc_reconcile_user_quiz_stats(conn, p_user_id=None):
+    """Same contract as reconcile_user_quiz_stats() in migrations/002_user_quiz_stats.sql"""
+    scope, params = ('and user_id = ?', [p_user_id]) if p_user_id is not None else ('', [])
+    actual = {
+        row['user_id']: (row['total_quizzes'], row['completed_quizzes'], row['score_sum'])
+        for row in conn.execute(f"""
+            select user_id, count(*) as total_quizzes,
+                   sum(case when is_completed then 1 else 0 end) as completed_quizzes,
+                   coalesce(sum(case when is_completed then score end), 0) as score_sum
+              from quiz_sessions where user_id is not null {scope}
+             group by user_id
+        """, params)
+    }
+    stored = {
+        row['user_id']: (row['total_quizzes'], row['completed_quizzes'], row['score_sum'])
+        for row in conn.execute(f'select * from user_quiz_stats where 1 = 1 {scope}', params)
+    }
+
+    changed = 0
+    for user_id, counters in actual.items():
+        if stored.get(user_id) != counters:
+            conn.execute(
+                """insert into user_quiz_stats (user_id, total_quizzes, completed_quizzes, score_sum, updated_at)
+                   values (?, ?, ?, ?, datetime('now'))
+                   on conflict (user_id) do update
+                      set total_quizzes = excluded.total_quizzes,
+                          completed_quizzes = excluded.completed_quizzes,
+                          score_sum = excluded.score_sum,
+                          updated_at = excluded.updated_at""",
+                [user_id, *counters]
+            )
+            changed += 1
+    for user_id in stored.keys() - actual.keys():
+        conn.execute('delete from user_quiz_stats where user_id = ?', [user_id])
+        changed += 1
+    return changed
+
+
+class LocalAuth:
+    """Enough of supabase.auth for the email and Google flows to run offline"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def _user(self, email, metadata=None, user_id=None):
+        return SimpleNamespace(id=user_id or str(uuid.uuid4()), email=email, user_metadata=metadata or {})
+
+    def sign_up(self, credentials):
+        metadata = credentials.get('options', {}).get('data', {})
+        return SimpleNamespace(user=self._user(credentials['email'], metadata), session=None)
+
+    def sign_in_with_password(self, credentials):
+        rows = self.client.table('users').select('id').eq('email', credentials['email']).execute().data
+        user = self._user(credentials['email'], user_id=rows[0]['id']) if rows else None
+        token = SimpleNamespace(access_token='local-access-token', refresh_token='local-refresh-token')
+        return SimpleNamespace(user=user, session=token if user else None)
+
+    def sign_in_with_oauth(self, credentials):
+        return SimpleNamespace(provider=credentials.get('provider'), url='http://localhost/auth/local-oauth')
+
+    def get_user(self, jwt=None):
+        return SimpleNamespace(user=None)
+
+    def sign_out(self):
+        return None
+
+
+_local_client = None
+_local_lock = threading.Lock()
+
+
+def get_local_client() -> LocalClient:
+    """Process-wide local client (one SQLite database per process)"""
+    global _local_client
+    if _local_client is None:
+        with _local_lock:
+            if _local_client is None:
+                _local_client = LocalClient()
+    return _local_client
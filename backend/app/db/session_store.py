@@ -0,0 +1,191 @@
+import json
+import logging
+import random
+import time
+
+from app.db import errors
+from app.services import answer_codec
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-swap attempts (with jittered backoff) when the RPC isn't deployed
+CAS_MAX_ATTEMPTS = 10
+CAS_BACKOFF = 0.005
+
+# PostgREST/Postgres codes for "function does not exist"
+_MISSING_FUNCTION_CODES = {'PGRST202', '42883'}
+_rpc_available = True
+
+
+class VersionConflict(Exception):
+    """The session changed since the version the caller expected"""
+
+    def __init__(self, current_version):
+        super().__init__(f"Session is at version {current_version}")
+        self.current_version = current_version
+
+
+def _load_object(data):
+    """A JSON object column as a dict (from JSON text or already decoded)"""
+    if isinstance(data, str):
+        data = json.loads(data) if data else {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_answers(answers_data):
+    """Parse a session's answers column into {question_id: answer}"""
+    return answer_codec.decode(_load_object(answers_data))
+
+
+def dump_answers(answers):
+    """{question_id: answer} as the answers column stores it (app/services/answer_codec.py)"""
+    return answer_codec.dumps(answers)
+
+
+def load_live_scores(live_data):
+    """Parse a session's live_scores column ({question_id: contribution})"""
+    return _load_object(live_data)
+
+
+def _rpc_params(session_id, patch, current_question, expected_version, scores):
+    params = {
+        'p_session_id': session_id,
+        'p_patch': answer_codec.encode(patch),
+        'p_current_question': current_question,
+        'p_expected_version': expected_version
+    }
+    # Only sent when there is something to merge, so saves that don't touch
+    # the scores also work against the pre-003 function
+    if scores:
+        params['p_scores'] = scores
+    return params
+
+
+def _rpc_version(response):
+    if not response.data:
+        return None
+    row = response.data[0]
+    if row['conflict']:
+        raise VersionConflict(row['new_version'])
+    return row['new_version']
+
+
+def _rpc_missing(e):
+    """True (and stop using the RPC) if the function isn't deployed"""
+    global _rpc_available
+    if e.code not in _MISSING_FUNCTION_CODES:
+        return False
+    logger.warning('merge_session_answers RPC not found, falling back to compare-and-swap')
+    _rpc_available = False
+    return True
+
+
+def _cas_update(session, patch, current_question, scores):
+    """Merged column values for a CAS write of `session` (one read of it)"""
+    answers = load_answers(session.get('answers'))
+    answers.update(patch)
+    update_data = {
+        'answers': dump_answers(answers),
+        'version': (session.get('version') or 0) + 1
+    }
+    if scores:
+        live_scores = load_live_scores(session.get('live_scores'))
+        live_scores.update(scores)
+        update_data['live_scores'] = live_scores
+    if current_question is not None:
+        update_data['current_question'] = max(session.get('current_question') or 0, current_question)
+    return update_data
+
+
+def merge_session_answers(supabase, session_id, patch, current_question=None, expected_version=None,
+                          scores=None):
+    """Merge {question_id: answer} into a session's answers in one round trip.
+
+    `scores` ({question_id: contribution}) is merged into live_scores the
+    same way. Returns the session's new version, or None if the session doesn't exist.
+    Raises VersionConflict if expected_version is given and stale.
+    """
+    if _rpc_available:
+        try:
+            response = supabase.rpc(
+                'merge_session_answers', _rpc_params(session_id, patch, current_question, expected_version, scores)
+            ).execute()
+        except errors.APIError as e:
+            if not _rpc_missing(e):
+                raise
+        else:
+            return _rpc_version(response)
+
+    return _merge_with_cas(supabase, session_id, patch, current_question, expected_version, scores)
+
+
+def _merge_with_cas(supabase, session_id, patch, current_question, expected_version, scores):
+    """Read-modify-write guarded by the version column (two round trips)"""
+    version = expected_version
+    for attempt in range(CAS_MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, CAS_BACKOFF * attempt))
+        response = supabase.table('quiz_sessions')\
+            .select('answers, live_scores, current_question, version')\
+            .eq('id', session_id)\
+            .execute()
+        if not response.data:
+            return None
+
+        session = response.data[0]
+        version = session.get('version') or 0
+        if expected_version is not None and version != expected_version:
+            raise VersionConflict(version)
+
+        updated = supabase.table('quiz_sessions')\
+            .update(_cas_update(session, patch, current_question, scores))\
+            .eq('id', session_id)\
+            .eq('version', version)\
+            .execute()
+        if updated.data:
+            return version + 1
+
+    raise VersionConflict(version)
+
+
+async def merge_session_answers_async(supabase, session_id, patch, current_question=None, expected_version=None,
+                                      scores=None):
+    """merge_session_answers() for async clients (see app/db/async_client.py)"""
+    import asyncio  # only the ASGI app needs it; keeps it off the WSGI import path
+
+    if _rpc_available:
+        try:
+            response = await supabase.rpc(
+                'merge_session_answers', _rpc_params(session_id, patch, current_question, expected_version, scores)
+            ).execute()
+        except errors.APIError as e:
+            if not _rpc_missing(e):
+                raise
+        else:
+            return _rpc_version(response)
+
+    version = expected_version
+    for attempt in range(CAS_MAX_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(random.uniform(0, CAS_BACKOFF * attempt))
+        response = await supabase.table('quiz_sessions')\
+            .select('answers, live_scores, current_question, version')\
+            .eq('id', session_id)\
+            .execute()
+        if not response.data:
+            return None
+
+        session = response.data[0]
+        version = session.get('version') or 0
+        if expected_version is not None and version != expected_version:
+            raise VersionConflict(version)
+
+        updated = await supabase.table('quiz_sessions')\
+            .update(_cas_update(session, patch, current_question, scores))\
+            .eq('id', session_id)\
+            .eq('version', version)\
+            .execute()
+        if updated.data:
+            return version + 1
+
+    raise VersionConflict(version)
@@ -1,8 +1,14 @@
-from supabase import create_client, Client
+import atexit
+import logging
 import os
+import threading
+import weakref
 from dotenv import load_dotenv
 from pathlib import Path
 
+from app.db.local_backend import get_local_client
+from app.metrics import mark_request, record_response
+
 # Load environment variables from .env file
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -11,33 +17,193 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 
-# Debug: Print to verify (remove in production)
-print(f"Supabase URL loaded: {SUPABASE_URL is not None}")
-print(f"Anon Key loaded: {SUPABASE_ANON_KEY is not None}")
-
-# Check if environment variables are loaded
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    raise ValueError(
-        "Supabase credentials not found! Make sure:\n"
-        "1. backend/.env file exists\n"
-        "2. SUPABASE_URL is set\n"
-        "3. SUPABASE_ANON_KEY is set"
-    )
-
-# Create Supabase clients
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-    supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY) if SUPABASE_SERVICE_KEY else None
-except Exception as e:
-    print(f"Error creating Supabase client: {e}")
-    raise
+# 'supabase' (hosted, default) or 'sqlite' (local stand-in, see local_backend.py)
+DB_BACKEND = os.getenv('DB_BACKEND', 'supabase').lower()
+
+# Connection pool settings (per pool: one for the anon key, one for the service key)
+POOL_MAX_CONNECTIONS = int(os.getenv('SUPABASE_POOL_MAX_CONNECTIONS', 20))
+POOL_MAX_KEEPALIVE = int(os.getenv('SUPABASE_POOL_MAX_KEEPALIVE', 10))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_POOL_KEEPALIVE_EXPIRY', 60))
+POOL_TIMEOUT = float(os.getenv('SUPABASE_HTTP_TIMEOUT', 30))
+
+logger = logging.getLogger(__name__)
+logger.debug('Supabase URL loaded: %s, anon key loaded: %s', SUPABASE_URL is not None, SUPABASE_ANON_KEY is not None)
+
+
+class PooledClient:
+    """Supabase client facade backed by a SupabasePool.
+
+    Table and RPC calls share one thread-safe PostgREST session; `auth`
+    returns the calling thread's own GoTrue client, since auth calls keep
+    per-client session state.
+    """
+
+    def __init__(self, pool, client):
+        self._pool = pool
+        self._client = client
+
+    def table(self, table_name):
+        return self._client.table(table_name)
+
+    def from_(self, table_name):
+        return self._client.from_(table_name)
+
+    def rpc(self, fn, params):
+        return self._client.rpc(fn, params)
+
+    @property
+    def auth(self):
+        return self._pool.auth_client()
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class SupabasePool:
+    """Keep-alive connection pool shared by every Supabase call.
+
+    PostgREST and GoTrue requests from all threads go through one pooled
+    httpx transport, so connections and TLS sessions are reused instead of
+    being set up per request.
+    """
+
+    def __init__(self, name, url, key):
+        # Imported here: the supabase stack is the slowest part of a cold import
+        import httpx
+        from supabase import create_client
+
+        self.name = name
+        self.url = url
+        self.key = key
+        self.limits = httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+        )
+        self._transport = httpx.HTTPTransport(limits=self.limits, retries=1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._streams = weakref.WeakSet()
+        self.auth_clients = 0
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+        client = create_client(url, key)
+        # Swap the client's own HTTP sessions for ones on the shared transport
+        rest = client.postgrest.session
+        client.postgrest.session = self._session(rest.base_url, rest.headers, rest.timeout)
+        rest.close()
+        client.auth.close()
+        self._auth_url = client.auth_url
+        self._auth_headers = dict(client.auth._headers)
+        self.client = PooledClient(self, client)
+
+    def _on_response(self, response):
+        stream = response.extensions.get('network_stream')
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            if stream in self._streams:
+                self.connections_reused += 1
+            else:
+                self._streams.add(stream)
+                self.connections_opened += 1
+
+    def _session(self, base_url='', headers=None, timeout=POOL_TIMEOUT):
+        from postgrest.utils import SyncClient
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=self._transport,
+            event_hooks={'request': [mark_request], 'response': [self._on_response, record_response]}
+        )
+
+    def auth_client(self):
+        """GoTrue client for the calling thread, created on first use"""
+        auth = getattr(self._local, 'auth', None)
+        if auth is None:
+            from gotrue import SyncMemoryStorage
+            from supabase.lib.auth_client import SupabaseAuthClient
+            auth = SupabaseAuthClient(
+                url=self._auth_url,
+                headers=self._auth_headers,
+                storage=SyncMemoryStorage(),
+                http_client=self._session()
+            )
+            self._local.auth = auth
+            with self._lock:
+                self.auth_clients += 1
+        return auth
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'auth_clients': self.auth_clients,
+                'requests': self.requests,
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'max_connections': self.limits.max_connections,
+                'max_keepalive_connections': self.limits.max_keepalive_connections,
+                'keepalive_expiry': self.limits.keepalive_expiry
+            }
+
+    def close(self):
+        self._transport.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name, key) -> SupabasePool:
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = SupabasePool(name, SUPABASE_URL, key)
+                _pools[name] = pool
+    return pool
+
 
 def get_supabase():
     """Get Supabase client for normal operations"""
-    return supabase
+    if DB_BACKEND == 'sqlite':
+        return get_local_client()
+    # Check if environment variables are loaded
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise ValueError(
+            "Supabase credentials not found! Make sure:\n"
+            "1. backend/.env file exists\n"
+            "2. SUPABASE_URL is set\n"
+            "3. SUPABASE_ANON_KEY is set"
+        )
+    return _get_pool('anon', SUPABASE_ANON_KEY).client
+
 
 def get_supabase_admin():
     """Get Supabase admin client for privileged operations"""
-    if not supabase_admin:
+    if DB_BACKEND == 'sqlite':
+        return get_local_client()
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
         raise ValueError("Service key not configured")
-    return supabase_admin
+    return _get_pool('admin', SUPABASE_SERVICE_KEY).client
+
+
+def pool_stats() -> dict:
+    """Connection reuse statistics per pool"""
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+
+def close_pools():
+    """Close every pooled connection (called at interpreter exit)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_pools)
@@ -0,0 +1,80 @@
+import logging
+
+from app.db import errors
+
+logger = logging.getLogger(__name__)
+
+# PostgREST/Postgres codes for "relation does not exist"
+_MISSING_TABLE_CODES = {'42P01', 'PGRST205'}
+_table_available = True
+
+
+def summarize(total, completed, score_sum) -> dict:
+    """Dashboard stats payload from raw counters"""
+    return {
+        'total_quizzes': total,
+        'completed_quizzes': completed,
+        'incomplete_quizzes': total - completed,
+        'average_score': round(score_sum / completed, 2) if completed else 0
+    }
+
+
+def get_user_quiz_stats(supabase, user_id) -> dict:
+    """A user's quiz counters from user_quiz_stats (one row read).
+
+    Falls back to counting quiz_sessions if migration 002 isn't applied.
+    """
+    if _table_available:
+        try:
+            return _from_stats_row(_stats_query(supabase, user_id).execute())
+        except errors.APIError as e:
+            if not _table_missing(e):
+                raise
+    return _from_sessions(_sessions_query(supabase, user_id).execute())
+
+
+def _stats_query(supabase, user_id):
+    return supabase.table('user_quiz_stats')\
+        .select('total_quizzes, completed_quizzes, score_sum')\
+        .eq('user_id', user_id)
+
+
+def _sessions_query(supabase, user_id):
+    return supabase.table('quiz_sessions')\
+        .select('is_completed, score')\
+        .eq('user_id', user_id)
+
+
+def _from_stats_row(response):
+    row = response.data[0] if response.data else {}
+    return summarize(
+        row.get('total_quizzes') or 0,
+        row.get('completed_quizzes') or 0,
+        row.get('score_sum') or 0
+    )
+
+
+def _from_sessions(response):
+    completed = [s for s in response.data if s['is_completed']]
+    return summarize(len(response.data), len(completed), sum(s.get('score') or 0 for s in completed))
+
+
+def _table_missing(e):
+    """True (and stop reading the table) if migration 002 isn't applied"""
+    global _table_available
+    if e.code not in _MISSING_TABLE_CODES:
+        return False
+    logger.warning('user_quiz_stats table not found, counting quiz sessions instead')
+    _table_available = False
+    return True
+
+
+async def get_user_quiz_stats_async(supabase, user_id) -> dict:
+    """get_user_quiz_stats() for async clients"""
+    if _table_available:
+        try:
+            return _from_stats_row(await _stats_query(supabase, user_id).execute())
+        except errors.APIError as e:
+            if not _table_missing(e):
+                raise
+    return _from_sessions(await _sessions_query(supabase, user_id).execute())
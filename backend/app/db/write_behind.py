@@ -0,0 +1,311 @@
+"""
+Write-behind buffer for quiz answer saves
+
+Saves are acknowledged once they are appended to a local append-only log
+(WAL). A background thread flushes them to Supabase every
+WRITE_BEHIND_FLUSH_MS or WRITE_BEHIND_FLUSH_RECORDS records: one bulk
+insert into `answers`, plus one merge per session into `quiz_sessions`.
+On restart, records still in the log are replayed. Only /quiz/save-answer
+is buffered; /quiz/save-progress stores answers as a list and always writes
+directly. Routes that read or complete a session call flush_session() first,
+so they see its buffered saves.
+
+Pending saves live in one process's memory, and another worker can't see
+them. Write-behind therefore needs a single server process (use threads
+for concurrency: `gunicorn -w 1 --threads 16`, or one uvicorn worker).
+This is enforced: the buffer takes an exclusive lock on <WAL>.lock, so a
+second process with WRITE_BEHIND on fails at startup. A buffer created
+before a fork (gunicorn --preload) refuses to run in the child.
+
+Flushed records are not rewritten out of the log on every flush. The log
+is truncated when nothing is pending. Otherwise a small "done" line is
+appended, and the log is compacted only once it grows well past the
+pending records.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from app.db.session_store import merge_session_answers
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+WAL_PATH = os.getenv('WRITE_BEHIND_WAL', str(DATA_DIR / 'write_behind.wal'))
+FLUSH_INTERVAL_MS = int(os.getenv('WRITE_BEHIND_FLUSH_MS', 200))
+FLUSH_MAX_RECORDS = int(os.getenv('WRITE_BEHIND_FLUSH_RECORDS', 500))
+WAL_FSYNC = os.getenv('WRITE_BEHIND_FSYNC', '').lower() in ('1', 'true', 'yes')
+# Log lines tolerated before flushed records are rewritten out of it
+COMPACT_MIN_LINES = 1000
+
+
+def _lock_exclusive(handle):
+    """Non-blocking exclusive lock on an open file; False if another process holds it"""
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class WriteBehindBuffer:
+    """Append-only log of pending answer writes with a batching flusher"""
+
+    def __init__(self, path, get_client, flush_interval_ms=FLUSH_INTERVAL_MS,
+                 flush_max_records=FLUSH_MAX_RECORDS, fsync=WAL_FSYNC):
+        self.path = Path(path)
+        self.get_client = get_client
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_max_records = flush_max_records
+        self.fsync = fsync
+
+        self._pending = []              # records not yet flushed, in append order
+        self._seq = 0
+        self._lock = threading.Lock()   # guards _pending and the WAL file
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._wal = None
+        self._owner_lock = None
+        self._log_lines = 0             # lines in the WAL, pending or not
+        self.pid = None
+
+        self.appended = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    # Log handling
+
+    def _replay(self):
+        """Load records left in the log by a previous run"""
+        if not self.path.exists():
+            return
+        done = set()
+        with open(self.path, encoding='utf-8') as wal:
+            for line in wal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash; everything before it is intact
+                    break
+                if 'done' in record:
+                    done.update(record['done'])
+                    continue
+                self._pending.append(record)
+                self._seq = max(self._seq, record['seq'])
+        self._pending = [r for r in self._pending if r['seq'] not in done]
+        if self._pending:
+            logger.info('Replaying buffered answer writes', extra={'records': len(self._pending), 'path': self.path})
+
+    def _write(self, record):
+        self._wal.write(json.dumps(record) + '\n')
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._log_lines += 1
+
+    def _compact(self):
+        """Rewrite the log with only the records that are still pending"""
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as tmp:
+            for record in self._pending:
+                tmp.write(json.dumps(record) + '\n')
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        self._wal.close()
+        os.replace(tmp_path, self.path)
+        self._wal = open(self.path, 'a', encoding='utf-8')
+        self._log_lines = len(self._pending)
+
+    def _retire(self, flushed):
+        """Drop flushed records from the log as cheaply as possible"""
+        if not self._pending:
+            # The common case: the flusher caught up, so nothing in the log is needed
+            self._wal.truncate(0)
+            if self.fsync:
+                os.fsync(self._wal.fileno())
+            self._log_lines = 0
+        elif self._log_lines > max(COMPACT_MIN_LINES, 2 * len(self._pending)):
+            self._compact()
+        elif flushed:
+            self._write({'done': flushed})
+
+    def _acquire_owner_lock(self):
+        lock_path = self.path.with_suffix(self.path.suffix + '.lock')
+        handle = open(lock_path, 'a+')
+        if not _lock_exclusive(handle):
+            handle.close()
+            raise RuntimeError(
+                f'WRITE_BEHIND needs a single server process, but {lock_path} is locked by another one. '
+                'Run one worker (with threads) or turn WRITE_BEHIND off.'
+            )
+        self._owner_lock = handle
+
+    # Public API
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._acquire_owner_lock()
+        self.pid = os.getpid()
+        with self._lock:
+            self._replay()
+            # Rewrite the log so a torn last line can't swallow new appends
+            self._wal = open(self.path, 'a', encoding='utf-8')
+            self._compact()
+        self._thread = threading.Thread(target=self._run, name='write-behind-flusher', daemon=True)
+        self._thread.start()
+        return self
+
+    def append(self, session_id, patch, current_question=None, answer_row=None, scores=None):
+        """Durably log a write; it reaches Supabase on the next flush"""
+        with self._lock:
+            self._seq += 1
+            record = {
+                'seq': self._seq,
+                'session_id': session_id,
+                'patch': patch,
+                'current_question': current_question,
+                'row': answer_row,
+                'scores': scores
+            }
+            self._write(record)
+            self._pending.append(record)
+            self.appended += 1
+            pending = len(self._pending)
+        if pending >= self.flush_max_records:
+            self._wake.set()
+
+    def pending(self, session_id=None):
+        with self._lock:
+            if session_id is None:
+                return len(self._pending)
+            return sum(1 for r in self._pending if r['session_id'] == session_id)
+
+    def flush(self, session_id=None):
+        """Write pending records (all, or one session's) to Supabase now"""
+        with self._flush_lock:
+            with self._lock:
+                batch = [r for r in self._pending if session_id is None or r['session_id'] == session_id]
+            if not batch:
+                return 0
+            try:
+                self._flush_batch(batch)
+            except Exception:
+                self.flush_errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self._pending = [r for r in self._pending if not r.get('_done')]
+                    self._retire([r['seq'] for r in batch if r.get('_done')])
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _flush_batch(self, batch):
+        client = self.get_client()
+
+        # One bulk insert for the answers table
+        rows = [r for r in batch if r.get('row') and not r.get('row_done')]
+        if rows:
+            client.table('answers').insert([r['row'] for r in rows]).execute()
+            for r in rows:
+                r['row_done'] = True
+
+        # One merge per session, later answers winning
+        by_session = {}
+        for r in batch:
+            by_session.setdefault(r['session_id'], []).append(r)
+        for sid, records in by_session.items():
+            patch, scores = {}, {}
+            current_question = None
+            for r in records:
+                patch.update(r['patch'] or {})
+                # .get(): records logged before live scores have no 'scores'
+                scores.update(r.get('scores') or {})
+                if r['current_question'] is not None:
+                    current_question = max(current_question or 0, r['current_question'])
+            if patch or current_question is not None:
+                merge_session_answers(client, sid, patch, current_question, scores=scores)
+            for r in records:
+                r['_done'] = True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self.pending():
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Write-behind flush failed (will retry)')
+
+    def stop(self):
+        """Stop the flusher after a final flush"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Final write-behind flush failed', extra={'records': self.pending(), 'path': self.path})
+        with self._lock:
+            if self._wal:
+                self._wal.close()
+                self._wal = None
+        if self._owner_lock:
+            self._owner_lock.close()
+            self._owner_lock = None
+
+    def stats(self) -> dict:
+        return {
+            'pending': self.pending(),
+            'appended': self.appended,
+            'flushed': self.flushed,
+            'flush_errors': self.flush_errors
+        }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_behind():
+    """The process's write-behind buffer, or None when WRITE_BEHIND is off"""
+    global _buffer
+    if not WRITE_BEHIND_ENABLED:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                from app.db.supabase_client import get_supabase
+                _buffer = WriteBehindBuffer(WAL_PATH, get_supabase).start()
+                atexit.register(_buffer.stop)
+    if _buffer.pid != os.getpid():
+        # Forked after start(): no flusher thread here, and the parent owns the log
+        raise RuntimeError('The write-behind buffer was started before the server forked (gunicorn --preload?); '
+                           'WRITE_BEHIND needs a single, non-preloaded worker process')
+    return _buffer
+
+
+def flush_session(session_id):
+    """Write a session's buffered saves now, before it is read or completed (no-op without write-behind)"""
+    buffer = get_write_behind()
+    if buffer and session_id and buffer.pending(session_id):
+        return buffer.flush(session_id)
+    return 0
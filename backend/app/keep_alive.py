@@ -11,7 +11,7 @@ import time
 def keep_alive():
     """Ping API every 14 minutes to prevent spin down"""
     # Get the API URL from environment variable
-    api_url = os.getenv('RENDER_EXTERNAL_URL', 'http://localhost:5050') + '/api/test'
+    api_url = os.getenv('RENDER_EXTERNAL_URL', 'http://localhost:5050') + '/ready'
     
     print(f"✅ Keep-alive service started for: {api_url}")
     
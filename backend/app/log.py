@@ -0,0 +1,248 @@
+"""
+Structured, non-blocking logging
+
+Everything under the `app` logger goes through a bounded in-memory queue.
+A listener thread formats the records (JSON lines by default) and writes
+them to stdout, so a request thread only pays for building the record. If
+the queue is full, records are dropped and counted rather than blocking.
+
+Each request gets one access line (route, method, status, latency_ms) plus
+any fields the view bound with bind(), e.g. session_id and question_index.
+Those fields are also added to every other record logged during the request.
+
+Per-route level and sampling come from LOG_ROUTES:
+
+    LOG_ROUTES="/api/quiz/save-answer=INFO:0.05,/api/auth/login=WARNING"
+
+Here save-answer logs 5% of its requests (the decision is made once per
+request, so a sampled request keeps all its lines) and login logs only
+warnings and errors. Warnings and errors are never sampled out.
+
+    LOG_LEVEL   INFO          level for routes not in LOG_ROUTES
+    LOG_FORMAT  json | text
+    LOG_QUEUE   10000         records buffered before dropping
+    LOG_LEAN_RECORDS  0       1 stops the stdlib collecting caller, thread and
+                              process info on every record. The formatters
+                              don't use them, but the switch is process-wide
+                              (logging._srcfile and logThreads etc.), so it
+                              also affects every other library's records
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.metrics import LOG_DROPPED
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_QUEUE = int(os.getenv('LOG_QUEUE', 10000))
+LOG_ROUTES = os.getenv('LOG_ROUTES', '')
+LOG_LEAN_RECORDS = os.getenv('LOG_LEAN_RECORDS', '0') == '1'
+DEFAULT_LEVEL = logging.getLevelName(LOG_LEVEL)
+
+logger = logging.getLogger('app')
+access_logger = logging.getLogger('app.access')
+
+# Attributes every LogRecord has; anything else was passed as a field
+_RECORD_ATTRS = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime', 'taskName'}
+
+# The current request: {'route', 'level', 'sampled', 'fields'}
+_request = contextvars.ContextVar('log_request', default=None)
+
+
+def parse_routes(spec):
+    """{route: (levelno, sample_rate)} from "route=LEVEL[:rate],..." """
+    routes = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, setting = item.rpartition('=')
+        level, _, rate = setting.partition(':')
+        levelno = logging.getLevelName(level.strip().upper())
+        if not route or not isinstance(levelno, int):
+            raise ValueError(f'Invalid LOG_ROUTES entry: {item}')
+        routes[route.strip()] = (levelno, float(rate) if rate else 1.0)
+    return routes
+
+
+ROUTE_SETTINGS = parse_routes(LOG_ROUTES)
+
+
+def bind(**fields):
+    """Add fields to the current request's access line and log records"""
+    context = _request.get()
+    if context is not None:
+        context['fields'].update(fields)
+
+
+def begin_request(route):
+    """Start a request's log context; returns a token for end_request()"""
+    levelno, rate = ROUTE_SETTINGS.get(route, (DEFAULT_LEVEL, 1.0))
+    return _request.set({
+        'route': route,
+        'level': levelno,
+        'sampled': rate >= 1.0 or random.random() < rate,
+        'fields': {},
+        'started': time.perf_counter()
+    })
+
+
+def end_request(token, method, status):
+    """Write the access line and drop the request's log context"""
+    context = _request.get()
+    if context is not None:
+        level = logging.ERROR if status >= 500 else logging.INFO
+        # Checked here too so sampled-out requests don't even build the record
+        if level >= logging.WARNING or (context['sampled'] and level >= context['level']):
+            latency_ms = round((time.perf_counter() - context['started']) * 1000, 2)
+            access_logger.log(level, 'request', extra={'method': method, 'status': status, 'latency_ms': latency_ms})
+    _request.reset(token)
+
+
+class RouteFilter(logging.Filter):
+    """Apply the request's route level and sampling; attach its fields"""
+
+    def filter(self, record):
+        context = _request.get()
+        if context is None:
+            return record.levelno >= DEFAULT_LEVEL
+        if record.levelno < logging.WARNING and (record.levelno < context['level'] or not context['sampled']):
+            return False
+        record.route = context['route']
+        for key, value in context['fields'].items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full"""
+
+    def prepare(self, record):
+        # Only resolve the message here; formatting happens on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # SimpleQueue is lock-free but unbounded, so bound it by size here
+        if self.queue.qsize() >= LOG_QUEUE:
+            LOG_DROPPED.inc()
+        else:
+            self.queue.put_nowait(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable lines for local development: message then key=value fields"""
+
+    def format(self, record):
+        fields = ' '.join(f'{k}={v}' for k, v in record.__dict__.items() if k not in _RECORD_ATTRS)
+        line = f"{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')} {record.levelname:<7} {record.getMessage()} {fields}"
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line.rstrip()
+
+
+_handler = None
+_listener = None
+
+
+def configure_logging():
+    """Route the `app` logger through the queue (idempotent)"""
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JsonFormatter())
+
+    # Opt-in: the formatters use none of these, but the flags are interpreter-wide
+    if LOG_LEAN_RECORDS:
+        logging._srcfile = None
+        logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+
+    log_queue = queue.SimpleQueue()
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(RouteFilter())
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger.addHandler(_handler)
+    logger.setLevel(min([DEFAULT_LEVEL] + [level for level, _ in ROUTE_SETTINGS.values()]))
+    logger.propagate = False
+    # Our access line replaces the dev server's synchronous one
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    return _handler
+
+
+def init_app(app):
+    """Configure logging and write one access line per Flask request"""
+    from flask import g, request
+
+    configure_logging()
+
+    @app.before_request
+    def _begin():
+        g.log_token = begin_request(request.url_rule.rule if request.url_rule else 'unmatched')
+
+    @app.after_request
+    def _end(response):
+        token = g.pop('log_token', None)
+        if token is not None:
+            end_request(token, request.method, response.status_code)
+        return response
+
+    return app
+
+
+class ASGIRouteLogging:
+    """ASGI middleware giving one async route the same request log context"""
+
+    def __init__(self, app, route):
+        self.app = app
+        self.route = route
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        token = begin_request(self.route)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token, scope['method'], status)
@@ -0,0 +1,271 @@
+"""
+Request and database metrics in Prometheus text format (GET /metrics)
+
+    http_requests_total{route,method,status}           counter
+    http_request_duration_seconds{route,method}        histogram
+    http_requests_in_flight{route}                     gauge
+    db_call_duration_seconds{table,operation}          histogram
+    db_rows_total{table,operation}                     counter
+    db_call_errors_total{table,operation}              counter
+
+Routes are labelled by their URL rule (/api/quiz/get-session/<session_id>),
+so label sets stay bounded. Database calls are timed where they leave the
+process: on the pooled PostgREST transport (app/db/supabase_client.py and
+app/db/async_client.py), or in the SQLite stand-in's execute(). Row counts
+come from PostgREST's Content-Range header.
+
+Each process keeps its own registry; with several workers, scrape each one.
+"""
+import bisect
+import contextlib
+import threading
+import time
+
+from flask import Response, g, request
+
+# Prometheus' default buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """Base for metrics keyed by a tuple of label values"""
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+    def _samples(self, items):
+        return [f'{self.name}{_labels(self.label_names, key)} {value:g}' for key, value in items]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def add(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # Per-bucket (not cumulative) counts; render() accumulates them
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, key)} {total:g}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, key)} {count}')
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'HTTP request latency, until the body is sent',
+                             ('route', 'method'))
+IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being served', ('route',))
+DB_DURATION = Histogram('db_call_duration_seconds', 'Supabase call latency', ('table', 'operation'))
+DB_ROWS = Counter('db_rows_total', 'Rows returned or written by Supabase calls', ('table', 'operation'))
+DB_ERRORS = Counter('db_call_errors_total', 'Failed Supabase calls', ('table', 'operation'))
+LOG_DROPPED = Counter('log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+REGISTRY = [REQUESTS, REQUEST_DURATION, IN_FLIGHT, DB_DURATION, DB_ROWS, DB_ERRORS, LOG_DROPPED]
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Requests
+
+def observe_request(route, method, status, seconds):
+    REQUESTS.inc(route, method, str(status))
+    REQUEST_DURATION.observe(seconds, route, method)
+
+
+def init_app(app):
+    """Time every Flask request and serve GET /metrics"""
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.add(g.metrics_route)
+
+    @app.after_request
+    def _status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # Teardown runs for every request that reached before_request, including
+    # ones whose handler raised; with stream_with_context it runs once the
+    # body is done, so streamed responses count in full
+    @app.teardown_request
+    def _record(exc):
+        route, started = g.pop('metrics_route', None), g.pop('metrics_started', None)
+        if started is None:
+            return
+        # No response at all (after_request skipped) counts as a 500
+        status = g.pop('metrics_status', 500)
+        IN_FLIGHT.add(route, amount=-1)
+        observe_request(route, request.method, status, time.perf_counter() - started)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+    return app
+
+
+class ASGIRouteMetrics:
+    """ASGI middleware recording the same request metrics for one async route"""
+
+    def __init__(self, app, route):
+        self.app = app
+        self.route = route
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+        IN_FLIGHT.add(self.route)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.add(self.route, amount=-1)
+            observe_request(self.route, scope['method'], status, time.perf_counter() - started)
+
+
+# Database calls
+
+def observe_db(table, operation, seconds, rows=0, failed=False):
+    DB_DURATION.observe(seconds, table, operation)
+    if rows:
+        DB_ROWS.inc(table, operation, amount=rows)
+    if failed:
+        DB_ERRORS.inc(table, operation)
+
+
+@contextlib.contextmanager
+def track_db(table, operation):
+    """Time a database call; set `.rows` on the yielded object"""
+    call = _Call()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        observe_db(table, operation, time.perf_counter() - started, failed=True)
+        raise
+    observe_db(table, operation, time.perf_counter() - started, call.rows)
+
+
+class _Call:
+    rows = 0
+
+
+_METHOD_OPERATIONS = {'GET': 'select', 'HEAD': 'select', 'PATCH': 'update', 'DELETE': 'delete'}
+
+
+def _postgrest_target(request):
+    """(table, operation) for a PostgREST request, or None for other URLs"""
+    path = request.url.path
+    marker = path.find('/rest/v1/')
+    if marker < 0:
+        return None
+    target = path[marker + len('/rest/v1/'):].strip('/')
+    if target.startswith('rpc/'):
+        return target[len('rpc/'):], 'rpc'
+    operation = _METHOD_OPERATIONS.get(request.method)
+    if operation is None:
+        operation = 'upsert' if 'merge-duplicates' in request.headers.get('prefer', '') else 'insert'
+    return target, operation
+
+
+def _content_range_rows(response):
+    """Row count from a PostgREST Content-Range header ("0-24/*", "*/0")"""
+    span = response.headers.get('content-range', '').split('/', 1)[0]
+    if '-' not in span:
+        return 0
+    first, last = span.split('-', 1)
+    return int(last) - int(first) + 1 if first.isdigit() and last.isdigit() else 0
+
+
+def mark_request(request):
+    """httpx request hook: note when a PostgREST call started"""
+    request.extensions['metrics_started'] = time.perf_counter()
+
+
+def record_response(response):
+    """httpx response hook: record the PostgREST call (headers received)"""
+    started = response.request.extensions.get('metrics_started')
+    target = _postgrest_target(response.request)
+    if started is None or target is None:
+        return
+    observe_db(target[0], target[1], time.perf_counter() - started,
+               _content_range_rows(response), failed=response.status_code >= 400)
+
+
+async def mark_request_async(request):
+    mark_request(request)
+
+
+async def record_response_async(response):
+    record_response(response)
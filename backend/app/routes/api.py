@@ -1,39 +1,58 @@
-from flask import Blueprint, request, jsonify, session
-from flask_bcrypt import Bcrypt
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
 from datetime import datetime
-import sys
+import hashlib
+import json
+import logging
 import os
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'db'))
-
-from nlp_engine import SimpleNLP
-from question_bank import SSC_QUESTIONS, HSC_QUESTIONS
-from supabase_client import get_supabase
+from app import log
+from app.db.supabase_client import get_supabase, pool_stats
+from app.db.history import parse_history_args, stream_history
+from app.db.session_store import load_answers, load_live_scores
+from app.db.user_stats import get_user_quiz_stats
+from app.db.write_behind import flush_session
+from app.services.cache import LRUCache
+from app.services.nlp_engine import get_nlp
+from app.services.password_pool import PoolSaturated, PoolTimeout, check_password, get_password_pool, hash_password
+from app.services.question_payloads import get_question_payload
+from app.services.stream_analyzer import get_analyzer
 
 
 bp = Blueprint('api', __name__, url_prefix='/api')
-supabase = get_supabase()
-bcrypt = Bcrypt()
-
-def clean_questions(questions):
-    """Remove lambda functions from questions"""
-    cleaned = []
-    for q in questions:
-        clean_q = {
-            'id': q.get('id'),
-            'text': q.get('text'),
-            'type': q.get('type'),
-        }
-        if 'options' in q:
-            clean_q['options'] = q['options']
-        cleaned.append(clean_q)
-    return cleaned
+logger = logging.getLogger(__name__)
+
+# /analyze results keyed by a hash of the normalized answer text
+analyze_cache = LRUCache(
+    max_entries=int(os.getenv('ANALYZE_CACHE_ENTRIES', 4096)),
+    max_bytes=int(os.getenv('ANALYZE_CACHE_BYTES', 2 * 1024 * 1024)),
+    ttl=float(os.getenv('ANALYZE_CACHE_TTL', 3600)) or None
+)
+
+# Question payloads are encoded once (on first use) and served as bytes
+QUESTIONS_CACHE_CONTROL = os.getenv('QUESTIONS_CACHE_CONTROL', 'public, max-age=300')
+
+# Longest NDJSON line accepted by /analyze/bulk
+BULK_MAX_LINE = int(os.getenv('ANALYZE_BULK_MAX_LINE', 64 * 1024))
+# Most lines per /analyze/bulk request; the body is read whole before answering
+BULK_MAX_LINES = int(os.getenv('ANALYZE_BULK_MAX_LINES', 5000))
+
+def _auth_busy(e):
+    """503 for when the password pool is saturated"""
+    response = jsonify({'success': False, 'error': 'Too many sign-in attempts right now, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def _auth_timeout(e):
+    """504 for when a password check outlived the pool timeout (a stuck worker, not overload)"""
+    logger.warning('Password pool timeout: %s', e)
+    return jsonify({'success': False, 'error': 'Sign-in took too long, please try again'}), 504
 
 @bp.route('/auth/signup', methods=['POST'])
 def signup():
     """User signup with email/password"""
     try:
+        supabase = get_supabase()
         data = request.json
         username = data.get('username')
         email = data.get('email')
@@ -49,7 +68,7 @@ def signup():
             return jsonify({'success': False, 'error': 'Email already registered'}), 400
         
         # Hash password[web:63][web:65]
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        hashed_password = hash_password(password)
         
         # Create user in Supabase Auth
         auth_response = supabase.auth.sign_up({
@@ -85,62 +104,60 @@ def signup():
         else:
             return jsonify({'success': False, 'error': 'Signup failed'}), 500
             
+    except PoolSaturated as e:
+        return _auth_busy(e)
+    except PoolTimeout as e:
+        return _auth_timeout(e)
     except Exception as e:
-        print(f"Signup error: {e}")
+        logger.exception('Signup failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/auth/login', methods=['POST'])
 def login():
     """User login with email/username and password"""
     try:
+        supabase = get_supabase()
         data = request.json
-        print(f"📥 Login attempt with data: {data}")
         
         identifier = data.get('identifier')
         password = data.get('password')
         
-        print(f"🔑 Identifier: {identifier}, Password length: {len(password) if password else 0}")
-        
         if not all([identifier, password]):
-            print("❌ Missing fields")
+            log.bind(reason='missing_fields')
             return jsonify({'success': False, 'error': 'All fields required'}), 400
         
         # Find user by email or username
         user_query = supabase.table('users').select('*')
         if '@' in identifier:
-            print(f"🔍 Searching by email: {identifier}")
+            log.bind(login_by='email')
             user_query = user_query.eq('email', identifier)
         else:
-            print(f"🔍 Searching by username: {identifier}")
+            log.bind(login_by='username')
             user_query = user_query.eq('username', identifier)
         
         user_response = user_query.execute()
-        print(f"👤 Users found: {len(user_response.data)}")
         
         if not user_response.data:
-            print("❌ User not found")
+            log.bind(reason='user_not_found')
             return jsonify({'success': False, 'error': 'Invalid login credentials'}), 401
         
         user = user_response.data[0]
-        print(f"✅ User found: {user.get('username')} ({user.get('email')})")
+        log.bind(user_id=user['id'])
         
         # Get password hash
         password_hash = user.get('passwordhash') or user.get('password_hash')
-        print(f"🔐 Password hash exists: {bool(password_hash)}")
         
         if not password_hash:
-            print("❌ No password hash found")
+            log.bind(reason='no_password_hash')
             return jsonify({'success': False, 'error': 'Password not set'}), 401
         
         # Verify password
-        password_valid = bcrypt.check_password_hash(password_hash, password)
-        print(f"🔓 Password valid: {password_valid}")
+        password_valid = check_password(password_hash, password)
         
         if not password_valid:
-            print("❌ Password mismatch")
+            log.bind(reason='password_mismatch')
             return jsonify({'success': False, 'error': 'Invalid login credentials'}), 401
         
-        print("✅ Login successful!")
         return jsonify({
             'success': True,
             'message': 'Login successful!',
@@ -153,133 +170,19 @@ def login():
             }
         })
             
+    except PoolSaturated as e:
+        return _auth_busy(e)
+    except PoolTimeout as e:
+        return _auth_timeout(e)
     except Exception as e:
-        print(f"❌ Login error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-
-    """User login with email/username and password"""
-    try:
-        data = request.json
-        identifier = data.get('identifier')  # Can be username or email
-        password = data.get('password')
-        
-        if not all([identifier, password]):
-            return jsonify({'success': False, 'error': 'All fields required'}), 400
-        
-        # Find user by email or username
-        user_query = supabase.table('users').select('*')
-        if '@' in identifier:
-            user_query = user_query.eq('email', identifier)
-        else:
-            user_query = user_query.eq('username', identifier)
-        
-        user_response = user_query.execute()
-        
-        if not user_response.data:
-            return jsonify({'success': False, 'error': 'Invalid login credentials'}), 401
-        
-        user = user_response.data[0]
-        
-        # FIX: Use correct column name (passwordhash, not password_hash)
-        password_hash = user.get('passwordhash') or user.get('password_hash')
-        
-        if not password_hash:
-            return jsonify({'success': False, 'error': 'Password not set'}), 401
-        
-        # Verify password
-        if not bcrypt.check_password_hash(password_hash, password):
-            return jsonify({'success': False, 'error': 'Invalid login credentials'}), 401
-        
-        # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
-            'email': user['email'],
-            'password': password
-        })
-        
-        if auth_response.user:
-            return jsonify({
-                'success': True,
-                'message': 'Login successful!',
-                'user': {
-                    'id': user['id'],
-                    'username': user['username'],
-                    'email': user['email']
-                },
-                'session': {
-                    'access_token': auth_response.session.access_token,
-                    'refresh_token': auth_response.session.refresh_token
-                }
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Login failed'}), 500
-            
-    except Exception as e:
-        print(f"Login error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-    """User login with email/username and password"""
-    try:
-        data = request.json
-        identifier = data.get('identifier')  # Can be username or email
-        password = data.get('password')
-        
-        if not all([identifier, password]):
-            return jsonify({'success': False, 'error': 'All fields required'}), 400
-        
-        # Find user by email or username
-        user_query = supabase.table('users').select('*')
-        if '@' in identifier:
-            user_query = user_query.eq('email', identifier)
-        else:
-            user_query = user_query.eq('username', identifier)
-        
-        user_response = user_query.execute()
-        
-        if not user_response.data:
-            return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
-        
-        user = user_response.data[0]
-        
-        # Verify password[web:63][web:65]
-        if not bcrypt.check_password_hash(user['password_hash'], password):
-            return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
-        
-        # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
-            'email': user['email'],
-            'password': password
-        })
-        
-        if auth_response.user:
-            return jsonify({
-                'success': True,
-                'message': 'Login successful!',
-                'user': {
-                    'id': user['id'],
-                    'username': user['username'],
-                    'email': user['email']
-                },
-                'session': {
-                    'access_token': auth_response.session.access_token,
-                    'refresh_token': auth_response.session.refresh_token
-                }
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Login failed'}), 500
-            
-    except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception('Login failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/auth/google', methods=['POST'])
 def google_auth():
     """Initiate Google OAuth flow"""[web:64]
     try:
+        supabase = get_supabase()
         # Get Google OAuth URL from Supabase
         auth_response = supabase.auth.sign_in_with_oauth({
             'provider': 'google',
@@ -293,13 +196,14 @@ def google_auth():
             'url': auth_response.url
         })
     except Exception as e:
-        print(f"Google auth error: {e}")
+        logger.exception('Google auth failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/auth/google/callback', methods=['POST'])
 def google_callback():
     """Handle Google OAuth callback"""
     try:
+        supabase = get_supabase()
         data = request.json
         access_token = data.get('access_token')
         refresh_token = data.get('refresh_token')
@@ -336,13 +240,14 @@ def google_callback():
             return jsonify({'success': False, 'error': 'Authentication failed'}), 401
             
     except Exception as e:
-        print(f"Google callback error: {e}")
+        logger.exception('Google callback failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/auth/logout', methods=['POST'])
 def logout():
     """User logout"""
     try:
+        supabase = get_supabase()
         supabase.auth.sign_out()
         return jsonify({'success': True, 'message': 'Logged out successfully'})
     except Exception as e:
@@ -352,12 +257,25 @@ def logout():
 def get_questions(mode):
     """Get questions based on mode"""
     try:
-        if mode == 'ssc':
-            return jsonify(clean_questions(SSC_QUESTIONS))
-        elif mode == 'hsc':
-            return jsonify(clean_questions(HSC_QUESTIONS))
-        else:
+        payload = get_question_payload(mode)
+        if payload is None:
             return jsonify({'error': 'Invalid mode'}), 400
+        
+        use_gzip = request.accept_encodings['gzip'] > 0
+        etag = payload.etag + '-gzip' if use_gzip else payload.etag
+        
+        # Weak comparison (RFC 9110 13.1.2): lists, * and the W/ proxies add when they compress
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(payload.gzip_body if use_gzip else payload.body, mimetype='application/json')
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = QUESTIONS_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -368,18 +286,85 @@ def analyze_answer():
         data = request.json
         answer = data.get('answer', '')
         
-        nlp = SimpleNLP()
-        sentiment = nlp.sentiment_score(answer)
-        keywords = list(nlp.extract_keywords(answer))
+        doc = get_nlp().parse(answer)
+        key = hashlib.blake2b(' '.join(doc.tokens).encode('utf-8'), digest_size=16).digest()
+        result = analyze_cache.get(key)
         
-        return jsonify({
-            'sentiment': sentiment,
-            'keywords': keywords,
-            'confidence': abs(sentiment)
-        })
+        if result is None:
+            sentiment = doc.sentiment
+            result = {
+                'sentiment': sentiment,
+                'keywords': list(doc.keywords),
+                'confidence': abs(sentiment)
+            }
+            analyze_cache.set(key, result, size=len(key) + len(json.dumps(result)))
+        
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _bulk_analyze_line(line, line_no):
+    """Analyze one NDJSON record: {"id": ..., "text": ...} or a bare JSON string"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {'line': line_no, 'error': 'Invalid JSON'}
+    
+    if isinstance(record, str):
+        record_id, text = line_no, record
+    elif isinstance(record, dict):
+        record_id = record.get('id', line_no)
+        text = record.get('text', record.get('answer', ''))
+    else:
+        return {'line': line_no, 'error': 'Expected an object or string'}
+    
+    doc = get_nlp().parse(text)
+    return {
+        'id': record_id,
+        'sentiment': doc.sentiment,
+        'keywords': sorted(doc.keywords),
+        'intent': doc.intent
+    }
+
+@bp.route('/analyze/bulk', methods=['POST'])
+def analyze_bulk():
+    """Analyze an NDJSON body of answers, streaming NDJSON results back"""
+    # Read the whole body before the first result goes out: a client that only
+    # reads the response after sending everything (requests, curl --data-binary)
+    # would otherwise deadlock once both socket buffers fill. At most
+    # BULK_MAX_LINES lines of BULK_MAX_LINE bytes are held.
+    stream = request.stream
+    lines = []
+    while True:
+        line = stream.readline(BULK_MAX_LINE + 1)
+        if not line:
+            break
+        if len(lines) >= BULK_MAX_LINES:
+            return jsonify({'success': False, 'error': f'At most {BULK_MAX_LINES} lines per request'}), 413
+        if len(line) > BULK_MAX_LINE and not line.endswith(b'\n'):
+            # Drain the rest of the oversized line without buffering it
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(BULK_MAX_LINE)
+            line = None
+        lines.append(line)
+    
+    def generate():
+        for line_no, line in enumerate(lines, 1):
+            if line is None:
+                yield json.dumps({'line': line_no, 'error': 'Line too long'}) + '\n'
+                continue
+            if not line.strip():
+                continue
+            # Bulk re-runs bypass analyze_cache so archives don't evict live entries
+            yield json.dumps(_bulk_analyze_line(line, line_no)) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/analyze/cache-stats', methods=['GET'])
+def analyze_cache_stats():
+    """Hit/miss/eviction counters for the /analyze result cache"""
+    return jsonify(analyze_cache.stats())
+
 @bp.route('/submit-answer', methods=['POST'])
 def submit_answer():
     """Save answer to database"""
@@ -403,8 +388,38 @@ def submit_answer():
 
 @bp.route('/recommend', methods=['POST'])
 def get_recommendations():
-    """Get career recommendations"""
+    """Get career recommendations for a session, or the user's latest completed one"""
     try:
+        data = request.json or {}
+        session_id = data.get('session_id')
+        user_id = data.get('user_id')
+        
+        if session_id or user_id:
+            flush_session(session_id)
+            supabase = get_supabase()
+            query = supabase.table('quiz_sessions').select('answers, live_scores')
+            if session_id:
+                query = query.eq('id', session_id)
+            else:
+                query = query.eq('user_id', user_id)\
+                    .eq('is_completed', True)\
+                    .order('completed_at', desc=True)\
+                    .limit(1)
+            response = query.execute()
+            
+            if response.data:
+                session = response.data[0]
+                analyzer = get_analyzer()
+                result = analyzer.recommend(load_answers(session.get('answers')),
+                                            load_live_scores(session.get('live_scores')))
+                return jsonify({
+                    'streams': [item['title'] for item in analyzer.leaning(result['all_scores'])],
+                    'careers': result['careers'][:3],
+                    'analysis': result['detailed_analysis']['summary'],
+                    'recommendation': result
+                })
+        
+        # No quiz to go on yet
         return jsonify({
             'streams': ['Science & Technology', 'Engineering', 'Computer Science'],
             'careers': ['Software Engineer', 'Data Scientist', 'Web Developer'],
@@ -413,6 +428,16 @@ def get_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/db/pool-stats', methods=['GET'])
+def db_pool_stats():
+    """Connection reuse statistics for the Supabase pools"""
+    return jsonify(pool_stats())
+
+@bp.route('/auth/pool-stats', methods=['GET'])
+def auth_pool_stats():
+    """Password pool queue depth, rejections and latency"""
+    return jsonify(get_password_pool().stats())
+
 @bp.route('/test', methods=['GET'])
 def test():
     return jsonify({'status': 'Backend working with Supabase Auth!', 'database': 'connected'})
@@ -542,6 +567,15 @@ def save_quiz_progress():
         answer = data.get('answer')
         question_id = data.get('question_id')
         
+        answer_data = {
+            'session_id': session_id,
+            'user_id': data.get('user_id'),
+            'question_id': question_id,
+            'answer': answer
+        }
+        
+        # Not buffered by write-behind: this route appends to a list of answers,
+        # while the buffer merges {question_id: answer} objects
         supabase = get_supabase()
         
         # Get current session
@@ -568,12 +602,6 @@ def save_quiz_progress():
         supabase.table('quiz_sessions').update(update_data).eq('id', session_id).execute()
         
         # Also save to answers table
-        answer_data = {
-            'session_id': session_id,
-            'user_id': data.get('user_id'),
-            'question_id': question_id,
-            'answer': answer
-        }
         supabase.table('answers').insert(answer_data).execute()
         
         return jsonify({'success': True, 'message': 'Progress saved'})
@@ -588,6 +616,9 @@ def complete_quiz():
         session_id = data.get('session_id')
         final_score = data.get('score', 0)
         
+        # Buffered answers must land before the session is marked complete
+        flush_session(session_id)
+        
         supabase = get_supabase()
         
         update_data = {
@@ -596,40 +627,33 @@ def complete_quiz():
             'score': final_score
         }
         
-        supabase.table('quiz_sessions').update(update_data).eq('id', session_id).execute()
+        response = supabase.table('quiz_sessions').update(update_data).eq('id', session_id).execute()
         
-        return jsonify({'success': True, 'message': 'Quiz completed!'})
+        # The update returns the row; the scores were kept up to date by each save
+        recommendation = None
+        if response.data:
+            session = response.data[0]
+            recommendation = get_analyzer().recommend(load_answers(session.get('answers')),
+                                                      load_live_scores(session.get('live_scores')))
+        
+        return jsonify({'success': True, 'message': 'Quiz completed!', 'recommendation': recommendation})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/quiz/history', methods=['GET'])
 def get_quiz_history():
-    """Get user's quiz history"""
+    """Get user's quiz history (?limit=&cursor=&include=answers)"""
     try:
         user_id = request.args.get('user_id')
+        try:
+            limit, after, include_answers = parse_history_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         supabase = get_supabase()
-        response = supabase.table('quiz_sessions')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .execute()
-        
-        history = []
-        for session in response.data:
-            history.append({
-                'id': session['id'],
-                'mode': session['mode'],
-                'class_level': session.get('class_level'),
-                'score': session.get('score', 0),
-                'total_questions': session['total_questions'],
-                'current_question': session['current_question'],
-                'is_completed': session['is_completed'],
-                'created_at': session['created_at'],
-                'completed_at': session.get('completed_at')
-            })
+        body = stream_history(supabase, user_id, limit, after, include_answers)
         
-        return jsonify({'success': True, 'history': history})
+        return Response(stream_with_context(body), mimetype='application/json')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -641,28 +665,12 @@ def get_dashboard_stats():
         
         supabase = get_supabase()
         
-        # Get total quizzes
-        sessions = supabase.table('quiz_sessions')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .execute()
-        
-        total_quizzes = len(sessions.data)
-        completed_quizzes = len([s for s in sessions.data if s['is_completed']])
-        incomplete_quizzes = total_quizzes - completed_quizzes
-        
-        # Calculate average score
-        completed_sessions = [s for s in sessions.data if s['is_completed']]
-        avg_score = sum(s.get('score', 0) for s in completed_sessions) / len(completed_sessions) if completed_sessions else 0
+        # Counters are kept up to date by a trigger on quiz_sessions
+        stats = get_user_quiz_stats(supabase, user_id)
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_quizzes': total_quizzes,
-                'completed_quizzes': completed_quizzes,
-                'incomplete_quizzes': incomplete_quizzes,
-                'average_score': round(avg_score, 2)
-            }
+            'stats': stats
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
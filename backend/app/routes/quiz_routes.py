@@ -1,13 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime
-import json
-import sys
-import os
+import logging
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'db'))
-from supabase_client import get_supabase
+from app import log
+from app.db.supabase_client import get_supabase
+from app.db.history import parse_history_args, stream_history
+from app.db.session_store import dump_answers, load_answers, load_live_scores, merge_session_answers, VersionConflict
+from app.db.write_behind import flush_session, get_write_behind
+from app.services.stream_analyzer import get_analyzer
 
 quiz_bp = Blueprint('quiz', __name__)
+logger = logging.getLogger(__name__)
 
 @quiz_bp.route('/quiz/start', methods=['POST', 'OPTIONS'])
 def start_quiz():
@@ -45,9 +48,7 @@ def start_quiz():
             })
             
     except Exception as e:
-        print(f"ERROR in /quiz/start: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Quiz start failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -58,12 +59,12 @@ def save_answer():
         
     try:
         data = request.json
-        print(f"📩 Received data: {data}")
         
         session_id = data.get('session_id')
         question_id = str(data.get('question_id', ''))
         answer = data.get('answer', '')
         question_index = int(data.get('question_index', 0))
+        log.bind(session_id=session_id, question_index=question_index)
         
         user_id = data.get('user_id')
         mode = data.get('mode')
@@ -71,10 +72,10 @@ def save_answer():
         first_two_answers = data.get('first_two_answers', {})
         
         supabase = get_supabase()
+        analyzer = get_analyzer()
         
         # Q2 (index 1) - CREATE SESSION (WITHOUT is_saved column)
         if question_index == 1 and not session_id:
-            print(f"📝 Creating session after Q2")
             first_two_answers[question_id] = answer
             
             new_session = {
@@ -83,16 +84,14 @@ def save_answer():
                 'class_level': str(class_level),
                 'current_question': 2,
                 'is_completed': False,
-                'answers': json.dumps(first_two_answers),
+                'answers': dump_answers(first_two_answers),
+                'live_scores': analyzer.contributions(first_two_answers),
                 'score': 0
             }
             
-            print(f"Creating session with data: {new_session}")
-            
             response = supabase.table('quiz_sessions').insert(new_session).execute()
             new_session_id = response.data[0]['id']
-            
-            print(f"✅ Session created: {new_session_id}")
+            log.bind(session_id=new_session_id, created=True)
             
             return jsonify({
                 'success': True,
@@ -102,49 +101,47 @@ def save_answer():
         
         # Q3+ - UPDATE SESSION
         if session_id and question_index >= 2:
-            print(f"📝 Updating session {session_id} with answer {question_index + 1}")
-            
-            session_response = supabase.table('quiz_sessions')\
-                .select('answers')\
-                .eq('id', session_id)\
-                .execute()
-            
-            if not session_response.data:
-                return jsonify({'success': False, 'error': 'Session not found'}), 404
+            # This answer's share of the stream scores, kept with the session
+            scores = analyzer.contributions({question_id: answer})
             
-            # FIX: Handle both string and dict/list types
-            answers_data = session_response.data[0].get('answers', '{}')
-            if isinstance(answers_data, str):
-                current_answers = json.loads(answers_data)
-            elif isinstance(answers_data, (dict, list)):
-                current_answers = answers_data if isinstance(answers_data, dict) else {}
-            else:
-                current_answers = {}
+            # Write-behind mode: acknowledge once logged locally, flushed in batches
+            buffer = get_write_behind()
+            if buffer:
+                buffer.append(session_id, {question_id: answer}, question_index + 1, scores=scores)
+                log.bind(buffered=True)
+                return jsonify({'success': True, 'is_saved': True, 'buffered': True})
             
-            current_answers[question_id] = answer
+            # Single round trip: the answer is merged into the session server-side
+            try:
+                version = merge_session_answers(
+                    supabase,
+                    session_id,
+                    {question_id: answer},
+                    current_question=question_index + 1,
+                    expected_version=data.get('version'),
+                    scores=scores
+                )
+            except VersionConflict as e:
+                return jsonify({
+                    'success': False,
+                    'error': 'Session was updated concurrently',
+                    'version': e.current_version
+                }), 409
             
-            update_data = {
-                'current_question': question_index + 1,
-                'answers': json.dumps(current_answers)
-            }
-            
-            supabase.table('quiz_sessions').update(update_data).eq('id', session_id).execute()
-            
-            print(f"✅ Answer saved")
+            if version is None:
+                return jsonify({'success': False, 'error': 'Session not found'}), 404
             
             return jsonify({
                 'success': True,
-                'is_saved': True
+                'is_saved': True,
+                'version': version
             })
         
         # Q1 - Just acknowledge
-        print(f"✅ Q1 acknowledged")
         return jsonify({'success': True, 'is_saved': False})
         
     except Exception as e:
-        print(f"❌ ERROR in /quiz/save-answer: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Save answer failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -152,6 +149,8 @@ def save_answer():
 def get_session(session_id):
     """Get quiz session details by UUID"""
     try:
+        # Include saves still in the write-behind buffer
+        flush_session(session_id)
         supabase = get_supabase()
         
         # Query by UUID string (not int)
@@ -162,12 +161,8 @@ def get_session(session_id):
         
         if response.data and len(response.data) > 0:
             session = response.data[0]
-            # Handle answers parsing
-            answers_data = session.get('answers', '{}')
-            if isinstance(answers_data, str):
-                session['answers'] = json.loads(answers_data)
-            else:
-                session['answers'] = answers_data if isinstance(answers_data, dict) else {}
+            # Stored encoded (app/services/answer_codec.py); sent as {question_id: answer}
+            session['answers'] = load_answers(session.get('answers'))
             
             return jsonify({
                 'success': True,
@@ -177,42 +172,58 @@ def get_session(session_id):
             return jsonify({'success': False, 'error': 'Session not found'}), 404
             
     except Exception as e:
-        print(f"ERROR getting session: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Get session failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-
-@quiz_bp.route('/quiz/history', methods=['GET'])
-def get_history():
+@quiz_bp.route('/quiz/leaning/<session_id>', methods=['GET'])
+def get_leaning(session_id):
+    """Top streams so far, from the session's live scores"""
     try:
-        user_id = request.args.get('user_id')
+        flush_session(session_id)
         supabase = get_supabase()
         
         response = supabase.table('quiz_sessions')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
+            .select('answers, live_scores')\
+            .eq('id', session_id)\
             .execute()
         
-        history = []
-        for session in response.data:
-            # Handle answers parsing
-            answers_data = session.get('answers', '{}')
-            if isinstance(answers_data, str):
-                session['answers'] = json.loads(answers_data)
-            else:
-                session['answers'] = answers_data if isinstance(answers_data, dict) else {}
-            history.append(session)
+        if not response.data:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        session = response.data[0]
+        analyzer = get_analyzer()
+        scores = analyzer.current_scores(load_answers(session.get('answers')),
+                                         load_live_scores(session.get('live_scores')))
         
         return jsonify({
             'success': True,
-            'history': history
+            'session_id': session_id,
+            'leaning': analyzer.leaning(scores)
         })
         
     except Exception as e:
-        print(f"ERROR: {str(e)}")
+        logger.exception('Get leaning failed')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+
+@quiz_bp.route('/quiz/history', methods=['GET'])
+def get_history():
+    try:
+        user_id = request.args.get('user_id')
+        try:
+            limit, after, include_answers = parse_history_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        supabase = get_supabase()
+        body = stream_history(supabase, user_id, limit, after, include_answers)
+        
+        return Response(stream_with_context(body), mimetype='application/json')
+        
+    except Exception as e:
+        logger.exception('History failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -222,15 +233,25 @@ def complete_quiz():
         data = request.json
         session_id = data.get('session_id')
         
+        # Buffered answers must land before the session is marked complete
+        flush_session(session_id)
+        
         supabase = get_supabase()
         
-        supabase.table('quiz_sessions').update({
+        response = supabase.table('quiz_sessions').update({
             'is_completed': True,
             'completed_at': datetime.now().isoformat()
         }).eq('id', session_id).execute()
         
-        return jsonify({'success': True})
+        # The update returns the row, so the recommendation needs no extra read
+        recommendation = None
+        if response.data:
+            session = response.data[0]
+            recommendation = get_analyzer().recommend(load_answers(session.get('answers')),
+                                                      load_live_scores(session.get('live_scores')))
+        
+        return jsonify({'success': True, 'recommendation': recommendation})
         
     except Exception as e:
-        print(f"ERROR: {str(e)}")
+        logger.exception('Quiz complete failed')
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,144 @@
+"""
+Compact storage encoding for quiz answers
+
+quiz_sessions.answers used to hold {question_id: answer text}, with every
+choice spelled out ("Yes — Diploma/Polytechnic"). Encoded answers replace
+each question id with its index in a versioned schema snapshot and each
+choice with its option index; free-text answers stay text:
+
+    {"_v": 1, "0": "Asha", "3": 0, "4": 2, "6": "I want to build robots"}
+
+The snapshot lives in app/data/answer_schema_v<N>.json. Snapshots are
+append-only: a new version keeps every question and option of the previous
+one at the same index and only adds to the end, so the newest snapshot
+decodes rows written under any earlier version. This is also what keeps the
+server-side merge (jsonb ||, migrations/001) safe when a patch and the row
+were encoded under different versions. `python migrate_answers.py
+--write-schema` writes the next snapshot after QUESTION_SETS changes.
+
+Rows without "_v" are the old plain format and decode as-is. A row can mix
+both (plain keys from before migrate_answers.py ran, encoded ones after);
+the encoded keys are the later saves and win.
+"""
+import json
+import re
+import threading
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+SCHEMA_PATTERN = re.compile(r'^answer_schema_v(\d+)\.json$')
+VERSION_KEY = '_v'
+
+# Built once: json.dumps() with non-default arguments builds a new encoder per call
+_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+
+def schema_path(version) -> Path:
+    return DATA_DIR / f'answer_schema_v{version}.json'
+
+
+def extend_schema(previous, question_sets) -> dict:
+    """Next snapshot: `previous` (or None) plus any new questions and options"""
+    questions = [dict(q, options=list(q['options'])) for q in previous['questions']] if previous else []
+    by_id = {q['id']: q for q in questions}
+    for question_list in question_sets.values():
+        for question in question_list:
+            entry = by_id.get(question['id'])
+            if entry is None:
+                entry = by_id[question['id']] = {'id': question['id'], 'type': question.get('type'), 'options': []}
+                questions.append(entry)
+            for option in question.get('options', []):
+                if option not in entry['options']:
+                    entry['options'].append(option)
+    return {'version': previous['version'] + 1 if previous else 1, 'questions': questions}
+
+
+class AnswerSchema:
+    """One snapshot, indexed both ways"""
+
+    def __init__(self, snapshot):
+        self.version = snapshot['version']
+        self.ids = [q['id'] for q in snapshot['questions']]
+        self.options = [q['options'] for q in snapshot['questions']]
+        # question id -> (storage key, {option: option index})
+        self.keys = {
+            question_id: (str(i), {option: j for j, option in enumerate(options)})
+            for i, (question_id, options) in enumerate(zip(self.ids, self.options))
+        }
+        # storage key -> (question id, options)
+        self.decoders = {
+            str(i): (question_id, options) for i, (question_id, options) in enumerate(zip(self.ids, self.options))
+        }
+
+
+def load_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def latest_schema_version(data_dir=DATA_DIR):
+    versions = [int(m.group(1)) for m in map(SCHEMA_PATTERN.match, (p.name for p in data_dir.iterdir())) if m]
+    return max(versions) if versions else None
+
+
+_schema = None
+_schema_lock = threading.Lock()
+
+
+def get_schema() -> AnswerSchema:
+    """The newest snapshot in app/data (loaded once)"""
+    global _schema
+    if _schema is None:
+        with _schema_lock:
+            if _schema is None:
+                version = latest_schema_version()
+                if version is None:
+                    raise RuntimeError(f'No answer schema snapshot in {DATA_DIR}')
+                _schema = AnswerSchema(load_snapshot(schema_path(version)))
+    return _schema
+
+
+def encode(answers: dict, schema=None) -> dict:
+    """{question_id: answer} -> encoded form (also used for merge patches)"""
+    schema = schema or get_schema()
+    encoded = {VERSION_KEY: schema.version}
+    for question_id, answer in answers.items():
+        entry = schema.keys.get(question_id)
+        if entry is None or type(answer) is not str:
+            # Unknown question or a non-text value: stored as in the plain format
+            encoded[question_id] = answer
+            continue
+        key, options = entry
+        option = options.get(answer)
+        encoded[key] = answer if option is None else option
+    return encoded
+
+
+def decode(stored: dict, schema=None) -> dict:
+    """Encoded (or plain) answers -> {question_id: answer}"""
+    if VERSION_KEY not in stored:
+        return stored
+    decoders = (schema or get_schema()).decoders
+    answers = {}
+    plain = None
+    for key, value in stored.items():
+        entry = decoders.get(key)
+        if entry is None:
+            if key != VERSION_KEY:
+                plain = plain or {}
+                plain[key] = value
+            continue
+        question_id, options = entry
+        # type() rather than isinstance(): True is not an option index
+        if type(value) is int and 0 <= value < len(options):
+            value = options[value]
+        answers[question_id] = value
+    if plain:
+        plain.update(answers)
+        return plain
+    return answers
+
+
+def dumps(answers: dict, schema=None) -> str:
+    """Encoded answers as compact JSON text, for the answers column"""
+    return _ENCODER.encode(encode(answers, schema))
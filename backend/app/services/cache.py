@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total bytes.
+
+    Entries older than `ttl` seconds are treated as misses and dropped.
+    `size` passed to set() is the caller's estimate of the entry's bytes.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()     # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=1):
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -1,57 +1,195 @@
 import re
+from functools import cached_property
 
-class SimpleNLP:
-    """Lightweight NLP: intent extraction + improved sentiment-ish scoring."""
-    
-    POSITIVE = set(["love","enjoy","like","excited","interested","passionate","great","awesome","good","fond","really","very"])
-    NEGATIVE = set(["hate","dislike","bored","boring","dont","don't","not","hard","difficult","confused","struggle","worried"])
-    INTENSIFIERS = set(["really","very","extremely","super","absolutely","totally"])
+from app.services.phrase_matcher import PhraseMatcher, leftmost_longest
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]")
+
+# Lexicon flags, combined so one dict lookup per token covers every list
+_POS, _NEG, _INTEN = 1, 2, 4
+
+
+class Document:
+    """Text normalized and tokenized once, with lazily cached views."""
+
+    def __init__(self, engine, text):
+        self.engine = engine
+        self.text = text
+        self.normalized = engine.normalize(text)
+        self.tokens = self.normalized.split()
+
+    @cached_property
+    def keywords(self) -> set:
+        return {w for w in self.tokens if len(w) > 2}
+
+    @cached_property
+    def lexicon_counts(self) -> tuple:
+        """(positive, negative, intensifier) counts from a single pass"""
+        lexicon = self.engine.LEXICON
+        pos = neg = inten = 0
+        for w in self.tokens:
+            flags = lexicon.get(w)
+            if flags:
+                if flags & _POS:
+                    pos += 1
+                if flags & _NEG:
+                    neg += 1
+                if flags & _INTEN:
+                    inten += 1
+        return pos, neg, inten
+
+    @cached_property
+    def sentiment(self) -> float:
+        pos, neg, inten = self.lexicon_counts
 
-    def normalize(self, text: str) -> str:
-        if not isinstance(text, str):
-            return ""
-        return re.sub(r"[^a-z0-9 ]"," ", text.lower())
-
-    def extract_keywords(self, text: str) -> set:
-        text = self.normalize(text)
-        return set([w for w in text.split() if len(w) > 2])
-
-    def sentiment_score(self, text: str) -> float:
-        t = self.normalize(text)
-        words = t.split()
-        pos = sum(1 for w in words if w in self.POSITIVE)
-        neg = sum(1 for w in words if w in self.NEGATIVE)
-        inten = sum(1 for w in words if w in self.INTENSIFIERS)
-        
         if pos + neg == 0:
             return 0.0
-        
+
         base = (pos - neg) / (pos + neg)
         # Boost if intensifiers present
         if inten > 0:
             base = base * (1 + (inten * 0.2))
         return max(-1.0, min(1.0, base))
 
-    def extract_intent(self, text: str) -> dict:
-        """Extract educational intent from response"""
-        t = self.normalize(text)
-        keywords = self.extract_keywords(text)
-        
+    @cached_property
+    def matches(self) -> list:
+        """(kind, label, intent) for the lexicon phrases found in the text, in order
+
+        Each lexicon is resolved on its own to leftmost-longest matches that
+        don't overlap: "software engineer" is one career, not also
+        "engineer". Only the intent lexicon counts towards intent, as the
+        plain keyword lookup did.
+        """
+        by_kind = {}
+        for match in self.engine.matcher().find(self.tokens):
+            by_kind.setdefault(match[2][0], []).append(match)
+        found = sorted((m for group in by_kind.values() for m in leftmost_longest(group)), key=lambda m: m[0])
+        return [value for _, _, value in found]
+
+    def labels(self, kind) -> list:
+        """Distinct labels of one lexicon kind, in order of appearance"""
+        return list(dict.fromkeys(label for k, label, _ in self.matches if k == kind))
+
+    @cached_property
+    def subjects(self) -> list:
+        return self.labels("subject")
+
+    @cached_property
+    def careers(self) -> list:
+        return self.labels("career")
+
+    @cached_property
+    def intent(self) -> dict:
+        found = {name: set() for name in self.engine.INTENTS}
+        for kind, label, intent in self.matches:
+            if kind == "intent":
+                found[intent].add(label)
+        intent = {name: len(labels) for name, labels in found.items()}
+        intent["sentiment"] = self.sentiment
+        return intent
+
+
+class SimpleNLP:
+    """Lightweight NLP: intent extraction + improved sentiment-ish scoring."""
+
+    POSITIVE = set(["love","enjoy","like","excited","interested","passionate","great","awesome","good","fond","really","very"])
+    NEGATIVE = set(["hate","dislike","bored","boring","dont","don't","not","hard","difficult","confused","struggle","worried"])
+    INTENSIFIERS = set(["really","very","extremely","super","absolutely","totally"])
+
+    INTENTS = {
         # Technical intent
-        tech_words = {"computer", "programming", "coding", "software", "technology", "data", "engineering"}
+        "technical": {"computer", "programming", "coding", "software", "technology", "data", "engineering"},
         # Creative intent
-        creative_words = {"design", "art", "creative", "drawing", "music", "writing", "fashion"}
+        "creative": {"design", "art", "creative", "drawing", "music", "writing", "fashion"},
         # Business intent
-        business_words = {"business", "marketing", "management", "entrepreneur", "sales", "commerce"}
+        "business": {"business", "marketing", "management", "entrepreneur", "sales", "commerce"},
         # Medical intent
-        medical_words = {"medical", "doctor", "nurse", "health", "biology", "medicine", "patient"}
-        
-        intent = {
-            "technical": len(keywords & tech_words),
-            "creative": len(keywords & creative_words),
-            "business": len(keywords & business_words),
-            "medical": len(keywords & medical_words),
-            "sentiment": self.sentiment_score(text)
-        }
-        
-        return intent
\ No newline at end of file
+        "medical": {"medical", "doctor", "nurse", "health", "biology", "medicine", "patient"},
+    }
+
+    # Subject -> phrases that mention it
+    SUBJECTS = {
+        "Mathematics": ["math", "maths", "mathematics", "algebra", "geometry", "calculus", "statistics"],
+        "Physics": ["physics"],
+        "Chemistry": ["chemistry"],
+        "Computer Science": ["computer science", "computer", "computers", "coding", "programming", "software"],
+        "Biology": ["biology", "zoology", "botany"],
+        "Commerce": ["commerce", "business studies"],
+        "Accountancy": ["accountancy", "accounts", "accounting"],
+        "Economics": ["economics"],
+        "History": ["history"],
+        "Geography": ["geography"],
+        "Arts": ["arts", "fine arts", "art", "painting", "drawing", "music"],
+    }
+
+    CAREERS = [
+        "software engineer", "software developer", "data scientist", "web developer", "engineer",
+        "game developer", "doctor", "surgeon", "dentist", "pharmacist", "chartered accountant",
+        "business analyst", "banker", "investment banker", "entrepreneur", "graphic designer",
+        "fashion designer", "architect", "musician", "artist", "writer", "lawyer", "civil servant",
+        "civil services", "ias officer", "teacher", "journalist", "psychologist", "scientist",
+    ]
+
+    LEXICON = {}
+    for _words, _flag in ((POSITIVE, _POS), (NEGATIVE, _NEG), (INTENSIFIERS, _INTEN)):
+        for _w in _words:
+            LEXICON[_w] = LEXICON.get(_w, 0) | _flag
+    del _words, _flag, _w
+
+    _matcher = None
+
+    @classmethod
+    def matcher(cls) -> PhraseMatcher:
+        """Subject, career and intent lexicons compiled into one automaton"""
+        if cls._matcher is None:
+            matcher = PhraseMatcher()
+            for subject, phrases in cls.SUBJECTS.items():
+                for phrase in phrases:
+                    matcher.add(phrase, ("subject", subject, None))
+            for career in cls.CAREERS:
+                matcher.add(career, ("career", career, None))
+            for intent, words in cls.INTENTS.items():
+                for word in words:
+                    matcher.add(word, ("intent", word, intent))
+            cls._matcher = matcher.compile()
+        return cls._matcher
+
+    def normalize(self, text: str) -> str:
+        if not isinstance(text, str):
+            return ""
+        return _NON_ALNUM.sub(" ", text.lower())
+
+    def parse(self, text) -> Document:
+        """Normalize and tokenize once; pass the result to the other methods"""
+        if isinstance(text, Document):
+            return text
+        return Document(self, text)
+
+    def extract_keywords(self, text) -> set:
+        return self.parse(text).keywords
+
+    def sentiment_score(self, text) -> float:
+        return self.parse(text).sentiment
+
+    def extract_intent(self, text) -> dict:
+        """Extract educational intent from response"""
+        return self.parse(text).intent
+
+    def detect_subjects(self, text) -> list:
+        """School subjects mentioned in free text"""
+        return self.parse(text).subjects
+
+    def detect_careers(self, text) -> list:
+        """Career phrases mentioned in free text"""
+        return self.parse(text).careers
+
+
+_shared_nlp = None
+
+
+def get_nlp() -> SimpleNLP:
+    """Shared engine instance (stateless, safe to reuse across requests)"""
+    global _shared_nlp
+    if _shared_nlp is None:
+        _shared_nlp = SimpleNLP()
+    return _shared_nlp
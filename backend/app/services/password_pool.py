@@ -0,0 +1,252 @@
+"""
+Password hashing on a bounded process pool
+
+bcrypt is deliberately slow, so hashing and verification run in a small
+pool of worker processes instead of on the request thread. At most
+PASSWORD_POOL_WORKERS + PASSWORD_POOL_QUEUE calls are admitted at once;
+beyond that callers get PoolSaturated straight away (the routes answer 503
+with Retry-After), so a login burst queues at the door instead of starving
+quiz traffic.
+
+A call that outlives PASSWORD_POOL_TIMEOUT raises PoolTimeout instead
+(504). Its hash keeps its worker and its admission slot until it finishes;
+stats() counts those as `stuck`, and state() (shown on /ready) tells a
+stuck worker from plain overload. If a worker dies (OOM kill, segfault), the
+broken pool is dropped and a new one is started on the next call.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+
+import bcrypt
+
+BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+PASSWORD_POOL_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', 2))
+PASSWORD_POOL_QUEUE = int(os.getenv('PASSWORD_POOL_QUEUE', 16))
+PASSWORD_POOL_TIMEOUT = float(os.getenv('PASSWORD_POOL_TIMEOUT', 10))
+PASSWORD_POOL_RETRY_AFTER = int(os.getenv('PASSWORD_POOL_RETRY_AFTER', 2))
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """No room in the password pool; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing pool is saturated')
+        self.retry_after = retry_after
+
+
+class PoolTimeout(Exception):
+    """A password call took longer than the pool timeout (a stuck or very slow worker)"""
+
+    def __init__(self, timeout):
+        super().__init__(f'Password hashing took longer than {timeout:g}s')
+        self.timeout = timeout
+
+
+# Worker functions (run in the pool processes)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(pw_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), pw_hash.encode('utf-8'))
+
+
+def _noop():
+    return None
+
+
+class PasswordPool:
+    """Size-limited process pool with admission control and latency stats"""
+
+    def __init__(self, workers=PASSWORD_POOL_WORKERS, queue=PASSWORD_POOL_QUEUE,
+                 rounds=BCRYPT_LOG_ROUNDS, timeout=PASSWORD_POOL_TIMEOUT,
+                 retry_after=PASSWORD_POOL_RETRY_AFTER):
+        self.workers = workers
+        self.capacity = workers + queue
+        self.rounds = rounds
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._slots = threading.BoundedSemaphore(max(self.capacity, 1))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._latencies = deque(maxlen=512)   # seconds, most recent calls
+        self._stuck = set()                   # timed-out futures still running in a worker
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # fork (where available) so workers don't re-import the entry script;
+                    # create_app() starts the pool before any background threads exist
+                    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(method)
+                    )
+        return self._executor
+
+    def start(self):
+        """Start the worker processes now rather than on the first login"""
+        if self.workers:
+            # With fork, the first submit launches every worker; no need to wait for it
+            self._get_executor().submit(_noop)
+        return self
+
+    def _drop_executor(self, broken):
+        """Forget a pool whose worker died; the next call starts a fresh one"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        logger.warning('Password pool broken (worker died), restarting it')
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        """(executor, future) for fn(*args), on a fresh pool if the current one is broken"""
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._drop_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args)
+
+    def ping(self):
+        """Round trip through a worker, starting the pool if needed"""
+        if not self.workers:
+            return
+        executor, future = self._submit(_noop)
+        try:
+            future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._drop_executor(executor)
+            self._submit(_noop)[1].result(timeout=self.timeout)
+
+    def _release(self, future=None):
+        with self._lock:
+            self.in_flight -= 1
+            self._stuck.discard(future)
+        self._slots.release()
+
+    def _run(self, fn, *args, retry=True):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(self.retry_after)
+
+        started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        future = None
+        try:
+            if not self.workers:
+                return fn(*args)
+            executor, future = self._submit(fn, *args)
+            # The slot is held until the work is done, not until the caller gives up:
+            # cancel() can't stop a hash that is already running in a worker
+            future.add_done_callback(self._release)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout:
+                # cancel() runs _release right away when the call hadn't started yet
+                future.cancel()
+                with self._lock:
+                    self.timed_out += 1
+                    if not future.done():
+                        self._stuck.add(future)
+                raise PoolTimeout(self.timeout)
+            except BrokenProcessPool:
+                # A worker died under this call (its slot is already released);
+                # hashing is safe to repeat, so try once more on a fresh pool
+                self._drop_executor(executor)
+                if not retry:
+                    raise
+        finally:
+            if future is None:
+                self._release()
+            with self._lock:
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - started)
+        return self._run(fn, *args, retry=False)
+
+    def hash_password(self, password) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def check_password(self, pw_hash, password) -> bool:
+        return self._run(_check, pw_hash, password)
+
+    def state(self) -> str:
+        """'stuck' (a timed-out call still holds a worker), 'saturated' (no free slot) or 'ok'"""
+        with self._lock:
+            if self._stuck:
+                return 'stuck'
+            return 'saturated' if self.in_flight >= self.capacity else 'ok'
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            in_flight = self.in_flight
+            stats = {
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'log_rounds': self.rounds,
+                'in_flight': in_flight,
+                'queue_depth': max(0, in_flight - self.workers),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'stuck': len(self._stuck),
+                'restarts': self.restarts
+            }
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else 0
+
+        stats['state'] = self.state()
+        stats['latency_ms'] = {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)}
+        return stats
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordPool()
+    return _pool
+
+
+def hash_password(password) -> str:
+    """bcrypt hash of `password` at BCRYPT_LOG_ROUNDS; raises PoolSaturated or PoolTimeout"""
+    return get_password_pool().hash_password(password)
+
+
+def check_password(pw_hash, password) -> bool:
+    """Verify `password` against a bcrypt hash; raises PoolSaturated or PoolTimeout"""
+    return get_password_pool().check_password(pw_hash, password)
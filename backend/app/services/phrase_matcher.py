@@ -0,0 +1,82 @@
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Patterns are phrases of one or more words. Matching walks the token
+    list once, so the cost depends on the text length and not on how many
+    phrases were added. Working on tokens instead of characters means a
+    match always starts and ends on a word boundary.
+    """
+
+    def __init__(self):
+        self._goto = [{}]       # state -> {token: next state}
+        self._fail = [0]        # state -> fallback state
+        self._out = [[]]        # state -> [(phrase length, value), ...]
+        self._compiled = False
+
+    def add(self, phrase, value):
+        """Add a phrase (string or token sequence) that reports `value`"""
+        if self._compiled:
+            raise RuntimeError("PhraseMatcher is already compiled")
+        tokens = phrase.split() if isinstance(phrase, str) else list(phrase)
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(tokens), value))
+
+    def compile(self):
+        """Build failure links (breadth-first) and merge outputs"""
+        if self._compiled:
+            return self
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._compiled = True
+        return self
+
+    def find(self, tokens):
+        """Return (start, end, value) for every phrase occurring in tokens"""
+        if not self._compiled:
+            self.compile()
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, value in out[state]:
+                matches.append((i - length + 1, i + 1, value))
+        return matches
+
+
+def leftmost_longest(matches):
+    """Non-overlapping subset of find() results, preferring earlier then longer phrases
+
+    "software engineer" keeps the two-word match and drops the "software"
+    and "engineer" inside it. Matches of the same span all survive.
+    """
+    kept = []
+    end = 0
+    for start, stop, value in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+        if start >= end:
+            kept.append((start, stop, value))
+            end = stop
+        elif kept and (start, stop) == kept[-1][:2]:
+            kept.append((start, stop, value))
+    return kept
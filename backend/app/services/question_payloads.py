@@ -0,0 +1,58 @@
+import gzip
+import hashlib
+import json
+import threading
+
+from app.services.question_bank import SSC_QUESTIONS, HSC_QUESTIONS
+
+QUESTIONS_BY_MODE = {
+    'ssc': SSC_QUESTIONS,
+    'hsc': HSC_QUESTIONS
+}
+
+
+def clean_questions(questions):
+    """Remove lambda functions from questions"""
+    cleaned = []
+    for q in questions:
+        clean_q = {
+            'id': q.get('id'),
+            'text': q.get('text'),
+            'type': q.get('type'),
+        }
+        if 'options' in q:
+            clean_q['options'] = q['options']
+        cleaned.append(clean_q)
+    return cleaned
+
+
+class QuestionPayload:
+    """A mode's cleaned question list, encoded once as JSON and gzip"""
+
+    def __init__(self, questions):
+        self.body = json.dumps(clean_questions(questions), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+_payloads = None
+_payloads_lock = threading.Lock()
+
+
+def build_question_payloads():
+    """Encode every mode's payload once (the question bank never changes at runtime)
+
+    Built aside and published whole, so a request racing the warmup thread
+    never sees a partly built set.
+    """
+    global _payloads
+    if _payloads is None:
+        with _payloads_lock:
+            if _payloads is None:
+                _payloads = {mode: QuestionPayload(questions) for mode, questions in QUESTIONS_BY_MODE.items()}
+    return _payloads
+
+
+def get_question_payload(mode):
+    """Pre-encoded payload for a mode, or None for an unknown mode"""
+    return build_question_payloads().get(mode)
@@ -1,4 +1,15 @@
+import hashlib
+import json
+import logging
+import os
 from collections import defaultdict
+from types import MappingProxyType
+
+from app.services.cache import LRUCache
+from app.services.nlp_engine import get_nlp
+from app.services.question_bank import QUESTION_SETS
+
+logger = logging.getLogger(__name__)
 
 STREAM_PROFILES = {
     'Science_PCM': {
@@ -63,139 +74,329 @@ STREAM_PROFILES = {
 }
 
 
+STREAMS = tuple(STREAM_PROFILES)
+
+# Declarative scoring table: question id -> option text -> contribution.
+# Keys must match the ids and options in question_bank.QUESTION_SETS.
+# '*' applies when the question is unanswered or the option is unknown.
+SCORING_RULES = {
+    # SSC specific
+    'diploma_interest': {
+        'Yes — Diploma/Polytechnic': {'scores': {'Diploma': 3.0}, 'trait': 'Practical & Hands-on'},
+        '*': {'scores': {'Science_PCM': 0.5, 'Science_PCB': 0.5, 'Commerce': 0.5, 'Arts': 0.5}},
+    },
+    'fav_subject': {
+        'Mathematics': {'scores': {'Science_PCM': 2.5, 'Commerce': 1.0}, 'strength': 'Mathematical Thinking'},
+        'Physics/Chemistry': {'scores': {'Science_PCM': 2.0, 'Science_PCB': 1.5}, 'strength': 'Scientific Aptitude'},
+        'Biology': {'scores': {'Science_PCB': 3.0}, 'strength': 'Biological Sciences'},
+        'Computer/CS': {'scores': {'Science_PCM': 2.0}, 'strength': 'Technology & Computing'},
+        'Commerce/Accounts': {'scores': {'Commerce': 3.0}, 'strength': 'Business Acumen'},
+        'History/Geography': {'scores': {'Arts': 2.5}, 'strength': 'Humanities & Social Sciences'},
+        'Languages': {'scores': {'Arts': 2.5}, 'strength': 'Humanities & Social Sciences'},
+        'Arts/Music': {'scores': {'Arts': 2.5}, 'strength': 'Humanities & Social Sciences'},
+    },
+    'hobby': {
+        'Solving puzzles/coding': {'scores': {'Science_PCM': 1.5, 'Diploma': 1.0}, 'trait': 'Analytical Problem Solver'},
+        'Building/fixing things': {'scores': {'Science_PCM': 1.5, 'Diploma': 1.0}, 'trait': 'Analytical Problem Solver'},
+        'Helping people/volunteering': {'scores': {'Science_PCB': 1.5, 'Arts': 1.0}, 'trait': 'Empathetic Helper'},
+        'Drawing/designing': {'scores': {'Arts': 1.5}, 'trait': 'Creative Thinker'},
+    },
+    'study_style': {
+        'Doing practical work': {'scores': {'Diploma': 1.0, 'Science_PCM': 0.5}},
+        'Watching videos': {'scores': {'Arts': 0.5}},
+    },
+    'strength': {
+        'Numbers & logic': {'scores': {'Science_PCM': 1.0}, 'trait': 'Logical Thinker'},
+        'Problem-solving': {'scores': {'Science_PCM': 1.0}, 'trait': 'Logical Thinker'},
+        'Communication': {'scores': {'Arts': 1.0, 'Commerce': 0.5}, 'trait': 'Great Communicator'},
+        'Creative thinking': {'scores': {'Arts': 1.0}, 'trait': 'Creative Mind'},
+        'Leadership': {'scores': {'Commerce': 1.0}, 'trait': 'Natural Leader'},
+        'Hands-on work': {'scores': {'Science_PCM': 1.0, 'Diploma': 0.5}, 'trait': 'Tech Savvy'},
+    },
+
+    # HSC specific
+    'stream': {
+        'Science (PCM)': {'scores': {'Science_PCM': 3.0}},
+        'Science (PCB)': {'scores': {'Science_PCB': 3.0}},
+        'Commerce': {'scores': {'Commerce': 3.0}},
+        'Arts/Humanities': {'scores': {'Arts': 3.0}},
+    },
+    'interest_area': {
+        'Technology & Innovation': {'scores': {'Science_PCM': 2.0}},
+        'Healthcare & Medicine': {'scores': {'Science_PCB': 2.5}},
+        'Business & Entrepreneurship': {'scores': {'Commerce': 2.0}},
+        'Creative Arts & Design': {'scores': {'Arts': 1.5}},
+        'Social Sciences & Law': {'scores': {'Arts': 2.0, 'Commerce': 1.0}},
+        'Government & Public Service': {'scores': {'Arts': 2.0, 'Commerce': 1.0}},
+    },
+}
+
+# Subjects detected in free-text answers
+SUBJECT_RULES = {
+    'Mathematics': {'Science_PCM': 0.8},
+    'Physics': {'Science_PCM': 0.8},
+    'Chemistry': {'Science_PCM': 0.8},
+    'Computer Science': {'Science_PCM': 0.8},
+    'Biology': {'Science_PCB': 0.8},
+    'Commerce': {'Commerce': 0.8},
+    'Accountancy': {'Commerce': 0.8},
+    'Economics': {'Commerce': 0.8},
+    'History': {'Arts': 0.8},
+    'Geography': {'Arts': 0.8},
+    'Arts': {'Arts': 0.8},
+}
+
+# Free-text questions fed through the NLP engine
+FREE_TEXT_FIELDS = ('dream_job', 'future_vision', 'favorite_subject_hsc', 'skill_dev', 'final_message')
+POSITIVE_SENTIMENT = 0.3
+POSITIVE_BONUS = 0.3
+
+
+def _weight_row(weights):
+    unknown = set(weights) - set(STREAMS)
+    if unknown:
+        raise ValueError(f"Unknown stream(s) in scoring rules: {sorted(unknown)}")
+    return tuple(float(weights.get(stream, 0.0)) for stream in STREAMS)
+
+
+def validate_rules(rules, question_sets):
+    """Return rule keys that match no question/option in the question banks"""
+    options_by_id = defaultdict(set)
+    for questions in question_sets.values():
+        for q in questions:
+            options_by_id[q['id']].update(q.get('options', []))
+
+    problems = []
+    for question_id, options in rules.items():
+        if question_id not in options_by_id:
+            problems.append(f"'{question_id}' matches no question")
+            continue
+        for option in options:
+            if option != '*' and option not in options_by_id[question_id]:
+                problems.append(f"'{question_id}' has no option '{option}'")
+    return problems
+
+
+class CompiledRules:
+    """Scoring rules compiled into a dense (option x stream) weight matrix"""
+
+    def __init__(self, rules, subject_rules, question_sets):
+        self.streams = STREAMS
+        self.rows = []          # one weight vector per (question, option)
+        self.index = {}         # question id -> {option: row}
+        self.fallback = {}      # question id -> row used for '*'
+        self.traits = {}        # row -> personality trait
+        self.strengths = {}     # row -> strength
+        self.zero = (0.0,) * len(STREAMS)
+
+        for question_id, options in rules.items():
+            option_rows = {}
+            for option, rule in options.items():
+                row = len(self.rows)
+                self.rows.append(_weight_row(rule.get('scores', {})))
+                if rule.get('trait'):
+                    self.traits[row] = rule['trait']
+                if rule.get('strength'):
+                    self.strengths[row] = rule['strength']
+                if option == '*':
+                    self.fallback[question_id] = row
+                else:
+                    option_rows[option] = row
+            self.index[question_id] = option_rows
+
+        self.subject_rows = {subject: _weight_row(weights) for subject, weights in subject_rules.items()}
+        # Totals with every question unanswered (all '*' rows)
+        self.base = tuple(self.totals(self.fallback.values()))
+        self.unmatched = validate_rules(rules, question_sets)
+
+    def lookup(self, answers):
+        """Map an answer dict to the matrix rows it selects"""
+        rows = []
+        for question_id, option_rows in self.index.items():
+            answer = answers.get(question_id)
+            row = option_rows.get(answer) if isinstance(answer, str) else None
+            if row is None:
+                row = self.fallback.get(question_id)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def totals(self, rows, extra=()):
+        """Column sums of the selected rows"""
+        vectors = [self.rows[r] for r in rows]
+        vectors.extend(extra)
+        if not vectors:
+            return list(self.zero)
+        return [sum(column) for column in zip(*vectors)]
+
+
+COMPILED_RULES = CompiledRules(SCORING_RULES, SUBJECT_RULES, QUESTION_SETS)
+for _problem in COMPILED_RULES.unmatched:
+    logger.warning('Scoring rule %s', _problem)
+
+
+# Static parts of each stream's detailed analysis
+CAREER_ROADMAPS = {
+    'Science_PCM': (
+        "Year 1-2: Focus on JEE preparation, build strong foundation in PCM",
+        "Year 3-4: Engineering college, participate in hackathons and projects",
+        "Year 5+: Internships, specialization, job placements or higher studies"
+    ),
+    'Science_PCB': (
+        "Year 1: Intensive NEET preparation, master Biology concepts",
+        "Year 2-6: Medical college (MBBS) or other health programs",
+        "Year 7+: Specialization, practice, or research opportunities"
+    ),
+    'Commerce': (
+        "Year 1-2: Build accounting and economics foundation",
+        "Year 3-5: CA/BBA/B.Com with internships in firms",
+        "Year 6+: Professional certification, corporate roles, or entrepreneurship"
+    ),
+    'Arts': (
+        "Year 1-2: Develop writing, research, and analytical skills",
+        "Year 3-5: BA/BBA with internships in media, NGOs, or government",
+        "Year 6+: Masters, UPSC preparation, or specialized roles"
+    )
+}
+
+CHALLENGES = {
+    'Science_PCM': (
+        "High competition in engineering entrance exams",
+        "Requires strong mathematical and analytical skills",
+        "Long study hours and intensive preparation needed"
+    ),
+    'Science_PCB': (
+        "Extremely competitive medical entrance (NEET)",
+        "Long duration of medical education (5.5+ years)",
+        "High emotional resilience required in healthcare"
+    ),
+    'Commerce': (
+        "CA exams have low pass rates, require dedication",
+        "Rapidly changing business environment",
+        "Need to stay updated with financial regulations"
+    ),
+    'Arts': (
+        "Perception issues about career prospects in arts",
+        "Requires excellent communication and research skills",
+        "UPSC and similar exams are highly competitive"
+    )
+}
+
+
+class StreamTemplate:
+    """The parts of a stream's result that don't depend on the answers, built once"""
+
+    def __init__(self, stream, profile):
+        self.profile = MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in profile.items()})
+        self.summary = f"Based on your responses, you show strong alignment with {profile['title']}."
+        # Streams without their own roadmap/challenges get the Arts ones
+        self.career_roadmap = CAREER_ROADMAPS.get(stream, CAREER_ROADMAPS['Arts'])
+        self.challenges = CHALLENGES.get(stream, CHALLENGES['Arts'])
+        self.next_steps = (
+            f"Research top colleges offering {profile['title']} programs",
+            f"Start preparing for {', '.join(profile['exams'][:2])}",
+            "Connect with professionals in your field of interest through LinkedIn",
+            "Join relevant online communities and forums"
+        )
+        self.opportunities = (
+            f"Growing demand in {', '.join(profile['careers'][:3])}",
+            "International career prospects available",
+            "Option for entrepreneurship and innovation",
+            "Continuous learning and skill development opportunities"
+        )
+
+
+TEMPLATES = MappingProxyType({stream: StreamTemplate(stream, profile) for stream, profile in STREAM_PROFILES.items()})
+
+# Memoized analyze() results keyed by StreamAnalyzer.fingerprint()
+ANALYSIS_CACHE = LRUCache(
+    max_entries=int(os.getenv('ANALYSIS_CACHE_ENTRIES', 4096)),
+    max_bytes=int(os.getenv('ANALYSIS_CACHE_BYTES', 16 * 1024 * 1024))
+)
+
+
+# Below this a live total is float noise from adding and removing deltas
+LIVE_EPSILON = 1e-9
+
+
 class StreamAnalyzer:
 
-    def __init__(self, nlp_engine):
+    def __init__(self, nlp_engine, rules=COMPILED_RULES, cache=ANALYSIS_CACHE):
+        """`cache` memoizes analyze(); pass None to disable it, or a separate
+        LRUCache when using other rules or another NLP engine"""
         self.nlp = nlp_engine
+        self.rules = rules
+        self.cache = cache
+        # Every answer field score() and generate_analysis() read
+        self.option_fields = tuple(sorted(set(rules.index) | {'fav_subject', 'hobby'}))
+        self.text_fields = FREE_TEXT_FIELDS
+
+    def fingerprint(self, answers: dict) -> bytes:
+        """Digest of the answers as the analyzer sees them.
+
+        Only the fields it reads count. Free text is reduced to its
+        normalized tokens (what the NLP engine works from), so answer sets
+        that differ only in case, punctuation or unrelated fields share a
+        fingerprint.
+        """
+        canonical = [answers.get(field) if isinstance(answers.get(field), str) else None
+                     for field in self.option_fields]
+        for field in self.text_fields:
+            text = answers.get(field)
+            canonical.append(' '.join(self.nlp.normalize(text).split()) if isinstance(text, str) else '')
+        return hashlib.blake2b(repr(canonical).encode('utf-8'), digest_size=16).digest()
+
+    def score(self, answers: dict) -> tuple:
+        """Score answers against the compiled weight matrix.
+
+        Returns (scores, personality_traits, strengths) where scores maps
+        every stream that received weight to its total.
+        """
+        rules = self.rules
+        rows = rules.lookup(answers)
+        personality_traits = [rules.traits[r] for r in rows if r in rules.traits]
+        strengths = [rules.strengths[r] for r in rows if r in rules.strengths]
+
+        # NLP over free-text answers
+        extra = []
+        positive = False
+        for field in FREE_TEXT_FIELDS:
+            text = answers.get(field)
+            if not isinstance(text, str) or not text.strip():
+                continue
+            doc = self.nlp.parse(text)
+            if self.nlp.sentiment_score(doc) > POSITIVE_SENTIMENT:
+                positive = True
+            for subject in self.nlp.detect_subjects(doc):
+                if subject in rules.subject_rows:
+                    extra.append(rules.subject_rows[subject])
+
+        totals = rules.totals(rows, extra)
+        scores = {stream: total for stream, total in zip(rules.streams, totals) if total}
+        if positive:
+            for stream in scores:
+                scores[stream] += POSITIVE_BONUS
+        return scores, personality_traits, strengths
 
     def analyze(self, answers: dict) -> dict:
-        scores = defaultdict(float)
-        personality_traits = []
-        strengths = []
-
-        # SSC specific
-        if answers.get('diploma_interest', '').startswith('Yes'):
-            scores['Diploma'] += 3.0
-            personality_traits.append('Practical & Hands-on')
-        else:
-            scores['Science_PCM'] += 0.5
-            scores['Science_PCB'] += 0.5
-            scores['Commerce'] += 0.5
-            scores['Arts'] += 0.5
+        """Recommendation for an answer set, memoized by fingerprint.
 
-        # Favorite subject mapping
-        fav = answers.get('fav_subject', '')
-        if 'Math' in fav:
-            scores['Science_PCM'] += 2.5
-            scores['Commerce'] += 1.0
-            strengths.append('Mathematical Thinking')
-        elif 'Physics' in fav or 'Chemistry' in fav:
-            scores['Science_PCM'] += 2.0
-            scores['Science_PCB'] += 1.5
-            strengths.append('Scientific Aptitude')
-        elif 'Biology' in fav:
-            scores['Science_PCB'] += 3.0
-            strengths.append('Biological Sciences')
-        elif 'Computer' in fav:
-            scores['Science_PCM'] += 2.0
-            strengths.append('Technology & Computing')
-        elif 'Commerce' in fav or 'Account' in fav:
-            scores['Commerce'] += 3.0
-            strengths.append('Business Acumen')
-        elif 'History' in fav or 'Geography' in fav or 'Language' in fav or 'Arts' in fav:
-            scores['Arts'] += 2.5
-            strengths.append('Humanities & Social Sciences')
-
-        # Work style influence
-        work_style = answers.get('work_style', '')
-        if 'Problem-solving' in work_style or 'building' in work_style:
-            scores['Science_PCM'] += 1.5
-            scores['Diploma'] += 1.0
-            personality_traits.append('Analytical Problem Solver')
-        elif 'Helping people' in work_style:
-            scores['Science_PCB'] += 1.5
-            scores['Arts'] += 1.0
-            personality_traits.append('Empathetic Helper')
-        elif 'Creative' in work_style:
-            scores['Arts'] += 1.5
-            personality_traits.append('Creative Thinker')
-        elif 'Managing' in work_style:
-            scores['Commerce'] += 1.5
-            personality_traits.append('Strategic Organizer')
-
-        # Learning style analysis
-        learning = answers.get('learning_style', '')
-        if 'Hands-on' in learning:
-            scores['Diploma'] += 1.0
-            scores['Science_PCM'] += 0.5
-        elif 'Visual' in learning:
-            scores['Arts'] += 0.5
-
-        # Strength analysis
-        strength = answers.get('strength', '')
-        if 'Logical' in strength:
-            scores['Science_PCM'] += 1.0
-            personality_traits.append('Logical Thinker')
-        elif 'Communication' in strength:
-            scores['Arts'] += 1.0
-            scores['Commerce'] += 0.5
-            personality_traits.append('Great Communicator')
-        elif 'Creativity' in strength:
-            scores['Arts'] += 1.0
-            personality_traits.append('Creative Mind')
-        elif 'Leadership' in strength:
-            scores['Commerce'] += 1.0
-            personality_traits.append('Natural Leader')
-        elif 'Technical' in strength:
-            scores['Science_PCM'] += 1.0
-            scores['Diploma'] += 0.5
-            personality_traits.append('Tech Savvy')
-
-        # HSC specific
-        current_stream = answers.get('current_stream', '')
-        if 'PCM' in current_stream:
-            scores['Science_PCM'] += 3.0
-        elif 'PCB' in current_stream:
-            scores['Science_PCB'] += 3.0
-        elif 'Commerce' in current_stream:
-            scores['Commerce'] += 3.0
-        elif 'Arts' in current_stream or 'Humanities' in current_stream:
-            scores['Arts'] += 3.0
-
-        # Career field preference (HSC only)
-        career_field = answers.get('career_field', '')
-        if 'Engineering' in career_field or 'Tech' in career_field:
-            scores['Science_PCM'] += 2.0
-        elif 'Medical' in career_field or 'Healthcare' in career_field:
-            scores['Science_PCB'] += 2.5
-        elif 'Business' in career_field or 'Finance' in career_field:
-            scores['Commerce'] += 2.0
-        elif 'Creative' in career_field or 'Design' in career_field:
-            scores['Arts'] += 1.5
-        elif 'Law' in career_field or 'Civil Services' in career_field:
-            scores['Arts'] += 2.0
-            scores['Commerce'] += 1.0
-
-        # NLP sentiment analysis
-        free_time_text = str(answers.get('free_time', ''))
-        sentiment = self.nlp.sentiment_score(free_time_text)
-        # If you have a detect_subjects method, use it here
-        subjects_found = []
-        if hasattr(self.nlp, "detect_subjects"):
-            subjects_found = self.nlp.detect_subjects(free_time_text)
-        for subj in subjects_found:
-            if subj in ['Mathematics', 'Physics', 'Chemistry', 'Computer Science']:
-                scores['Science_PCM'] += 0.8
-            elif subj == 'Biology':
-                scores['Science_PCB'] += 0.8
-            elif subj in ['Commerce', 'Accountancy', 'Economics']:
-                scores['Commerce'] += 0.8
-            elif subj in ['History', 'Geography', 'Arts']:
-                scores['Arts'] += 0.8
-        if sentiment > 0.3:
-            for key in scores:
-                scores[key] += 0.3
+        Cached results are shared between callers: treat them as read-only.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.fingerprint(answers)
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+
+        result = self.recommendation(answers, *self.score(answers))
+        if key is not None:
+            self.cache.set(key, result, size=len(key) + len(json.dumps(result, ensure_ascii=False)))
+        return result
 
+    def recommendation(self, answers, scores, personality_traits, strengths) -> dict:
+        """Build the result for already computed scores, traits and strengths"""
         # Calculate confidence score
         total_score = sum(scores.values())
         max_score = max(scores.values()) if scores else 0
@@ -207,9 +408,9 @@ class StreamAnalyzer:
         else:
             top_stream = max(scores, key=scores.get)
 
-        result = STREAM_PROFILES.get(top_stream, {}).copy()
+        result = dict(TEMPLATES[top_stream].profile)
         result['confidence'] = round(confidence, 1)
-        result['all_scores'] = dict(scores)
+        result['all_scores'] = scores
         result['personality_traits'] = personality_traits[:3] if personality_traits else ['Enthusiastic Learner']
         result['strengths'] = strengths[:3] if strengths else ['Quick Learner']
 
@@ -217,99 +418,153 @@ class StreamAnalyzer:
         result['detailed_analysis'] = self.generate_analysis(answers, top_stream, confidence)
         return result
 
+    # Live scoring: each saved answer stores its own share of score() with
+    # the session ({question_id: contribution} in quiz_sessions.live_scores),
+    # so the totals are rules.base plus the sum of at most one contribution
+    # per question, whatever order the answers arrived in or were changed.
+
+    def contribution(self, question_id, answer):
+        """One answer's share of score(), or None if the question isn't scored.
+
+        {'scores': {stream: delta}} relative to rules.base, plus 'trait' and
+        'strength' for option questions and 'positive' for free text.
+        """
+        rules = self.rules
+        if question_id in rules.index:
+            fallback = rules.fallback.get(question_id)
+            row = rules.index[question_id].get(answer) if isinstance(answer, str) else None
+            if row is None:
+                row = fallback
+            if row is None:
+                # Scored question, but this answer adds nothing
+                return {'scores': {}}
+            weights = rules.rows[row]
+            if fallback is not None:
+                # rules.base already counts the '*' row
+                weights = [w - f for w, f in zip(weights, rules.rows[fallback])]
+            result = {'scores': {s: w for s, w in zip(rules.streams, weights) if w}}
+            if row in rules.traits:
+                result['trait'] = rules.traits[row]
+            if row in rules.strengths:
+                result['strength'] = rules.strengths[row]
+            return result
+
+        if question_id in self.text_fields:
+            if not isinstance(answer, str) or not answer.strip():
+                # Still sent, so it replaces what an earlier answer contributed
+                return {'scores': {}, 'positive': False}
+            doc = self.nlp.parse(answer)
+            subject_rows = [rules.subject_rows[s] for s in self.nlp.detect_subjects(doc) if s in rules.subject_rows]
+            totals = rules.totals((), subject_rows)
+            return {
+                'scores': {s: w for s, w in zip(rules.streams, totals) if w},
+                'positive': self.nlp.sentiment_score(doc) > POSITIVE_SENTIMENT
+            }
+        return None
+
+    def contributions(self, answers: dict) -> dict:
+        """{question_id: contribution} for the scored answers in `answers`"""
+        result = {}
+        for question_id, answer in answers.items():
+            contribution = self.contribution(question_id, answer)
+            if contribution is not None:
+                result[question_id] = contribution
+        return result
+
+    def is_live(self, answers: dict, live: dict) -> bool:
+        """True if `live` has a contribution for every scored answer"""
+        return all(question_id in live for question_id, answer in answers.items()
+                   if question_id in self.rules.index
+                   or (question_id in self.text_fields and isinstance(answer, str) and answer.strip()))
+
+    def live_score(self, live: dict) -> tuple:
+        """score() from stored contributions instead of the answers"""
+        rules = self.rules
+        totals = list(rules.base)
+        positive = False
+        for contribution in live.values():
+            for stream, delta in contribution.get('scores', {}).items():
+                totals[rules.streams.index(stream)] += delta
+            positive = positive or contribution.get('positive', False)
+
+        # Traits and strengths in rule order, unanswered questions using '*'
+        personality_traits, strengths = [], []
+        for question_id in rules.index:
+            contribution = live.get(question_id)
+            if contribution is None:
+                row = rules.fallback.get(question_id)
+                contribution = {'trait': rules.traits.get(row), 'strength': rules.strengths.get(row)}
+            if contribution.get('trait'):
+                personality_traits.append(contribution['trait'])
+            if contribution.get('strength'):
+                strengths.append(contribution['strength'])
+
+        scores = {stream: total for stream, total in zip(rules.streams, totals) if abs(total) > LIVE_EPSILON}
+        for stream in scores:
+            scores[stream] = round(scores[stream] + (POSITIVE_BONUS if positive else 0), 9)
+        return scores, personality_traits, strengths
+
+    def current_scores(self, answers: dict, live: dict) -> dict:
+        """Stream scores so far; sessions saved before live scoring are rescored"""
+        if self.is_live(answers, live):
+            return self.live_score(live)[0]
+        return self.score(answers)[0]
+
+    def recommend(self, answers: dict, live: dict) -> dict:
+        """Final result from the live contributions, falling back to analyze()"""
+        if self.is_live(answers, live):
+            return self.recommendation(answers, *self.live_score(live))
+        return self.analyze(answers)
+
+    @staticmethod
+    def leaning(scores: dict, top=3) -> list:
+        """The `top` streams with their share of the total score"""
+        total = sum(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [{
+            'stream': stream,
+            'title': STREAM_PROFILES[stream]['title'],
+            'score': round(score, 2),
+            'share': round(score / total * 100, 1) if total > 0 else 0
+        } for stream, score in ranked]
+
     def generate_analysis(self, answers, stream, confidence):
         """Generate detailed personality and career analysis"""
-        analysis = {
-            'summary': f"Based on your responses, you show strong alignment with {STREAM_PROFILES[stream]['title']}.",
-            'why_recommended': [],
-            'career_roadmap': [],
-            'next_steps': [],
-            'challenges': [],
-            'opportunities': []
-        }
+        template = TEMPLATES[stream]
 
         # Why recommended
+        why_recommended = []
         fav = answers.get('fav_subject', '')
         if stream == 'Science_PCM' and 'Math' in fav:
-            analysis['why_recommended'].append("Your love for Mathematics aligns perfectly with engineering and technology careers")
+            why_recommended.append("Your love for Mathematics aligns perfectly with engineering and technology careers")
         elif stream == 'Science_PCB' and 'Biology' in fav:
-            analysis['why_recommended'].append("Your interest in Biology opens doors to medical and life sciences")
+            why_recommended.append("Your interest in Biology opens doors to medical and life sciences")
         elif stream == 'Commerce' and 'Commerce' in fav:
-            analysis['why_recommended'].append("Your business aptitude makes you ideal for commerce and finance")
+            why_recommended.append("Your business aptitude makes you ideal for commerce and finance")
         elif stream == 'Arts':
-            analysis['why_recommended'].append("Your creative and analytical thinking suits humanities perfectly")
-        work_style = answers.get('work_style', '')
-        if 'Problem-solving' in work_style:
-            analysis['why_recommended'].append("Your problem-solving nature is crucial for technical fields")
-        elif 'Helping' in work_style:
-            analysis['why_recommended'].append("Your people-oriented approach fits healthcare and social sectors")
-
-        # Career roadmap
-        if stream == 'Science_PCM':
-            analysis['career_roadmap'] = [
-                "Year 1-2: Focus on JEE preparation, build strong foundation in PCM",
-                "Year 3-4: Engineering college, participate in hackathons and projects",
-                "Year 5+: Internships, specialization, job placements or higher studies"
-            ]
-        elif stream == 'Science_PCB':
-            analysis['career_roadmap'] = [
-                "Year 1: Intensive NEET preparation, master Biology concepts",
-                "Year 2-6: Medical college (MBBS) or other health programs",
-                "Year 7+: Specialization, practice, or research opportunities"
-            ]
-        elif stream == 'Commerce':
-            analysis['career_roadmap'] = [
-                "Year 1-2: Build accounting and economics foundation",
-                "Year 3-5: CA/BBA/B.Com with internships in firms",
-                "Year 6+: Professional certification, corporate roles, or entrepreneurship"
-            ]
-        else:
-            analysis['career_roadmap'] = [
-                "Year 1-2: Develop writing, research, and analytical skills",
-                "Year 3-5: BA/BBA with internships in media, NGOs, or government",
-                "Year 6+: Masters, UPSC preparation, or specialized roles"
-            ]
-
-        # Next steps
-        analysis['next_steps'] = [
-            f"Research top colleges offering {STREAM_PROFILES[stream]['title']} programs",
-            f"Start preparing for {', '.join(STREAM_PROFILES[stream]['exams'][:2])}",
-            "Connect with professionals in your field of interest through LinkedIn",
-            "Join relevant online communities and forums"
-        ]
-
-        # Challenges
-        if stream == 'Science_PCM':
-            analysis['challenges'] = [
-                "High competition in engineering entrance exams",
-                "Requires strong mathematical and analytical skills",
-                "Long study hours and intensive preparation needed"
-            ]
-        elif stream == 'Science_PCB':
-            analysis['challenges'] = [
-                "Extremely competitive medical entrance (NEET)",
-                "Long duration of medical education (5.5+ years)",
-                "High emotional resilience required in healthcare"
-            ]
-        elif stream == 'Commerce':
-            analysis['challenges'] = [
-                "CA exams have low pass rates, require dedication",
-                "Rapidly changing business environment",
-                "Need to stay updated with financial regulations"
-            ]
-        else:
-            analysis['challenges'] = [
-                "Perception issues about career prospects in arts",
-                "Requires excellent communication and research skills",
-                "UPSC and similar exams are highly competitive"
-            ]
-
-        # Opportunities
-        analysis['opportunities'] = [
-            f"Growing demand in {', '.join(STREAM_PROFILES[stream]['careers'][:3])}",
-            "International career prospects available",
-            "Option for entrepreneurship and innovation",
-            "Continuous learning and skill development opportunities"
-        ]
+            why_recommended.append("Your creative and analytical thinking suits humanities perfectly")
+        hobby = answers.get('hobby', '')
+        if 'puzzles' in hobby or 'Building' in hobby:
+            why_recommended.append("Your problem-solving nature is crucial for technical fields")
+        elif 'Helping' in hobby:
+            why_recommended.append("Your people-oriented approach fits healthcare and social sectors")
+
+        return {
+            'summary': template.summary,
+            'why_recommended': why_recommended,
+            'career_roadmap': template.career_roadmap,
+            'next_steps': template.next_steps,
+            'challenges': template.challenges,
+            'opportunities': template.opportunities
+        }
+
+
+_shared_analyzer = None
+
 
-        return analysis
\ No newline at end of file
+def get_analyzer() -> StreamAnalyzer:
+    """Shared analyzer over the shared NLP engine"""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        _shared_analyzer = StreamAnalyzer(get_nlp())
+    return _shared_analyzer
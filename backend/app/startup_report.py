@@ -0,0 +1,156 @@
+"""
+Cold-start report: `python run.py --startup-report [--asgi] [--top N]`
+
+1. Imports the app and calls create_app() in a fresh interpreter under
+   `python -X importtime`, printing the slowest top-level imports and the
+   time spent in create_app().
+2. Starts `python run.py` as a real server and measures the time from
+   process start to the first served request and to /ready (with each
+   warmup component's time), plus the first hit on each route in
+   FIRST_REQUESTS.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+FIRST_REQUESTS = ['/api/questions/ssc', '/api/quiz/history?user_id=startup-report']
+
+_PROBE = (
+    "import json, time\n"
+    "t0 = time.perf_counter()\n"
+    "from app import create_app\n"
+    "t1 = time.perf_counter()\n"
+    "create_app()\n"
+    "t2 = time.perf_counter()\n"
+    "print('STARTUP ' + json.dumps({'import': t1 - t0, 'create_app': t2 - t1}))\n"
+)
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from `-X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_profile(top):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    timings = {}
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            timings = json.loads(line[len('STARTUP '):])
+    if not timings:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise RuntimeError('App failed to start under -X importtime')
+
+    # importtime lists children before their parent: group depth-1 rows under
+    # the next depth-0 (top-level) import, keeping the app's own modules
+    groups, children = [], []
+    for name, _, cumulative_us, depth in parse_importtime(result.stderr):
+        if depth == 0:
+            if name.split('.')[0] == 'app':
+                groups.append((cumulative_us, name, sorted(children, reverse=True)[:3]))
+            children = []
+        elif depth == 1:
+            children.append((cumulative_us, name))
+    groups.sort(reverse=True)
+
+    print("📦 Imports (python -X importtime, cumulative)")
+    for cumulative_us, name, heaviest in groups[:top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+        for child_us, child in heaviest:
+            print(f"   {child_us / 1000:8.1f} ms      {child}")
+    print(f"   {timings['import'] * 1000:8.1f} ms  total `from app import create_app`")
+    print(f"   {timings['create_app'] * 1000:8.1f} ms  create_app()")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(url):
+    """(status, body) for a GET"""
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _wait_ready(base_url, started, timeout=30):
+    """Poll /ready until it answers 200, every component has had a first
+    attempt, or `timeout` seconds pass"""
+    while True:
+        status, body = _get(base_url + '/ready')
+        report = json.loads(body)
+        settled = all(c['status'] in ('ready', 'failed') for c in report['components'].values())
+        if status == 200 or settled or time.perf_counter() - started > timeout:
+            return status, report
+        time.sleep(0.05)
+
+
+def first_request(asgi):
+    port = _free_port()
+    args = [sys.executable, 'run.py'] + (['--asgi'] if asgi else [])
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        args, cwd=BACKEND_DIR, env=dict(os.environ, PORT=str(port)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'Server exited with code {process.returncode}')
+            try:
+                status, _ = _get(base_url + '/health')
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError('Server did not answer within 60s')
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        print(f"🚀 First request ({'asgi' if asgi else 'wsgi'})")
+        print(f"   {ready * 1000:8.1f} ms  process start -> GET /health ({status})")
+
+        status, report = _wait_ready(base_url, started)
+        warm = time.perf_counter() - started
+        print(f"   {warm * 1000:8.1f} ms  process start -> GET /ready ({status})")
+        for name, component in report['components'].items():
+            error = f"  {component['error'].splitlines()[0]}" if component.get('error') else ''
+            print(f"   {component.get('ms', 0):8.1f} ms      {name} ({component['status']}){error}")
+
+        for path in FIRST_REQUESTS:
+            t = time.perf_counter()
+            status, _ = _get(base_url + path)
+            print(f"   {(time.perf_counter() - t) * 1000:8.1f} ms  first GET {path} ({status})")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    top = int(argv[argv.index('--top') + 1]) if '--top' in argv else 15
+    import_profile(top)
+    first_request(asgi='--asgi' in argv)
+    return 0
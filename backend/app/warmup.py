@@ -0,0 +1,141 @@
+"""
+Boot-time warmup and readiness
+
+create_app() starts a background thread that builds everything the first
+student would otherwise pay for: the pooled database connection, the
+encoded question payloads, the NLP phrase automaton and scoring rules, and
+the password hashing workers. GET /ready reports each component's status
+and how long it took, answering 503 until all of them are warm, so the load
+balancer only routes students to a warmed instance (/health stays a plain
+liveness check).
+
+A component that fails (say the database is unreachable) is retried every
+WARMUP_RETRY_SECONDS until it succeeds. WARMUP=0 skips the warmup and
+reports ready straight away.
+"""
+import logging
+import os
+import threading
+import time
+
+WARMUP_ENABLED = os.getenv('WARMUP', '1').lower() not in ('0', 'false', 'no')
+WARMUP_RETRY_SECONDS = float(os.getenv('WARMUP_RETRY_SECONDS', 5))
+
+logger = logging.getLogger(__name__)
+
+# Sample answer run through the NLP engine and the scoring rules
+SAMPLE_ANSWER = 'I really love mathematics and physics and want to become an engineer'
+
+
+def warm_database():
+    """Create the client and open a pooled connection with one cheap query"""
+    from app.db.supabase_client import get_supabase
+    get_supabase().table('quiz_sessions').select('id').limit(1).execute()
+
+
+def warm_question_payloads():
+    from app.services.question_payloads import build_question_payloads
+    build_question_payloads()
+
+
+def warm_nlp():
+    """Compile the phrase automaton and exercise every Document view once"""
+    from app.services.nlp_engine import get_nlp
+    nlp = get_nlp()
+    nlp.matcher()
+    doc = nlp.parse(SAMPLE_ANSWER)
+    doc.keywords, doc.intent, doc.subjects, doc.careers
+
+
+def warm_analyzer():
+    """Compile the scoring rules (at import) and score a sample answer set"""
+    from app.services.nlp_engine import get_nlp
+    from app.services.stream_analyzer import StreamAnalyzer
+    StreamAnalyzer(get_nlp()).analyze({'dream_job': SAMPLE_ANSWER})
+
+
+def warm_password_pool():
+    from app.services.password_pool import get_password_pool
+    get_password_pool().ping()
+
+
+COMPONENTS = [
+    ('database', warm_database),
+    ('question_payloads', warm_question_payloads),
+    ('nlp', warm_nlp),
+    ('analyzer', warm_analyzer),
+    ('password_pool', warm_password_pool)
+]
+
+
+class Warmup:
+    """Runs the warmup components once, in order, on a background thread"""
+
+    def __init__(self, components=COMPONENTS, retry_seconds=WARMUP_RETRY_SECONDS):
+        self.components = list(components)
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at = None
+        self.status = {name: {'status': 'pending'} for name, _ in self.components}
+
+    def _run_component(self, name, fn):
+        with self._lock:
+            attempts = self.status[name].get('attempts', 0) + 1
+            self.status[name]['status'] = 'running'
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            if attempts == 1:
+                logger.exception('Warmup component failed, retrying',
+                                 extra={'component': name, 'retry_seconds': self.retry_seconds})
+            result = {'status': 'failed', 'error': str(e)}
+        else:
+            result = {'status': 'ready'}
+        result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+        result['attempts'] = attempts
+        with self._lock:
+            self.status[name] = result
+        return result['status'] == 'ready'
+
+    def run(self):
+        """Warm every component; retry the failed ones until they succeed"""
+        pending = self.components
+        while True:
+            pending = [(name, fn) for name, fn in pending if not self._run_component(name, fn)]
+            if not pending:
+                logger.info('Warmup complete', extra={'seconds': round(time.perf_counter() - self.started_at, 3)})
+                return
+            time.sleep(self.retry_seconds)
+
+    def start(self):
+        """Start warming in the background (once)"""
+        with self._lock:
+            if self._thread is None:
+                self.started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def report(self) -> dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self.status.items()}
+        ready = all(c['status'] == 'ready' for c in components.values())
+        return {'ready': ready, 'components': components}
+
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup():
+    """Shared Warmup, or None when WARMUP=0"""
+    global _warmup
+    if not WARMUP_ENABLED:
+        return None
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = Warmup()
+    return _warmup
@@ -0,0 +1,187 @@
+"""
+Benchmark WSGI vs ASGI serving on the save-answer and history routes
+
+Each mode runs in its own server process against the local SQLite stand-in
+with LOCAL_DB_LATENCY_MS of emulated database latency per call:
+
+  wsgi  the Flask app on a fixed pool of --wsgi-threads threads (like
+        gunicorn's gthread worker)
+  asgi  app/asgi.py: async views on one event loop, other routes on the
+        same thread pool
+
+Both are served by uvicorn so only the view model differs.
+
+    python bench_async.py --latency-ms 10 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+USER_ID = 'bench-user'
+
+
+def serve(args):
+    """Child process: run one server mode until killed"""
+    import uvicorn
+    from a2wsgi import WSGIMiddleware
+    from app import create_app
+
+    flask_app = create_app()
+    if args.serve == 'asgi':
+        from app.asgi import create_asgi_app
+        app = create_asgi_app(flask_app, wsgi_threads=args.wsgi_threads)
+    else:
+        app = WSGIMiddleware(flask_app, workers=args.wsgi_threads)
+    uvicorn.run(app, host='127.0.0.1', port=args.port, log_level='warning')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, args):
+    port = _free_port()
+    env = dict(os.environ,
+               DB_BACKEND='sqlite',
+               LOCAL_DB_PATH=':memory:',
+               LOCAL_DB_LATENCY_MS=str(args.latency_ms),
+               PASSWORD_POOL_WORKERS='0',
+               WRITE_BEHIND='')
+    process = subprocess.Popen(
+        [sys.executable, __file__, '--serve', mode, '--port', str(port), '--wsgi-threads', str(args.wsgi_threads)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f'{base_url}/health').status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+async def seed(client, sessions):
+    """Create `sessions` quiz sessions for the bench user; returns their ids"""
+    async def create(n):
+        response = await client.post('/api/quiz/save-answer', json={
+            'session_id': None,
+            'user_id': USER_ID,
+            'mode': 'ssc',
+            'class_level': '10',
+            'question_id': 'age',
+            'answer': '15',
+            'question_index': 1,
+            'first_two_answers': {'name': f'Bench {n}'}
+        })
+        return response.json()['session_id']
+    return await asyncio.gather(*(create(n) for n in range(sessions)))
+
+
+async def load(client, make_request, concurrency, duration):
+    """Run make_request(worker, n) from `concurrency` tasks for `duration` seconds"""
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_no):
+        nonlocal errors
+        n = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await make_request(worker_no, n)
+                await response.aread()
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            n += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'errors': errors
+    }
+
+
+async def bench_mode(base_url, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        session_ids = await seed(client, max(args.history_sessions, args.concurrency))
+
+        def save_answer(worker_no, n):
+            return client.post('/api/quiz/save-answer', json={
+                'session_id': session_ids[worker_no],
+                'question_id': f'w{worker_no}_q{n}',
+                'answer': f'answer {n}',
+                'question_index': 2 + n % 12
+            })
+
+        def history(worker_no, n):
+            return client.get('/api/quiz/history', params={'user_id': USER_ID})
+
+        return {
+            'save-answer': await load(client, save_answer, args.concurrency, args.duration),
+            'history': await load(client, history, args.concurrency, args.duration)
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark WSGI vs ASGI serving')
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='Max emulated DB latency per call leg')
+    parser.add_argument('--concurrency', type=int, default=64, help='Concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per route and mode')
+    parser.add_argument('--wsgi-threads', type=int, default=10, help='Thread pool size for WSGI views')
+    parser.add_argument('--history-sessions', type=int, default=60, help='Sessions in the benchmarked history')
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return 0
+
+    results = {}
+    for mode in args.modes.split(','):
+        process, base_url = start_server(mode, args)
+        try:
+            results[mode] = asyncio.run(bench_mode(base_url, args))
+        finally:
+            process.kill()
+            process.wait()
+
+    print(f"latency≤{args.latency_ms:g}ms/leg concurrency={args.concurrency} wsgi_threads={args.wsgi_threads}")
+    print(f"{'route':<12} {'mode':<5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for route in ('save-answer', 'history'):
+        for mode, by_route in results.items():
+            r = by_route[route]
+            print(f"{route:<12} {mode:<5} {r['rps']:>9,.0f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} {r['errors']:>7}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
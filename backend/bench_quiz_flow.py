@@ -0,0 +1,277 @@
+"""
+End-to-end benchmark of the quiz flow through the real Flask app
+
+Each virtual user runs complete SSC and HSC quizzes against create_app()
+in-process (Flask test client), the way the frontend drives them:
+
+    GET  /api/questions/<mode>
+    POST /api/quiz/start
+    POST /api/quiz/save-answer   x14, each followed by POST /api/analyze
+    POST /api/quiz/complete
+    GET  /api/quiz/history
+    GET  /api/dashboard/stats
+
+The database is the local SQLite stand-in (DB_BACKEND=sqlite) with
+--latency-ms of emulated latency per call. The report has throughput and
+p50/p95/p99 per route. A second, single-threaded pass under tracemalloc
+measures the memory each route allocates (peak) and keeps (retained) per
+request.
+
+    python bench_quiz_flow.py --users 8 --flows 10 --out bench.json
+    python bench_quiz_flow.py --users 8 --flows 10 --compare bench.json
+
+--compare exits with status 1 if any route's p95 or allocation peak grew
+by more than --threshold percent. p95 over a few hundred requests is noisy;
+compare runs with the same settings on the same machine, with enough
+--flows that each route has a few hundred samples.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+MODES = ('ssc', 'hsc')
+
+SAMPLE_TEXTS = [
+    'I love mathematics and physics and want to build robots',
+    'Biology fascinates me, I want to become a doctor and help people',
+    'I enjoy drawing, music and writing stories about my village',
+    'Business and economics interest me, maybe I will start a company'
+]
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+class Recorder:
+    """Per-route latencies (or allocations), shared by the user threads"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, route, value, ok=True):
+        with self._lock:
+            self.samples.setdefault(route, []).append(value)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def answer_for(question, n):
+    """A plausible answer to `question`, varied by the flow number"""
+    if question.get('options'):
+        return question['options'][n % len(question['options'])]
+    if question['id'] == 'name':
+        return f'Bench Student {n}'
+    return SAMPLE_TEXTS[n % len(SAMPLE_TEXTS)]
+
+
+def run_flow(client, mode, user_id, n, measure):
+    """One complete quiz; measure(route, call) times each request"""
+
+    def request(route, method, url, body=None):
+        def call():
+            response = client.open(url, method=method, json=body)
+            with response:
+                # Reading the body includes streamed responses (history) in the timing
+                response.get_data()
+                return response.status_code, response.get_json(silent=True)
+        return measure(route, call)
+
+    _, questions = request('GET /api/questions/<mode>', 'GET', f'/api/questions/{mode}')
+    request('POST /api/quiz/start', 'POST', '/api/quiz/start', {'user_id': user_id, 'mode': mode})
+
+    session_id, first_answer, score = None, {}, 0
+    for index, question in enumerate(questions):
+        answer = answer_for(question, n + index)
+        body = {'session_id': session_id, 'question_index': index, 'question_id': question['id'], 'answer': answer}
+        if index == 0:
+            first_answer = {question['id']: answer}
+        elif index == 1:
+            body.update(first_two_answers=first_answer, user_id=user_id, mode=mode, class_level='10')
+        _, saved = request('POST /api/quiz/save-answer', 'POST', '/api/quiz/save-answer', body)
+        if index == 1:
+            session_id = saved['session_id']
+        if index >= 1:
+            _, analysis = request('POST /api/analyze', 'POST', '/api/analyze', {'answer': answer})
+            score += round(10 * abs(analysis.get('sentiment', 0)))
+
+    request('POST /api/quiz/complete', 'POST', '/api/quiz/complete', {'session_id': session_id, 'score': score})
+    request('GET /api/quiz/history', 'GET', f'/api/quiz/history?user_id={user_id}')
+    request('GET /api/dashboard/stats', 'GET', f'/api/dashboard/stats?user_id={user_id}')
+
+
+def timed(recorder):
+    def measure(route, call):
+        started = time.perf_counter()
+        status, body = call()
+        recorder.add(route, time.perf_counter() - started, ok=status < 400)
+        return status, body
+    return measure
+
+
+def traced(recorder):
+    def measure(route, call):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        status, body = call()
+        current, peak = tracemalloc.get_traced_memory()
+        recorder.add(route, (peak - before, current - before), ok=status < 400)
+        return status, body
+    return measure
+
+
+def run_load(app, users, flows):
+    """`users` threads, each running `flows` quizzes per mode"""
+    recorder = Recorder()
+
+    def user(user_no):
+        client = app.test_client()
+        for n in range(flows):
+            for mode in MODES:
+                run_flow(client, mode, f'bench-user-{user_no}', n, timed(recorder))
+
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def run_allocations(app, flows):
+    recorder = Recorder()
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        for n in range(flows):
+            for mode in MODES:
+                run_flow(client, mode, 'bench-alloc-user', n, traced(recorder))
+    finally:
+        tracemalloc.stop()
+    return recorder
+
+
+def summarize(load, elapsed, allocations):
+    routes = {}
+    for route, latencies in sorted(load.samples.items()):
+        latencies = sorted(latencies)
+        allocated = allocations.samples.get(route, [])
+        peaks = sorted(peak for peak, _ in allocated)
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': load.errors.get(route, 0),
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'alloc_peak_kib': round(percentile(peaks, 0.50) / 1024, 1),
+            'retained_b': round(sum(kept for _, kept in allocated) / len(allocated)) if allocated else 0
+        }
+    return routes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(result):
+    config = result['config']
+    print(f"users={config['users']} flows/user/mode={config['flows']} latency≤{config['latency_ms']:g}ms "
+          f"-> {result['flows_per_sec']:.1f} quiz flows/s")
+    print(f"{'route':<28} {'req':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'alloc KiB':>10} {'kept B':>8} {'err':>4}")
+    for route, r in result['routes'].items():
+        print(f"{route:<28} {r['requests']:>6} {r['rps']:>8,.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['alloc_peak_kib']:>10.1f} {r['retained_b']:>8} {r['errors']:>4}")
+
+
+def compare(result, baseline, threshold):
+    """Print per-route changes against a baseline; returns the regressions"""
+    regressions = []
+    print(f"\nvs {baseline.get('commit') or 'baseline'} ({baseline['timestamp']}), threshold {threshold:g}%")
+    print(f"{'route':<28} {'p95 ms':>18} {'change':>8} {'alloc KiB':>18} {'change':>8}")
+    for route, r in result['routes'].items():
+        old = baseline['routes'].get(route)
+        if old is None:
+            continue
+        changes = []
+        for key in ('p95_ms', 'alloc_peak_kib'):
+            change = (r[key] - old[key]) / old[key] * 100 if old[key] else 0
+            changes.append(change)
+            if change > threshold:
+                regressions.append((route, key, old[key], r[key]))
+        print(f"{route:<28} {old['p95_ms']:>8.2f} → {r['p95_ms']:<7.2f} {changes[0]:>+7.1f}% "
+              f"{old['alloc_peak_kib']:>8.1f} → {r['alloc_peak_kib']:<7.1f} {changes[1]:>+7.1f}%")
+    for route, key, old, new in regressions:
+        print(f"❌ {route} {key} regressed: {old} → {new}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end quiz flow benchmark')
+    parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users (threads)')
+    parser.add_argument('--flows', type=int, default=10, help='Quizzes per user and mode')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Max emulated DB latency per call leg')
+    parser.add_argument('--alloc-flows', type=int, default=3, help='Quizzes per mode in the tracemalloc pass')
+    parser.add_argument('--out', help='Write the results as JSON')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=25.0, help='Allowed growth in percent for --compare')
+    args = parser.parse_args(argv)
+
+    # The app reads these at import time
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['LOCAL_DB_PATH'] = ':memory:'
+    os.environ['LOCAL_DB_LATENCY_MS'] = str(args.latency_ms)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    for name, value in (('WRITE_BEHIND', ''), ('WARMUP', '0'), ('PASSWORD_POOL_WORKERS', '0')):
+        os.environ.setdefault(name, value)
+    from app import create_app
+
+    app = create_app()
+    # One untimed flow per mode so first-use caches don't count
+    run_flow(app.test_client(), 'ssc', 'bench-warmup', 0, lambda route, call: call())
+    run_flow(app.test_client(), 'hsc', 'bench-warmup', 0, lambda route, call: call())
+
+    load, elapsed = run_load(app, args.users, args.flows)
+    allocations = run_allocations(app, args.alloc_flows)
+
+    result = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {'users': args.users, 'flows': args.flows, 'latency_ms': args.latency_ms,
+                   'alloc_flows': args.alloc_flows},
+        'elapsed_s': round(elapsed, 3),
+        'flows_per_sec': round(args.users * args.flows * len(MODES) / elapsed, 2),
+        'routes': summarize(load, elapsed, allocations)
+    }
+    print_report(result)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.out}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
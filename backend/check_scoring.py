@@ -0,0 +1,119 @@
+"""
+Consistency checks for the NLP engine and stream scoring
+
+Runs in-process against the code in app/ and exits with status 1 if any
+check fails:
+
+    intent    extract_intent() agrees with the plain keyword lookup it
+              replaced, on every multi-word lexicon phrase (where phrase
+              matches overlap) and on sample answers
+    careers   a multi-word career is reported once, without the shorter
+              careers inside it ("software engineer", not also "engineer")
+    live      live scores kept through a sequence of saves (answer, change,
+              clear) agree with scoring the final answers from scratch
+
+    python check_scoring.py
+"""
+import argparse
+import sys
+
+LIVE_TOLERANCE = 1e-6
+
+SAMPLE_TEXTS = [
+    'I want to be a software engineer',
+    'I love computer science and coding, maybe data science later',
+    'My dream is to become a doctor and work in medical research',
+    'I enjoy drawing, music and fashion design',
+    'Business and marketing, then start my own company as an entrepreneur',
+    'Not sure yet'
+]
+
+
+def keyword_intent(nlp, text):
+    """Intent as it was computed before the phrase matcher: intent words among the keywords"""
+    keywords = nlp.extract_keywords(text)
+    return {name: len(keywords & words) for name, words in nlp.INTENTS.items()}
+
+
+def phrase_texts(nlp):
+    phrases = list(nlp.CAREERS) + [p for phrases in nlp.SUBJECTS.values() for p in phrases]
+    return [f'I want to be a {phrase}' for phrase in phrases if ' ' in phrase] + SAMPLE_TEXTS
+
+
+def check_intent(nlp):
+    failures = []
+    for text in phrase_texts(nlp):
+        intent = {name: count for name, count in nlp.extract_intent(text).items() if name != 'sentiment'}
+        expected = keyword_intent(nlp, text)
+        if intent != expected:
+            failures.append(f'{text!r}: {intent} != {expected}')
+    return failures
+
+
+def check_careers(nlp):
+    failures = []
+    for career in nlp.CAREERS:
+        found = nlp.detect_careers(f'I want to be a {career}')
+        if found != [career]:
+            failures.append(f'{career!r}: {found}')
+    return failures
+
+
+def _replay(analyzer, question_id, saves):
+    """(answer, live scores, rescored) after each save of `question_id`"""
+    answers, live = {}, {}
+    for answer in saves:
+        answers[question_id] = answer
+        live.update(analyzer.contributions({question_id: answer}))
+        yield answer, analyzer.live_score(live)[0], analyzer.score(answers)[0]
+
+
+def check_live(nlp):
+    """Replay saves the way save-answer merges them into live_scores (jsonb ||)"""
+    from app.services.question_bank import QUESTION_SETS
+    from app.services.stream_analyzer import FREE_TEXT_FIELDS, StreamAnalyzer
+
+    analyzer = StreamAnalyzer(nlp, cache=None)
+    sequences = {field: [SAMPLE_TEXTS[1], SAMPLE_TEXTS[0], '', '   '] for field in FREE_TEXT_FIELDS}
+    for questions in QUESTION_SETS.values():
+        for question in questions:
+            if question.get('options'):
+                sequences.setdefault(question['id'], question['options'][:2] + ['(not an option)'])
+
+    failures = []
+    for question_id, saves in sequences.items():
+        for answer, live, rescored in _replay(analyzer, question_id, saves):
+            if live.keys() != rescored.keys() or any(abs(live[s] - rescored[s]) > LIVE_TOLERANCE for s in live):
+                failures.append(f'{question_id}={answer!r}: live {live} != {rescored}')
+    return failures
+
+
+CHECKS = [
+    ('intent', check_intent),
+    ('careers', check_careers),
+    ('live', check_live)
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Consistency checks for the NLP engine and stream scoring')
+    parser.parse_args(argv)
+
+    from app.services.nlp_engine import get_nlp
+    nlp = get_nlp()
+
+    failed = 0
+    for name, check in CHECKS:
+        failures = check(nlp)
+        if not failures:
+            print(f"✅ {name}")
+            continue
+        failed += 1
+        print(f"❌ {name}: {len(failures)} failure(s)")
+        for failure in failures:
+            print(f"   {failure}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Cohort analytics over completed quiz sessions
+
+Pages through completed quiz_sessions in id order (keyset, so each page is
+one indexed range scan whatever the offset) and scores each session with
+StreamAnalyzer. Sessions with live scores (migrations/003) are not
+rescored. The results are folded into fixed-size accumulators:
+
+    top stream counts     overall, by mode and by class level
+    confidence histogram  10-point bins, overall and per top stream
+    option frequencies    per choice question, from the answer schema
+
+Memory holds one page of rows plus the accumulators, whose size depends
+only on the question bank and the number of modes and class levels (capped
+at MAX_GROUPS each). It doesn't grow with the number of sessions.
+
+After every page the accumulators and the last id are written to the
+checkpoint file. `--resume` continues an interrupted run from there, and a
+finished run removes the checkpoint. Sessions created during a run may or
+may not be counted, since ids are not time-ordered.
+
+    python cohort_analytics.py report.json
+    python cohort_analytics.py report.csv --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.db.session_store import load_answers, load_live_scores
+from app.services.answer_codec import get_schema
+from app.services.stream_analyzer import STREAMS
+
+PAGE_SIZE = 500
+CHECKPOINT_PATH = 'cohort_analytics.checkpoint.json'
+CONFIDENCE_BINS = 10
+# Distinct modes / class levels tracked before the rest count as 'other'
+MAX_GROUPS = 50
+OTHER = '(other)'
+
+
+def _bin_labels():
+    width = 100 // CONFIDENCE_BINS
+    return [f'{low}-{low + width}' for low in range(0, 100, width)]
+
+
+class CohortStats:
+    """Streaming accumulators; to_dict()/from_dict() round-trip for checkpoints"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.skipped = 0
+        self.confidence_sum = 0.0
+        self.top_stream = {stream: 0 for stream in STREAMS}
+        self.by_group = {'mode': {}, 'class_level': {}}
+        self.confidence = [0] * CONFIDENCE_BINS
+        self.confidence_by_stream = {stream: [0] * CONFIDENCE_BINS for stream in STREAMS}
+        # Choice questions only: free text has no bounded set of values
+        schema = get_schema()
+        self.options = {
+            question_id: dict.fromkeys(options + [OTHER], 0)
+            for question_id, options in zip(schema.ids, schema.options) if options
+        }
+
+    def _group(self, dimension, value):
+        groups = self.by_group[dimension]
+        value = str(value) if value not in (None, '') else 'unknown'
+        if value not in groups:
+            if len(groups) >= MAX_GROUPS:
+                value = OTHER
+            groups.setdefault(value, {stream: 0 for stream in STREAMS})
+        return groups[value]
+
+    def add(self, mode, class_level, answers, top_stream, confidence):
+        self.sessions += 1
+        self.confidence_sum += confidence
+        self.top_stream[top_stream] += 1
+        self._group('mode', mode)[top_stream] += 1
+        self._group('class_level', class_level)[top_stream] += 1
+
+        bin_index = min(int(confidence * CONFIDENCE_BINS // 100), CONFIDENCE_BINS - 1)
+        self.confidence[bin_index] += 1
+        self.confidence_by_stream[top_stream][bin_index] += 1
+
+        for question_id, answer in answers.items():
+            counts = self.options.get(question_id)
+            if counts is not None:
+                counts[answer if isinstance(answer, str) and answer in counts else OTHER] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'sessions': self.sessions,
+            'skipped': self.skipped,
+            'mean_confidence': round(self.confidence_sum / self.sessions, 1) if self.sessions else None,
+            'confidence_sum': self.confidence_sum,
+            'top_stream': {
+                'all': self.top_stream,
+                'mode': self.by_group['mode'],
+                'class_level': self.by_group['class_level']
+            },
+            'confidence': {
+                'bins': _bin_labels(),
+                'all': self.confidence,
+                'by_stream': self.confidence_by_stream
+            },
+            'options': self.options
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.sessions = data['sessions']
+        stats.skipped = data['skipped']
+        stats.confidence_sum = data['confidence_sum']
+        stats.top_stream.update(data['top_stream']['all'])
+        stats.by_group = {'mode': data['top_stream']['mode'], 'class_level': data['top_stream']['class_level']}
+        stats.confidence = data['confidence']['all']
+        stats.confidence_by_stream.update(data['confidence']['by_stream'])
+        for question_id, counts in data['options'].items():
+            stats.options.setdefault(question_id, {}).update(counts)
+        return stats
+
+    def csv_rows(self):
+        """(section, group, key, count) rows"""
+        for stream, count in self.top_stream.items():
+            yield 'top_stream', 'all', stream, count
+        for dimension, groups in self.by_group.items():
+            for group, counts in groups.items():
+                for stream, count in counts.items():
+                    yield 'top_stream', f'{dimension}={group}', stream, count
+        for label, count in zip(_bin_labels(), self.confidence):
+            yield 'confidence', 'all', label, count
+        for stream, bins in self.confidence_by_stream.items():
+            for label, count in zip(_bin_labels(), bins):
+                yield 'confidence', stream, label, count
+        for question_id, counts in self.options.items():
+            for option, count in counts.items():
+                yield 'option', question_id, option, count
+
+
+def score_session(analyzer, row):
+    """(answers, top_stream, confidence) for a session row, as analyze() would rank it"""
+    answers = load_answers(row.get('answers'))
+    scores = analyzer.current_scores(answers, load_live_scores(row.get('live_scores')))
+    if not scores:
+        return answers, 'Science_PCM', 50
+    top_stream = max(scores, key=scores.get)
+    total = sum(scores.values())
+    return answers, top_stream, (scores[top_stream] / total * 100) if total > 0 else 50
+
+
+def load_checkpoint(path):
+    """(last_id, stats) from a checkpoint, or (None, fresh stats)"""
+    if not os.path.exists(path):
+        return None, CohortStats()
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    return checkpoint['last_id'], CohortStats.from_dict(checkpoint['stats'])
+
+
+def save_checkpoint(path, last_id, stats):
+    # Written aside and renamed, so a crash leaves the previous checkpoint intact
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'last_id': last_id, 'stats': stats.to_dict()}, f)
+    os.replace(tmp_path, path)
+
+
+def run(supabase, analyzer, stats, last_id=None, page_size=PAGE_SIZE, on_page=None):
+    """Fold every completed session after `last_id` into `stats`; returns the last id"""
+    while True:
+        query = supabase.table('quiz_sessions')\
+            .select('id, mode, class_level, answers, live_scores')\
+            .eq('is_completed', True)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        rows = query.order('id').limit(page_size).execute().data
+        if not rows:
+            return last_id
+
+        for row in rows:
+            try:
+                answers, top_stream, confidence = score_session(analyzer, row)
+            except ValueError:
+                # Unparseable answers column
+                stats.skipped += 1
+                continue
+            stats.add(row.get('mode'), row.get('class_level'), answers, top_stream, confidence)
+
+        last_id = rows[-1]['id']
+        if on_page:
+            on_page(last_id, stats)
+
+
+def write_report(path, stats, fmt):
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['section', 'group', 'key', 'count'])
+            writer.writerows(stats.csv_rows())
+        return
+    report = stats.to_dict()
+    report.pop('confidence_sum')
+    report['generated_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate stream recommendations over completed quiz sessions')
+    parser.add_argument('output', help='Report file (.json or .csv)')
+    parser.add_argument('--format', choices=['json', 'csv'], help='Override format detection for the report')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Sessions per round trip')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help='Checkpoint file written after every page')
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint instead of starting over')
+    args = parser.parse_args(argv)
+
+    if args.page_size < 1:
+        parser.error('--page-size must be at least 1')
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'json')
+
+    from app.db.supabase_client import get_supabase_admin
+    from app.services.nlp_engine import get_nlp
+    from app.services.stream_analyzer import StreamAnalyzer
+
+    last_id, stats = load_checkpoint(args.checkpoint) if args.resume else (None, CohortStats())
+    if last_id is not None:
+        print(f"↩️  Resuming after session {last_id} ({stats.sessions} sessions so far)", file=sys.stderr)
+
+    started = time.perf_counter()
+    resumed_at = stats.sessions
+
+    # No memoization: a one-off pass over every session would only churn the cache
+    analyzer = StreamAnalyzer(get_nlp(), cache=None)
+    run(get_supabase_admin(), analyzer, stats, last_id, args.page_size,
+        on_page=lambda page_last_id, page_stats: save_checkpoint(args.checkpoint, page_last_id, page_stats))
+
+    write_report(args.output, stats, fmt)
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    elapsed = time.perf_counter() - started
+    scored = stats.sessions - resumed_at
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {stats.sessions} sessions ({stats.skipped} skipped) -> {args.output} "
+          f"in {elapsed:.1f}s ({rate:,.0f} sessions/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""
+Export quiz_sessions and answers as chunked Parquet (or Arrow IPC) files
+
+Both tables are read in keyset pages ordered by (created_at, id), so every
+round trip is one indexed range scan and memory holds at most one page plus
+one row group, however large the tables are. Each session's answers are
+flattened into one `q_<question id>` column per QUESTION_SETS question
+(decoded from the stored encoding). Answers to questions the bank no longer
+has go to `answers_extra` as JSON.
+
+    out/quiz_sessions/part-<run>-00000.parquet    <run>: UTC time (µs) + random suffix
+    out/answers/part-<run>-00000.parquet
+    out/_watermark.json
+
+Each part holds up to --rows-per-file rows in row groups of
+--row-group-size. The watermark records the last (created_at, id) exported
+per table, and the next run continues strictly after it, so repeated runs
+export only new rows. --since starts from a given created_at instead, and
+--full ignores the watermark.
+
+Parts are written as *.tmp and renamed once their table is complete, and
+that table's watermark is saved right after. A table that fails leaves
+no parts behind and its watermark unchanged, so the next run exports
+those rows again without duplicating any. Run one export per directory
+at a time: leftover *.tmp parts are deleted at the start.
+
+Needs pyarrow, which the server doesn't: `pip install pyarrow`.
+
+    python export_sessions.py out/
+    python export_sessions.py out/ --format arrow --compression lz4
+    python export_sessions.py out/ --since 2025-06-01T00:00:00+00:00
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.db.history import keyset_query
+from app.db.session_store import load_answers
+from app.services.question_bank import QUESTION_SETS
+
+PAGE_SIZE = 1000
+ROW_GROUP_SIZE = 50000
+ROWS_PER_FILE = 1000000
+WATERMARK_FILE = '_watermark.json'
+# Lowest uuid: the tie-breaker that puts --since at the start of its instant
+NIL_ID = '00000000-0000-0000-0000-000000000000'
+
+SESSION_COLUMNS = [
+    ('id', 'string'), ('user_id', 'string'), ('mode', 'string'), ('class_level', 'string'),
+    ('total_questions', 'int32'), ('current_question', 'int32'), ('is_completed', 'bool'),
+    ('score', 'float64'), ('version', 'int32'), ('created_at', 'timestamp'), ('completed_at', 'timestamp')
+]
+ANSWER_COLUMNS = [
+    ('id', 'string'), ('session_id', 'string'), ('user_id', 'string'), ('question_id', 'string'),
+    ('answer', 'string'), ('created_at', 'timestamp')
+]
+
+
+def question_ids():
+    """Every QUESTION_SETS question id, in bank order"""
+    return list(dict.fromkeys(q['id'] for questions in QUESTION_SETS.values() for q in questions))
+
+
+def flatten_session(row, ids):
+    """A quiz_sessions row with its answers spread over q_<id> columns"""
+    try:
+        answers = load_answers(row.get('answers'))
+    except ValueError:
+        answers = {}
+    flat = {name: row.get(name) for name, _ in SESSION_COLUMNS}
+    for question_id in ids:
+        answer = answers.pop(question_id, None)
+        flat[f'q_{question_id}'] = answer if answer is None or isinstance(answer, str) else json.dumps(answer)
+    flat['answers_extra'] = json.dumps(answers, ensure_ascii=False) if answers else None
+    return flat
+
+
+def read_pages(supabase, table, columns, after=None, page_size=PAGE_SIZE):
+    """Yield pages of rows ordered by (created_at, id), strictly after `after`"""
+    select = ', '.join(name for name, _ in columns) if table == 'answers' else '*'
+    while True:
+        query = keyset_query(supabase.table(table).select(select), after, descending=False)
+        rows = query.limit(page_size).execute().data
+        if not rows:
+            return
+        # Taken before the caller gets (and may convert) the rows
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+        yield rows
+        if len(rows) < page_size:
+            return
+
+
+class ChunkedWriter:
+    """Buffers rows into row groups and rotates part files every rows_per_file rows"""
+
+    def __init__(self, pa, directory, schema, run_id, fmt='parquet', compression='zstd',
+                 row_group_size=ROW_GROUP_SIZE, rows_per_file=ROWS_PER_FILE):
+        self.pa = pa
+        self.directory = Path(directory)
+        self.schema = schema
+        self.run_id = run_id
+        self.fmt = fmt
+        self.compression = None if compression == 'none' else compression
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file
+        self.buffer = []
+        self.writer = None
+        self.file_rows = 0
+        self.files = []
+        self.rows = 0
+
+    @staticmethod
+    def tmp_path(path):
+        return path.with_name(path.name + '.tmp')
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        ext = 'parquet' if self.fmt == 'parquet' else 'arrow'
+        path = self.directory / f'part-{self.run_id}-{len(self.files):05d}.{ext}'
+        self.files.append(path)
+        path = self.tmp_path(path)
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, compression=self.compression or 'none')
+        else:
+            import pyarrow.ipc as ipc
+            options = ipc.IpcWriteOptions(compression=self.compression)
+            self.writer = ipc.new_file(path, self.schema, options=options)
+        self.file_rows = 0
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        if self.writer is None:
+            self._open()
+        batch = self.pa.RecordBatch.from_pylist(self.buffer, schema=self.schema)
+        if self.fmt == 'parquet':
+            self.writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self.writer.write_batch(batch)
+        self.file_rows += len(self.buffer)
+        self.rows += len(self.buffer)
+        self.buffer = []
+        if self.file_rows >= self.rows_per_file:
+            self._close_file()
+
+    def _close_file(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def write(self, rows):
+        for row in rows:
+            self.buffer.append(row)
+            # A row group never spans two files
+            if len(self.buffer) >= min(self.row_group_size, self.rows_per_file - self.file_rows):
+                self._flush()
+
+    def close(self):
+        """Finish writing and give the parts their final names"""
+        self._flush()
+        self._close_file()
+        for path in self.files:
+            os.replace(self.tmp_path(path), path)
+
+    def discard(self):
+        """Drop the unfinished parts"""
+        try:
+            self._close_file()
+        finally:
+            for path in self.files:
+                self.tmp_path(path).unlink(missing_ok=True)
+
+
+def _arrow_schema(pa, columns):
+    types = {
+        'string': pa.string(), 'int32': pa.int32(), 'float64': pa.float64(), 'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us', tz='UTC')
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _timestamps(rows, columns):
+    """Parse ISO created_at/completed_at strings for the timestamp columns"""
+    names = [name for name, kind in columns if kind == 'timestamp']
+    for row in rows:
+        for name in names:
+            if isinstance(row.get(name), str):
+                row[name] = datetime.fromisoformat(row[name])
+    return rows
+
+
+def export_table(pa, supabase, table, directory, columns, after, run_id, options, page_size=PAGE_SIZE,
+                 transform=None):
+    """Export one table after `after`; returns (rows, files, last position)"""
+    writer = ChunkedWriter(pa, directory, _arrow_schema(pa, columns), run_id, **options)
+    last = after
+    try:
+        for rows in read_pages(supabase, table, columns, after, page_size):
+            # The watermark keeps the database's own created_at text
+            last = (rows[-1]['created_at'], rows[-1]['id'])
+            if transform:
+                rows = [transform(row) for row in rows]
+            writer.write(_timestamps(rows, columns))
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+    return writer.rows, writer.files, last
+
+
+def load_watermark(path):
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_watermark(path, watermark):
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export quiz_sessions and answers as chunked columnar files')
+    parser.add_argument('out_dir', help='Directory for the part files and the watermark')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet', help='Parquet or Arrow IPC files')
+    parser.add_argument('--compression', choices=['zstd', 'lz4', 'snappy', 'gzip', 'none'], default='zstd')
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE, help='Rows per row group / record batch')
+    parser.add_argument('--rows-per-file', type=int, default=ROWS_PER_FILE, help='Rows per part file')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Rows per database round trip')
+    parser.add_argument('--since', help='Only rows created after this ISO timestamp (overrides the watermark)')
+    parser.add_argument('--full', action='store_true', help='Ignore the watermark and export everything')
+    args = parser.parse_args(argv)
+
+    if min(args.row_group_size, args.rows_per_file, args.page_size) < 1:
+        parser.error('--row-group-size, --rows-per-file and --page-size must be at least 1')
+    if args.format == 'arrow' and args.compression not in ('zstd', 'lz4', 'none'):
+        parser.error('Arrow IPC files support zstd, lz4 or none')
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("❌ export_sessions.py needs pyarrow: pip install pyarrow", file=sys.stderr)
+        return 1
+    from app.db.supabase_client import get_supabase_admin
+
+    out_dir = Path(args.out_dir)
+    watermark_path = out_dir / WATERMARK_FILE
+    watermark = {} if args.full or args.since else load_watermark(watermark_path)
+    # Unique per run, so two runs in the same second don't write the same part names
+    run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}-{uuid.uuid4().hex[:8]}"
+    supabase = get_supabase_admin()
+
+    ids = question_ids()
+    session_columns = SESSION_COLUMNS + [(f'q_{q}', 'string') for q in ids] + [('answers_extra', 'string')]
+    tables = [
+        ('quiz_sessions', session_columns, lambda row: flatten_session(row, ids)),
+        ('answers', ANSWER_COLUMNS, None)
+    ]
+
+    options = {
+        'fmt': args.format, 'compression': args.compression, 'row_group_size': args.row_group_size,
+        'rows_per_file': args.rows_per_file
+    }
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    for table, columns, transform in tables:
+        # Parts of a run that was killed before its table finished
+        for stale in (out_dir / table).glob('part-*.tmp'):
+            stale.unlink()
+        # id is a uuid in Postgres, so the tie-breaker must be one too ('' won't cast)
+        after = (args.since, NIL_ID) if args.since else tuple(watermark[table]) if table in watermark else None
+        rows, files, last = export_table(pa, supabase, table, out_dir / table, columns, after, run_id, options,
+                                         args.page_size, transform)
+        # Committed per table: a later table failing must not re-export this one
+        if last is not None:
+            watermark[table] = list(last)
+            save_watermark(watermark_path, watermark)
+        print(f"✅ {table}: {rows:,} rows -> {len(files)} file(s)", file=sys.stderr)
+
+    print(f"💾 Watermark saved to {watermark_path} ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
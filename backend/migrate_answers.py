@@ -0,0 +1,113 @@
+"""
+Re-encode quiz_sessions.answers with the compact answer codec
+
+Walks quiz_sessions in id order, a page at a time, and rewrites every row
+whose answers aren't already in the current encoding
+(app/services/answer_codec.py). Each write is guarded by the row's version,
+so a row saved to meanwhile is left for the next run. The content doesn't
+change, so the version isn't bumped. Rows in the old list format (from
+/quiz/save-progress) are skipped. Safe to re-run at any time.
+
+    python migrate_answers.py --dry-run     # report sizes, write nothing
+    python migrate_answers.py
+    python migrate_answers.py --write-schema
+
+--write-schema adds the next app/data/answer_schema_v<N>.json snapshot after
+QUESTION_SETS gained questions or options. Deploy it before running the
+migration again.
+"""
+import argparse
+import json
+import sys
+
+from app.db.session_store import dump_answers, load_answers
+from app.services import answer_codec
+
+PAGE_SIZE = 500
+
+
+def write_schema():
+    version = answer_codec.latest_schema_version()
+    previous = answer_codec.load_snapshot(answer_codec.schema_path(version)) if version else None
+    from app.services.question_bank import QUESTION_SETS
+    snapshot = answer_codec.extend_schema(previous, QUESTION_SETS)
+    if previous and snapshot['questions'] == previous['questions']:
+        print(f"✅ Schema v{version} already covers QUESTION_SETS")
+        return 0
+    path = answer_codec.schema_path(snapshot['version'])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"💾 Wrote {path}")
+    return 0
+
+
+def migrate(supabase, page_size=PAGE_SIZE, dry_run=False):
+    """Re-encode every session; returns the counters"""
+    stats = {'scanned': 0, 'rewritten': 0, 'current': 0, 'skipped': 0, 'raced': 0, 'bytes_before': 0, 'bytes_after': 0}
+    last_id = None
+    while True:
+        query = supabase.table('quiz_sessions').select('id, answers, version')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        rows = query.order('id').limit(page_size).execute().data
+        if not rows:
+            return stats
+
+        for row in rows:
+            stats['scanned'] += 1
+            stored = row.get('answers')
+            text = stored if isinstance(stored, str) else json.dumps(stored)
+            try:
+                parsed = json.loads(text) if text else {}
+            except ValueError:
+                parsed = None
+            if not isinstance(parsed, dict):
+                stats['skipped'] += 1
+                continue
+
+            encoded = dump_answers(load_answers(parsed))
+            stats['bytes_before'] += len(text.encode('utf-8'))
+            stats['bytes_after'] += len(encoded.encode('utf-8'))
+            if encoded == text:
+                stats['current'] += 1
+                continue
+            if dry_run:
+                stats['rewritten'] += 1
+                continue
+
+            updated = supabase.table('quiz_sessions')\
+                .update({'answers': encoded})\
+                .eq('id', row['id'])\
+                .eq('version', row.get('version') or 0)\
+                .execute()
+            stats['rewritten' if updated.data else 'raced'] += 1
+
+        last_id = rows[-1]['id']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-encode stored quiz answers with the compact codec')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Sessions per round trip')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--write-schema', action='store_true', help='Write the next schema snapshot and exit')
+    args = parser.parse_args(argv)
+
+    if args.write_schema:
+        return write_schema()
+
+    from app.db.supabase_client import get_supabase_admin
+    stats = migrate(get_supabase_admin(), args.page_size, args.dry_run)
+
+    before, after = stats['bytes_before'], stats['bytes_after']
+    ratio = f" ({before / after:.1f}x smaller)" if after else ''
+    verb = 'would rewrite' if args.dry_run else 'rewrote'
+    print(f"{'🔍' if args.dry_run else '✅'} Scanned {stats['scanned']} sessions: {verb} {stats['rewritten']}, "
+          f"{stats['current']} already encoded, {stats['skipped']} skipped (not an answer object), "
+          f"{stats['raced']} changed meanwhile (re-run to pick up)")
+    print(f"   answers: {before:,} -> {after:,} bytes{ratio}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
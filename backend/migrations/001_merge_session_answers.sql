@@ -0,0 +1,45 @@
+-- Atomic single-round-trip answer saves for /quiz/save-answer
+--
+-- quiz_sessions.answers holds a JSON object serialized as text (the routes
+-- json.dumps it). merge_session_answers() merges a patch of
+-- {question_id: answer} into it server-side with jsonb ||, so concurrent
+-- saves of different questions can't overwrite each other. The version
+-- column is bumped on every merge; callers that pass p_expected_version
+-- get conflict = true instead of a write when someone else got there first.
+
+alter table quiz_sessions
+    add column if not exists version integer not null default 0;
+
+create or replace function merge_session_answers(
+    p_session_id uuid,
+    p_patch jsonb,
+    p_current_question integer default null,
+    p_expected_version integer default null
+)
+returns table (new_version integer, conflict boolean)
+language plpgsql
+as $$
+declare
+    v_version integer;
+begin
+    update quiz_sessions s
+       set answers = (coalesce(nullif(s.answers, ''), '{}')::jsonb || p_patch)::text,
+           current_question = greatest(coalesce(s.current_question, 0), coalesce(p_current_question, 0)),
+           version = s.version + 1
+     where s.id = p_session_id
+       and (p_expected_version is null or s.version = p_expected_version)
+    returning s.version into v_version;
+
+    if found then
+        return query select v_version, false;
+        return;
+    end if;
+
+    -- No row updated: either the session doesn't exist (empty result) or
+    -- the expected version is stale (report the current one)
+    select s.version into v_version from quiz_sessions s where s.id = p_session_id;
+    if found then
+        return query select v_version, true;
+    end if;
+end;
+$$;
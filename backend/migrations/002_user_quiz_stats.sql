@@ -0,0 +1,120 @@
+-- Per-user quiz counters for /dashboard/stats
+--
+-- user_quiz_stats keeps one row per user with the number of sessions, the
+-- number completed and the sum of completed scores. A trigger on
+-- quiz_sessions applies each insert, delete and change to user_id /
+-- is_completed / score as a delta (old row out, new row in), so the
+-- dashboard reads one row no matter how long the user's history is.
+-- Answer saves only touch answers/current_question/version and don't fire it.
+--
+-- reconcile_user_quiz_stats() recomputes the counters from quiz_sessions
+-- (all users, or one) and returns how many rows it corrected. It is run
+-- once at the end of this migration as the backfill; run it again with
+-- `python reconcile_quiz_stats.py` if drift is ever suspected.
+
+create table if not exists user_quiz_stats (
+    user_id text primary key,
+    total_quizzes integer not null default 0,
+    completed_quizzes integer not null default 0,
+    score_sum double precision not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function user_quiz_stats_apply(
+    p_user_id text,
+    p_total integer,
+    p_completed integer,
+    p_score double precision
+)
+returns void
+language sql
+security definer
+set search_path = public
+as $$
+    insert into user_quiz_stats as s (user_id, total_quizzes, completed_quizzes, score_sum, updated_at)
+    values (p_user_id, p_total, p_completed, p_score, now())
+    on conflict (user_id) do update
+       set total_quizzes = s.total_quizzes + excluded.total_quizzes,
+           completed_quizzes = s.completed_quizzes + excluded.completed_quizzes,
+           score_sum = s.score_sum + excluded.score_sum,
+           updated_at = now();
+$$;
+
+create or replace function quiz_sessions_stats_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.user_id is not null then
+        perform user_quiz_stats_apply(
+            old.user_id::text,
+            -1,
+            case when old.is_completed then -1 else 0 end,
+            case when old.is_completed then -coalesce(old.score, 0) else 0 end
+        );
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and new.user_id is not null then
+        perform user_quiz_stats_apply(
+            new.user_id::text,
+            1,
+            case when new.is_completed then 1 else 0 end,
+            case when new.is_completed then coalesce(new.score, 0) else 0 end
+        );
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists quiz_sessions_stats on quiz_sessions;
+create trigger quiz_sessions_stats
+    after insert or delete or update of user_id, is_completed, score on quiz_sessions
+    for each row execute function quiz_sessions_stats_trigger();
+
+create or replace function reconcile_user_quiz_stats(p_user_id text default null)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_changed integer;
+begin
+    -- Hold off session writes so no trigger delta lands between the recount and the overwrite
+    lock table quiz_sessions in share mode;
+
+    with actual as (
+        select q.user_id::text as user_id,
+               count(*)::integer as total_quizzes,
+               (count(*) filter (where q.is_completed))::integer as completed_quizzes,
+               coalesce(sum(q.score) filter (where q.is_completed), 0)::double precision as score_sum
+          from quiz_sessions q
+         where q.user_id is not null
+           and (p_user_id is null or q.user_id::text = p_user_id)
+         group by q.user_id
+    ), upserted as (
+        insert into user_quiz_stats as s (user_id, total_quizzes, completed_quizzes, score_sum, updated_at)
+        select a.user_id, a.total_quizzes, a.completed_quizzes, a.score_sum, now() from actual a
+        on conflict (user_id) do update
+           set total_quizzes = excluded.total_quizzes,
+               completed_quizzes = excluded.completed_quizzes,
+               score_sum = excluded.score_sum,
+               updated_at = now()
+         where (s.total_quizzes, s.completed_quizzes, s.score_sum)
+               is distinct from (excluded.total_quizzes, excluded.completed_quizzes, excluded.score_sum)
+        returning 1
+    ), removed as (
+        delete from user_quiz_stats s
+         where (p_user_id is null or s.user_id = p_user_id)
+           and not exists (select 1 from actual a where a.user_id = s.user_id)
+        returning 1
+    )
+    select (select count(*) from upserted) + (select count(*) from removed) into v_changed;
+
+    return v_changed;
+end;
+$$;
+
+-- Backfill
+select reconcile_user_quiz_stats();
@@ -0,0 +1,54 @@
+-- Live stream scores for /quiz/leaning and /quiz/complete
+--
+-- Every /quiz/save-answer stores that answer's share of the stream scores
+-- (StreamAnalyzer.contribution()) in quiz_sessions.live_scores, keyed by
+-- question id: {"fav_subject": {"scores": {"Science_PCB": 3.0}, ...}}.
+-- Like answers, it is merged server-side with jsonb ||, so concurrent saves
+-- can't lose a contribution and re-answering a question replaces its old
+-- one. Completion then sums at most one contribution per question instead
+-- of rescoring every answer.
+--
+-- merge_session_answers() gains p_scores for that merge. Apply this before
+-- deploying the code that sends it. Existing sessions keep '{}' and are
+-- rescored from their answers when they complete.
+
+alter table quiz_sessions
+    add column if not exists live_scores jsonb not null default '{}'::jsonb;
+
+drop function if exists merge_session_answers(uuid, jsonb, integer, integer);
+
+create or replace function merge_session_answers(
+    p_session_id uuid,
+    p_patch jsonb,
+    p_current_question integer default null,
+    p_expected_version integer default null,
+    p_scores jsonb default null
+)
+returns table (new_version integer, conflict boolean)
+language plpgsql
+as $$
+declare
+    v_version integer;
+begin
+    update quiz_sessions s
+       set answers = (coalesce(nullif(s.answers, ''), '{}')::jsonb || p_patch)::text,
+           live_scores = coalesce(s.live_scores, '{}'::jsonb) || coalesce(p_scores, '{}'::jsonb),
+           current_question = greatest(coalesce(s.current_question, 0), coalesce(p_current_question, 0)),
+           version = s.version + 1
+     where s.id = p_session_id
+       and (p_expected_version is null or s.version = p_expected_version)
+    returning s.version into v_version;
+
+    if found then
+        return query select v_version, false;
+        return;
+    end if;
+
+    -- No row updated: either the session doesn't exist (empty result) or
+    -- the expected version is stale (report the current one)
+    select s.version into v_version from quiz_sessions s where s.id = p_session_id;
+    if found then
+        return query select v_version, true;
+    end if;
+end;
+$$;
@@ -0,0 +1,32 @@
+"""
+Recompute the per-user counters in user_quiz_stats from quiz_sessions
+
+The counters are maintained by a trigger (migrations/002_user_quiz_stats.sql);
+this job corrects any drift, e.g. after sessions were edited by hand with the
+trigger disabled. A full run briefly blocks writes to quiz_sessions.
+
+    python reconcile_quiz_stats.py              # every user
+    python reconcile_quiz_stats.py --user-id ID # one user
+"""
+import argparse
+import sys
+
+from app.db.supabase_client import get_supabase_admin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reconcile user_quiz_stats with quiz_sessions')
+    parser.add_argument('--user-id', help='Only reconcile this user')
+    args = parser.parse_args(argv)
+
+    supabase = get_supabase_admin()
+    response = supabase.rpc('reconcile_user_quiz_stats', {'p_user_id': args.user_id}).execute()
+    changed = response.data or 0
+
+    scope = f"user {args.user_id}" if args.user_id else "all users"
+    print(f"✅ Reconciled {scope}: {changed} counter rows corrected")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,38 @@
-from app import create_app
 import os
+import sys
+
+if __name__ == '__main__' and '--startup-report' in sys.argv:
+    # Profile a fresh server process instead of serving
+    from app.startup_report import main
+    sys.exit(main())
 
-# Import keep-alive service
-try:
-    from app.keep_alive import start_keep_alive
-    KEEP_ALIVE_AVAILABLE = True
-except ImportError:
-    KEEP_ALIVE_AVAILABLE = False
-    print("⚠️ Keep-alive service not available")
+from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
     # Start keep-alive service only in production (Render)
-    if os.getenv('RENDER_EXTERNAL_URL') and KEEP_ALIVE_AVAILABLE:
-        print("🌐 Production environment detected (Render)")
-        start_keep_alive()
+    if os.getenv('RENDER_EXTERNAL_URL'):
+        # Imported here: it pulls in `requests`, which only production needs
+        try:
+            from app.keep_alive import start_keep_alive
+        except ImportError:
+            print("⚠️ Keep-alive service not available")
+        else:
+            print("🌐 Production environment detected (Render)")
+            start_keep_alive()
     else:
         print("💻 Local development environment")
     
     # Get port from environment (Render provides this)
     port = int(os.environ.get('PORT', 5050))
     
-    # Run the app
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # SERVER_MODE=asgi (or --asgi): async quiz routes under uvicorn, see app/asgi.py
+    if '--asgi' in sys.argv or os.getenv('SERVER_MODE', 'wsgi').lower() == 'asgi':
+        import uvicorn
+        from app.asgi import create_asgi_app
+        print("⚡ Serving in ASGI mode")
+        uvicorn.run(create_asgi_app(app), host='0.0.0.0', port=port)
+    else:
+        # Run the app
+        app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,169 @@
+"""
+Score a whole cohort of answer sets with StreamAnalyzer
+
+Reads CSV or NDJSON (one student per row/line), scores rows on a process
+pool and writes one result row per student as soon as its batch is done.
+Only a bounded number of batches is ever in flight, so memory stays flat
+no matter how large the input file is.
+
+    python score_cohort.py answers.ndjson results.csv --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services import answer_codec
+from app.services.stream_analyzer import STREAMS
+
+_analyzer = None
+
+
+def _init_worker():
+    """Build one analyzer per worker process"""
+    global _analyzer
+    from app.services.nlp_engine import SimpleNLP
+    from app.services.stream_analyzer import StreamAnalyzer
+    _analyzer = StreamAnalyzer(SimpleNLP())
+
+
+def _score_batch(batch):
+    """Score a list of (student_id, answers) pairs"""
+    results = []
+    for student_id, answers in batch:
+        scores, _, _ = _analyzer.score(answers)
+        total = sum(scores.values())
+        top_stream = max(scores, key=scores.get) if scores else 'Science_PCM'
+        confidence = (scores[top_stream] / total * 100) if total > 0 else 50
+        results.append((student_id, top_stream, round(confidence, 1), scores))
+    return results
+
+
+def _detect_format(path, explicit):
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def read_answer_sets(handle, fmt, id_field):
+    """Yield (student_id, answers) pairs one row at a time"""
+    if fmt == 'csv':
+        for line_no, row in enumerate(csv.DictReader(handle), start=1):
+            student_id = row.pop(id_field, None) or line_no
+            yield student_id, {k: v for k, v in row.items() if v}
+        return
+
+    for line_no, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            answers = record.get('answers', record) if isinstance(record, dict) else None
+            if isinstance(answers, str):
+                answers = json.loads(answers)
+        except ValueError:
+            print(f"⚠️ Skipping invalid JSON on line {line_no}", file=sys.stderr)
+            continue
+        if not isinstance(answers, dict):
+            print(f"⚠️ Skipping line {line_no}: answers are not a JSON object", file=sys.stderr)
+            continue
+        # quiz_sessions exports carry the compact stored encoding
+        yield record.get(id_field) or line_no, answer_codec.decode(answers)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ResultWriter:
+    """Write one scored row per student in CSV or NDJSON"""
+
+    def __init__(self, handle, fmt):
+        self.fmt = fmt
+        self.handle = handle
+        if fmt == 'csv':
+            self.writer = csv.writer(handle)
+            self.writer.writerow(['id', 'top_stream', 'confidence'] + [f'score_{s}' for s in STREAMS])
+
+    def write(self, results):
+        if self.fmt == 'csv':
+            self.writer.writerows(
+                [student_id, top_stream, confidence] + [round(scores.get(s, 0.0), 2) for s in STREAMS]
+                for student_id, top_stream, confidence, scores in results
+            )
+        else:
+            self.handle.writelines(
+                json.dumps({
+                    'id': student_id,
+                    'top_stream': top_stream,
+                    'confidence': confidence,
+                    'all_scores': scores
+                }) + '\n'
+                for student_id, top_stream, confidence, scores in results
+            )
+
+
+def score_file(args):
+    in_fmt = _detect_format(args.input, args.input_format)
+    out_fmt = _detect_format(args.output, args.output_format)
+    max_in_flight = args.workers * args.prefetch
+
+    started = time.perf_counter()
+    rows = 0
+    with open(args.input, newline='', encoding='utf-8') as src, \
+            open(args.output, 'w', newline='', encoding='utf-8') as dst, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        writer = ResultWriter(dst, out_fmt)
+        pending = deque()
+
+        for batch in _batches(read_answer_sets(src, in_fmt, args.id_field), args.batch_size):
+            pending.append(pool.submit(_score_batch, batch))
+            # Keep a bounded window of batches in flight, written in input order
+            while len(pending) >= max_in_flight:
+                results = pending.popleft().result()
+                writer.write(results)
+                rows += len(results)
+
+        while pending:
+            results = pending.popleft().result()
+            writer.write(results)
+            rows += len(results)
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Scored {rows} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a cohort of answer sets with StreamAnalyzer')
+    parser.add_argument('input', help='CSV or NDJSON file of answer sets')
+    parser.add_argument('output', help='CSV or NDJSON file for results')
+    parser.add_argument('--input-format', choices=['csv', 'ndjson'], help='Override format detection for input')
+    parser.add_argument('--output-format', choices=['csv', 'ndjson'], help='Override format detection for output')
+    parser.add_argument('--id-field', default='id', help='Column/key holding the student id (default: id)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per task sent to a worker')
+    parser.add_argument('--prefetch', type=int, default=2, help='Batches in flight per worker')
+    args = parser.parse_args(argv)
+
+    if args.workers < 1 or args.batch_size < 1 or args.prefetch < 1:
+        parser.error('--workers, --batch-size and --prefetch must be at least 1')
+
+    score_file(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Concurrency stress test for /api/quiz/save-answer
+
+Many threads save different answers into the same session at once through
+the real Flask route. Every acknowledged save must survive: the session
+should end up with one key and one version bump per acknowledged save.
+
+Runs against the local SQLite stand-in (app/db/local_backend.py) with
+random latency injected into every call, so reads and writes interleave
+the way they do against a remote database.
+
+    python stress_save_answer.py --threads 16 --saves 50 --mode cas
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The routes get their own client below; nothing for the warmup to connect to
+os.environ.setdefault('WARMUP', '0')
+
+from app import create_app
+from app.db.local_backend import LocalClient
+from app.db.session_store import dump_answers, load_answers
+import app.routes.quiz_routes as quiz_routes
+
+
+def run(args):
+    client = LocalClient(':memory:', latency_ms=args.latency_ms)
+    if args.mode == 'cas':
+        del client.functions['merge_session_answers']
+    quiz_routes.get_supabase = lambda: client
+
+    app = create_app()
+    session_id = client.table('quiz_sessions').insert({
+        'user_id': 'stress-user',
+        'mode': 'ssc',
+        'current_question': 2,
+        'is_completed': False,
+        'answers': dump_answers({'name': 'Stress', 'age': '15'})
+    }).execute().data[0]['id']
+
+    def worker(thread_no):
+        http = app.test_client()
+        failures = 0
+        for n in range(args.saves):
+            response = http.post('/api/quiz/save-answer', json={
+                'session_id': session_id,
+                'question_id': f't{thread_no}_q{n}',
+                'answer': f'answer {thread_no}/{n}',
+                'question_index': 2 + n % 12
+            })
+            if response.status_code != 200:
+                failures += 1
+        return failures
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        failures = sum(pool.map(worker, range(args.threads)))
+    elapsed = time.perf_counter() - started
+
+    session = client.table('quiz_sessions').select('answers, version').eq('id', session_id).execute().data[0]
+    answers = load_answers(session['answers'])
+    attempted = args.threads * args.saves
+    acknowledged = attempted - failures
+    kept = len(answers) - 2
+    print(f"mode={args.mode} threads={args.threads} saves={attempted} "
+          f"acknowledged={acknowledged} rejected={failures} answers_kept={kept} version={session['version']} "
+          f"({attempted / elapsed:,.0f} saves/sec)")
+
+    # A rejected save (409 after exhausting retries) is reported to the client;
+    # an acknowledged save that isn't in the session is a lost update
+    if kept != acknowledged or session['version'] != acknowledged:
+        print("❌ Lost updates detected")
+        return 1
+    print("✅ No lost updates")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrency stress test for /quiz/save-answer')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--saves', type=int, default=25, help='Saves per thread')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Max random latency per DB call')
+    parser.add_argument('--mode', choices=['rpc', 'cas'], default='rpc',
+                        help='rpc: server-side merge; cas: compare-and-swap fallback')
+    args = parser.parse_args(argv)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())